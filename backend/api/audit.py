@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from core.database import get_db
+from core.dependencies import get_current_user
+from core.permissions import role_required
+from models.user import User, UserRole
+from schemas.audit import AuditLogPage
+from services.audit_service import audit_service
+from utils.export import EXPORT_MEDIA_TYPES
+
+router = APIRouter()
+
+def audit_filters(
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on timestamp"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on timestamp"),
+) -> dict:
+    return {"entity_type": entity_type, "entity_id": entity_id, "user_id": user_id, "action": action, "since": since, "until": until}
+
+@router.get("", response_model=AuditLogPage)
+@role_required([UserRole.super_admin])
+def get_audit_logs(
+    filters: dict = Depends(audit_filters),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    items, next_cursor = audit_service.get_logs(db, limit, cursor, **filters)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/export")
+@role_required([UserRole.super_admin])
+def export_audit_logs(
+    filters: dict = Depends(audit_filters),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated column keys; all columns by default"),
+    current_user: User = Depends(get_current_user),
+):
+    keys = audit_service.resolve_export_columns(columns)
+    return StreamingResponse(
+        audit_service.stream(keys, format, **filters),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=audit_logs.{format}"}
+    )
@@ -1,20 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from core.database import get_db
-from core.dependencies import get_current_user
+from core.database import get_async_db
+from core.dependencies import get_current_user_async
 from services.dashboard_service import dashboard_service
 from schemas.dashboard import DashboardResponse
 
 router = APIRouter(tags=["Dashboard"])
 
 @router.get("", response_model=DashboardResponse)
-def get_dashboard(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard(
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    data = dashboard_service.get_dashboard_data(db, current_user)
+    data = await dashboard_service.get_dashboard_data_async(db, current_user)
     if not data:
         raise HTTPException(status_code=404, detail="Dashboard data not found")
     return data
@@ -14,15 +14,17 @@ from models.employee import Employee
 from schemas.api import PaginatedResponse
 
 from repositories.document_repository import document_repository
-from utils.file_storage import upload_file, get_file_stream, get_file_path, delete_file
+from services.org_tree_service import org_tree_service
+from services.preview_service import preview_service
+from utils.file_storage import IMMUTABLE_CACHE, save_upload, file_response, delete_file
 from utils.audit import log_action
-from fastapi.responses import StreamingResponse
+from utils.pagination import paginate, page_response
+from utils.search import apply_search
 from fastapi import Request
 
 router = APIRouter()
 
 ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".docx"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 @router.post("/upload", response_model=List[DocumentResponse])
 async def upload_documents(
@@ -58,11 +60,7 @@ async def upload_documents(
         # Manager: Can upload for self OR direct reports
         if current_user.employee_id != employee_id:
             # Check if target is a direct report
-            is_report = db.query(Employee).filter(
-                Employee.id == employee_id,
-                Employee.manager_id == current_user.employee_id
-            ).first()
-            if not is_report:
+            if not org_tree_service.is_in_team(db, current_user.employee_id, employee_id, depth=1):
                 raise HTTPException(status_code=403, detail="Not authorized to upload for this employee")
     
     responses = []
@@ -75,15 +73,9 @@ async def upload_documents(
                 status_code=400, 
                 detail=f"File {filename} has unsupported extension. Allowed: {ALLOWED_EXTENSIONS}"
             )
-        
-        # Validate size
-        file_size = getattr(file, "size", None)
-        if file_size is not None and file_size > MAX_FILE_SIZE:
-             raise HTTPException(status_code=400, detail=f"File {filename} exceeds 10MB limit")
 
-        # Save file
-        sub_folder = f"employees/{employee_id}/{document_type}"
-        relative_path = upload_file(file, sub_folder)
+        # Save file (size limit enforced while streaming)
+        relative_path = (await save_upload(file)).path
 
         # Create DB record
         db_doc = EmployeeDocument(
@@ -93,19 +85,22 @@ async def upload_documents(
             expiry_date=parsed_expiry,
             verification_status=DocumentVerificationStatus.pending
         )
-        saved_doc = document_repository.create(db, db_doc)
-        
+        db.add(db_doc)
+        db.flush()
         log_action(
             db, 
             current_user.id, 
             "upload", 
             "employee_document", 
-            saved_doc.id, 
+            db_doc.id, 
             {"filename": filename},
             request.client.host
         )
+        db.commit()
+        db.refresh(db_doc)
+        preview_service.schedule(relative_path)
         
-        responses.append(saved_doc)
+        responses.append(db_doc)
 
     return responses
 
@@ -117,6 +112,7 @@ async def get_documents(
     employee_id: Optional[int] = None,
     document_type: Optional[DocumentType] = None,
     verification_status: Optional[DocumentVerificationStatus] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -126,8 +122,7 @@ async def get_documents(
     if current_user.role == UserRole.employee:
         query = query.filter(EmployeeDocument.employee_id == current_user.employee_id)
     elif current_user.role == UserRole.manager:
-        team_members = db.query(Employee.id).filter(Employee.manager_id == current_user.employee_id).all()
-        team_ids = [t[0] for t in team_members]
+        team_ids = org_tree_service.team_ids(db, current_user.employee_id, depth=1)
         if employee_id:
             if employee_id == current_user.employee_id:
                 query = query.filter(EmployeeDocument.employee_id == employee_id)
@@ -153,35 +148,17 @@ async def get_documents(
         if employee_id:
             query = query.filter(EmployeeDocument.employee_id == employee_id)
 
-    if search:
-        from sqlalchemy import or_
-        query = query.filter(or_(
-            Employee.first_name.ilike(f"%{search}%"),
-            Employee.last_name.ilike(f"%{search}%")
-        ))
+    query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, via={Employee: EmployeeDocument.employee_id})
     
     if document_type:
         query = query.filter(EmployeeDocument.document_type == document_type)
     if verification_status:
         query = query.filter(EmployeeDocument.verification_status == verification_status)
         
-    total = query.count()
-    items = query.order_by(EmployeeDocument.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = paginate(query, (EmployeeDocument.created_at, EmployeeDocument.id), skip, limit, cursor, rank=rank)
+    return page_response(items, total, skip, limit, ranked=bool(search))
 
-@router.get("/{id}/download")
-async def download_document(
-    id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _get_readable_document(db: Session, id: int, current_user: User) -> EmployeeDocument:
     db_doc = document_repository.get(db, id)
     if not db_doc:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -194,24 +171,41 @@ async def download_document(
         # Check Manager (Team Access)
         is_manager_of_owner = False
         if current_user.role == UserRole.manager:
-             owner = db.query(Employee).filter(Employee.id == db_doc.employee_id).first()
-             if owner and owner.manager_id == current_user.employee_id:
-                 is_manager_of_owner = True
+             is_manager_of_owner = org_tree_service.is_in_team(db, current_user.employee_id, db_doc.employee_id, depth=1)
         
         if not is_owner and not is_manager_of_owner:
             raise HTTPException(status_code=403, detail="Not authorized to download this document")
-    
+    return db_doc
+
+@router.get("/{id}/download")
+def download_document(
+    id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    db_doc = _get_readable_document(db, id, current_user)
     try:
-        file_stream = get_file_stream(db_doc.file_path)
-        filename = Path(db_doc.file_path).name
-        return StreamingResponse(
-            file_stream(), 
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return file_response(request, db_doc.file_path)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found on storage")
 
+@router.get("/{id}/preview")
+def preview_document(
+    id: int,
+    request: Request,
+    size: str = Query("thumb", pattern="^(thumb|preview)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Downscaled JPEG of an image document, or of a PDF's first page."""
+    db_doc = _get_readable_document(db, id, current_user)
+    preview = preview_service.ensure(db_doc.file_path, size)
+    if not preview:
+        raise HTTPException(status_code=404, detail="No preview available for this document")
+    # A document's file never changes, so neither does its preview
+    return file_response(request, preview, cache_control=f"private, {IMMUTABLE_CACHE}")
+
 # ... verify_document ...
 # ... get_expiries ...
 # ... delete_document ...
@@ -256,9 +250,6 @@ async def verify_document(
     db_doc.verified_by_id = current_user.id
     db_doc.verified_date = func.now()
     
-    db.commit()
-    db.refresh(db_doc)
-    
     log_action(
         db, 
         current_user.id, 
@@ -268,6 +259,8 @@ async def verify_document(
         {"status": db_doc.verification_status, "notes": db_doc.notes},
         request.client.host
     )
+    db.commit()
+    db.refresh(db_doc)
     
     # TODO: Trigger notifications (upload, verification, reupload)
     
@@ -289,8 +282,7 @@ async def get_expiries(
         query = query.filter(EmployeeDocument.employee_id == current_user.employee_id)
     elif current_user.role == UserRole.manager:
         # Filter by team reports
-        team_members = db.query(Employee.id).filter(Employee.manager_id == current_user.employee_id).all()
-        team_ids = [t[0] for t in team_members]
+        team_ids = org_tree_service.team_ids(db, current_user.employee_id, depth=1)
         query = query.filter(EmployeeDocument.employee_id.in_(team_ids))
     
     return query.all()
@@ -318,8 +310,6 @@ async def delete_document(
     
     # Delete DB record
     db.delete(db_doc)
-    db.commit()
-    
     log_action(
         db, 
         current_user.id, 
@@ -329,6 +319,7 @@ async def delete_document(
         {"document_type": db_doc.document_type},
         request.client.host
     )
+    db.commit()
     
     return None
 
@@ -342,8 +333,7 @@ async def get_document_reports(
     
     if current_user.role == UserRole.manager:
         # Filter by team
-        team_members = db.query(Employee.id).filter(Employee.manager_id == current_user.employee_id).all()
-        team_ids = [t[0] for t in team_members]
+        team_ids = org_tree_service.team_ids(db, current_user.employee_id, depth=1)
         query = query.filter(EmployeeDocument.employee_id.in_(team_ids))
     elif current_user.role not in [UserRole.hr_admin, UserRole.super_admin]:
         raise HTTPException(status_code=403, detail="Not authorized to view reports")
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, status, Query, HTTPException, Response, UploadFile, File, Request
+from fastapi import APIRouter, Depends, status, Query, HTTPException, UploadFile, File, Request
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 from typing import List, Optional
+import os
 from core.database import get_db
 from schemas.employee import EmployeeCreate, EmployeeResponse, EmployeeUpdate, EmployeeListResponse
 from services.employee_service import employee_service
+from services.org_tree_service import org_tree_service
+from services.preview_service import preview_service
 from core.dependencies import get_current_user
 from models.user import User, UserRole
 from core.permissions import role_required
 from utils.file_storage import upload_file
+from utils.pagination import page_response
 
 router = APIRouter()
 
@@ -19,18 +25,14 @@ def get_employees(
     department_id: Optional[int] = None,
     status_filter: Optional[str] = None,
     archived: bool = False,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     items, total = employee_service.get_employees_scoped(
-        db, current_user, skip, limit, search, department_id, status_filter, archived
+        db, current_user, skip, limit, search, department_id, status_filter, archived, cursor
     )
-    return {
-        "items": items,
-        "total": total,
-        "page": skip // limit + 1,
-        "size": limit
-    }
+    return page_response(items, total, skip, limit, cursor_keys=("id",), ranked=bool(search))
 
 @router.post("/", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
 @role_required([UserRole.super_admin, UserRole.hr_admin])
@@ -45,12 +47,27 @@ def create_employee(
 @router.get("/export")
 @role_required([UserRole.super_admin, UserRole.hr_admin])
 def export_employees(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated column keys, e.g. employee_code,email,department"),
+    search: Optional[str] = None,
+    department_id: Optional[int] = None,
+    status_filter: Optional[str] = None,
+    archived: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    csv_data = employee_service.export_employees(db, current_user)
-    return Response(
-        content=csv_data,
+    keys = employee_service.resolve_export_columns(columns)
+    filters = {"search": search, "department_id": department_id, "status_filter": status_filter, "archived": archived}
+    if format == "xlsx":
+        path = employee_service.export_employees_xlsx(db, current_user, keys, **filters)
+        return FileResponse(
+            path,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            filename="employees.xlsx",
+            background=BackgroundTask(os.remove, path)
+        )
+    return StreamingResponse(
+        employee_service.stream_employees_csv(current_user, keys, **filters),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=employees.csv"}
     )
@@ -70,7 +87,7 @@ def get_employee(
              raise HTTPException(status_code=404, detail="Employee not found")
         
         if current_user.role == UserRole.manager:
-            if emp.manager_id != current_user.employee_id and emp.id != current_user.employee_id:
+            if emp.id != current_user.employee_id and not org_tree_service.is_in_team(db, current_user.employee_id, emp.id, depth=1):
                 raise HTTPException(status_code=403, detail="Not authorized to view this employee")
         elif current_user.role == UserRole.employee:
             if emp.id != current_user.employee_id:
@@ -115,16 +132,36 @@ def upload_employee_photo(
         raise HTTPException(status_code=400, detail="Only JPG and PNG images are allowed")
     
     # Save file
-    file_path = upload_file(file, f"employees/{employee_id}")
+    file_path = upload_file(file).path
     
     # Update employee record
     emp.profile_photo = file_path
     db.add(emp)
     db.commit()
     db.refresh(emp)
+    preview_service.schedule(file_path)
     
     return emp
 
+@router.get("/{employee_id}/photo")
+def get_employee_photo(
+    employee_id: int,
+    size: str = Query("thumb", pattern="^(thumb|preview|original)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Redirects to the profile photo (downscaled unless size=original) under /uploads, where it is cached for good."""
+    from repositories.employee_repository import employee_repository
+    emp = employee_repository.get_employee_by_id(db, employee_id)
+    if not emp or not emp.profile_photo:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    key = emp.profile_photo
+    if size != "original":
+        key = preview_service.ensure(emp.profile_photo, size) or emp.profile_photo
+    # The redirect itself is short-lived: the photo can be replaced
+    return RedirectResponse(f"/uploads/{key}", status_code=307, headers={"cache-control": "private, max-age=60"})
+
 @router.post("/{employee_id}/archive", response_model=EmployeeResponse)
 @role_required([UserRole.super_admin, UserRole.hr_admin])
 def archive_employee(
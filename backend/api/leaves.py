@@ -1,36 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Form, File, UploadFile, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
-from core.database import get_db
+from core.database import get_db, get_async_db
 from services.leave_service import leave_service
+from services.balance_ledger_service import balance_ledger_service
+from services.leave_import_service import leave_import_service
+from services.leave_export_service import leave_export_service
+from models.leave import LeaveApplicationStatus
 from repositories.leave_repository import leave_repository
 from schemas.leave import (
     LeaveApplicationCreate, LeaveApplicationResponse, 
     LeaveBalanceResponse, LeaveTypeResponse, PublicHolidayResponse,
     LeaveTypeBase, LeaveApprovalAction, PublicHolidayCreate, PublicHolidayUpdate,
-    LeaveRecallRequest
+    LeaveRecallRequest, LeaveLedgerEntryResponse, WorkingDaysRequest,
+    LeaveImportRequest, LeaveImportReport
 )
 from schemas.leave_credit import LeaveCreditRequestCreate, LeaveCreditRequestResponse
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_current_user_async
 from schemas.api import PaginatedResponse
+from utils.pagination import page_response
+from utils.export import EXPORT_MEDIA_TYPES
+from utils.file_storage import file_response
 
 router = APIRouter()
 
 @router.get("/calendar/team", response_model=List[LeaveApplicationResponse])
-def get_team_calendar(
+async def get_team_calendar(
     from_date: date,
     to_date: date,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['manager', 'hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
     if not current_user.employee_id:
          raise HTTPException(status_code=400, detail="User is not linked to an employee record")
     
-    return leave_service.get_team_calendar(db, current_user.employee_id, from_date, to_date)
+    return await leave_service.get_team_calendar_async(db, current_user.employee_id, from_date, to_date)
 
 
 @router.get("/types", response_model=List[LeaveTypeResponse])
@@ -72,57 +81,90 @@ def delete_leave_type(
     return None
 
 @router.get("/balances/my", response_model=List[LeaveBalanceResponse])
-def get_my_balances(
+async def get_my_balances(
     year: int = Query(default=date.today().year),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not current_user.employee_id:
         raise HTTPException(status_code=400, detail="User is not linked to an employee record")
-    return leave_service.get_employee_balances(db, current_user.employee_id, year)
+    return await leave_service.get_employee_balances_async(db, current_user.employee_id, year)
 
 @router.get("/balances/team", response_model=PaginatedResponse[LeaveBalanceResponse])
-def get_team_balances(
+async def get_team_balances(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     year: int = Query(default=date.today().year),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['manager', 'hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
     if not current_user.employee_id:
          raise HTTPException(status_code=400, detail="User is not linked to an employee record")
     
-    items, total = leave_service.get_team_balances(db, current_user.employee_id, year, skip=skip, limit=limit, search=search)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = await leave_service.get_team_balances_async(db, current_user.employee_id, year, skip=skip, limit=limit, search=search, cursor=cursor)
+    return page_response(items, total, skip, limit, cursor_keys=("id",), ranked=bool(search))
 
 @router.get("/balances/all", response_model=PaginatedResponse[LeaveBalanceResponse])
-def get_all_balances(
+async def get_all_balances(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     year: int = Query(default=date.today().year),
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.role not in ['hr_admin', 'super_admin']:
+         raise HTTPException(status_code=403, detail="Not authorized")
+    items, total = await leave_service.get_all_balances_async(db, year, skip=skip, limit=limit, search=search, cursor=cursor)
+    return page_response(items, total, skip, limit, cursor_keys=("employee_id",), has_more=len({b.employee_id for b in items}) == limit, ranked=bool(search))
+
+@router.get("/export/{report}")
+def export_leave_report(
+    report: str = Path(..., pattern="^(applications|balances|liability)$"),
+    year: int = Query(default=date.today().year),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated column keys; all columns by default"),
+    application_status: Optional[LeaveApplicationStatus] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role not in ['hr_admin', 'super_admin']:
+         raise HTTPException(status_code=403, detail="Not authorized")
+    keys = leave_export_service.resolve_columns(report, columns)
+    leave_export_service.prepare(db, report, year)
+    return StreamingResponse(
+        leave_export_service.stream(report, keys, year, format, application_status),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=leave_{report}_{year}.{format}"}
+    )
+
+@router.get("/balances/{employee_id}/ledger", response_model=List[LeaveLedgerEntryResponse])
+def get_balance_ledger(
+    employee_id: int,
+    year: int = Query(default=date.today().year),
+    leave_type_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role not in ['hr_admin', 'super_admin']:
+         raise HTTPException(status_code=403, detail="Not authorized")
+    return balance_ledger_service.get_entries(db, employee_id, year, leave_type_id)
+
+@router.post("/balances/{employee_id}/rebuild", response_model=List[LeaveBalanceResponse])
+def rebuild_balances(
+    employee_id: int,
+    year: int = Query(default=date.today().year),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in ['hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
-    items, total = leave_service.get_all_balances(db, year, skip=skip, limit=limit, search=search)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    return balance_ledger_service.rebuild(db, employee_id, year)
 
 @router.post("/apply", response_model=LeaveApplicationResponse)
 def apply_leave(
@@ -155,74 +197,83 @@ def apply_leave(
     # We pass the attachment separately to the service
     return leave_service.apply_leave(db, application_data, current_user.employee_id, attachment)
 
+@router.post("/import", response_model=LeaveImportReport)
+def import_leave_applications(
+    data: LeaveImportRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role not in ['hr_admin', 'super_admin']:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return leave_import_service.import_applications(db, data.rows, current_user.employee_id, data.dry_run)
+
+@router.post("/import/csv", response_model=LeaveImportReport)
+def import_leave_applications_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Sync so parsing and validating up to LEAVE_IMPORT_MAX_ROWS rows runs in the threadpool, off the event loop
+    if current_user.role not in ['hr_admin', 'super_admin']:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    rows, errors = leave_import_service.parse_csv(file.file.read())
+    return leave_import_service.import_applications(db, rows, current_user.employee_id, dry_run, errors)
+
 @router.get("/applications/my", response_model=PaginatedResponse[LeaveApplicationResponse])
-def get_my_applications(
+async def get_my_applications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     year: Optional[int] = None,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not current_user.employee_id:
         raise HTTPException(status_code=400, detail="User is not linked to an employee record")
-    items, total = leave_repository.get_applications(db, skip=skip, limit=limit, employee_id=current_user.employee_id, year=year)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = await leave_service.get_applications_async(db, skip=skip, limit=limit, employee_id=current_user.employee_id, year=year, cursor=cursor)
+    return page_response(items, total, skip, limit)
 
 @router.get("/applications/team", response_model=PaginatedResponse[LeaveApplicationResponse])
-def get_team_applications(
+async def get_team_applications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     year: Optional[int] = None,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['manager', 'hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
     if not current_user.employee_id:
          raise HTTPException(status_code=400, detail="User is not linked to an employee record")
-    items, total = leave_service.get_team_applications(db, current_user.employee_id, skip=skip, limit=limit, year=year, search=search)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = await leave_service.get_team_applications_async(db, current_user.employee_id, skip=skip, limit=limit, year=year, search=search, cursor=cursor)
+    return page_response(items, total, skip, limit, ranked=bool(search))
 
 @router.get("/applications/all", response_model=PaginatedResponse[LeaveApplicationResponse])
-def get_all_applications(
+async def get_all_applications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     year: Optional[int] = None,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
-    items, total = leave_repository.get_applications(db, skip=skip, limit=limit, year=year, search=search)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = await leave_service.get_applications_async(db, skip=skip, limit=limit, year=year, search=search, cursor=cursor)
+    return page_response(items, total, skip, limit, ranked=bool(search))
 
 @router.get("/approvals/pending", response_model=PaginatedResponse[LeaveApplicationResponse])
-def get_pending_approvals(
+async def get_pending_approvals(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['manager', 'hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
@@ -231,17 +282,11 @@ def get_pending_approvals(
          raise HTTPException(status_code=400, detail="User is not linked to an employee record")
 
     if current_user.role in ['hr_admin', 'super_admin']:
-        items, total = leave_repository.get_applications(db, skip=skip, limit=limit, status="pending", search=search, exclude_employee_id=current_user.employee_id)
+        items, total = await leave_service.get_applications_async(db, skip=skip, limit=limit, status="pending", search=search, exclude_employee_id=current_user.employee_id, cursor=cursor)
     else:
-        items, total = leave_repository.get_pending_applications_for_approver(db, current_user.employee_id, skip=skip, limit=limit, search=search)
+        items, total = await leave_service.get_pending_approvals_async(db, current_user.employee_id, skip=skip, limit=limit, search=search, cursor=cursor)
     
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    return page_response(items, total, skip, limit, ranked=bool(search))
 
 @router.post("/approve/{application_id}", response_model=LeaveApplicationResponse)
 def approve_leave_request(
@@ -340,24 +385,33 @@ def cancel_leave_request(
     return None
 
 @router.get("/stats")
-def get_leave_statistics(
+async def get_leave_statistics(
     year: int = Query(default=date.today().year),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['hr_admin', 'super_admin', 'manager']:
          raise HTTPException(status_code=403, detail="Not authorized")
-    return leave_service.get_leave_stats(db, year)
+    return await leave_service.get_leave_stats_async(db, year)
 
 @router.get("/analytics")
-def get_leave_analytics(
+async def get_leave_analytics(
     year: int = Query(default=date.today().year),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ['hr_admin', 'super_admin']:
          raise HTTPException(status_code=403, detail="Not authorized")
-    return leave_service.get_leave_analytics(db, year)
+    return await leave_service.get_leave_analytics_async(db, year)
+
+@router.post("/working-days", response_model=List[float])
+def calculate_working_days(
+    data: WorkingDaysRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    ranges = [(r.from_date, r.to_date, r.duration_type) for r in data.ranges]
+    return leave_service.calculate_working_days_bulk(db, ranges)
 
 @router.get("/holidays", response_model=List[PublicHolidayResponse])
 def get_holidays(
@@ -408,12 +462,10 @@ def get_restricted_holidays(
 @router.get("/applications/{application_id}/attachment")
 def get_leave_attachment(
     application_id: int,
+    request: Request,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    from utils.file_storage import get_file_stream
-    import os
-    
     app = leave_repository.get_application(db, application_id)
     if not app or not app.attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
@@ -423,15 +475,9 @@ def get_leave_attachment(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     try:
-        file_stream = get_file_stream(app.attachment)
-        filename = os.path.basename(app.attachment)
-        return StreamingResponse(
-            file_stream(),
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"File error: {str(e)}")
+        return file_response(request, app.attachment)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found on storage")
 
 # --- Credit Request Endpoints ---
 
@@ -449,24 +495,20 @@ def request_leave_credit(
 def get_my_credit_requests(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if not current_user.employee_id:
         raise HTTPException(status_code=400, detail="User is not linked to an employee record")
-    items, total = leave_service.get_my_credit_requests(db, current_user.employee_id, skip=skip, limit=limit)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = leave_service.get_my_credit_requests(db, current_user.employee_id, skip=skip, limit=limit, cursor=cursor)
+    return page_response(items, total, skip, limit)
 
 @router.get("/credit/pending", response_model=PaginatedResponse[LeaveCreditRequestResponse])
 def get_pending_credit_requests(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -475,14 +517,8 @@ def get_pending_credit_requests(
          raise HTTPException(status_code=403, detail="Not authorized")
     if not current_user.employee_id:
          raise HTTPException(status_code=400, detail="User is not linked to an employee record")
-    items, total = leave_service.get_pending_credit_requests(db, current_user.employee_id, current_user.role, skip=skip, limit=limit, search=search)
-    return {
-        "items": items,
-        "total": total,
-        "page": (skip // limit) + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if total > 0 else 0
-    }
+    items, total = leave_service.get_pending_credit_requests(db, current_user.employee_id, current_user.role, skip=skip, limit=limit, search=search, cursor=cursor)
+    return page_response(items, total, skip, limit, ranked=bool(search))
 
 @router.post("/credit/{req_id}/approve", response_model=LeaveCreditRequestResponse)
 def approve_leave_credit(
@@ -1,13 +1,14 @@
 from typing import List, Optional
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Body
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from core.database import get_db
 from models.candidate import CandidateOnboardingTask, Candidate
-from utils.file_storage import upload_file
+from utils.file_storage import save_upload
 from schemas.onboarding import (
     CandidateCreate, CandidateResponse, OfferGenerationRequest, 
-    PortalAccessResponse, OfferActionRequest, OnboardingTaskDetail
+    PortalAccessResponse, OfferActionRequest, OnboardingTaskDetail, OfferBatchStatus
 )
 from services.onboarding_service import onboarding_service
 from core.dependencies import get_current_user
@@ -17,7 +18,6 @@ from core.permissions import role_required
 router = APIRouter()
 
 ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".docx"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 # --- Admin Endpoints ---
 
@@ -52,6 +52,33 @@ def send_offer_letter(
     token = onboarding_service.generate_offer_link(db, id, expiry_days, current_user.id, hr_name, hr_email, file)
     return {"message": "Offer generated successfully", "token": token, "link": f"/onboarding/{token}"}
 
+@router.post("/offers/batches", response_model=OfferBatchStatus, status_code=status.HTTP_202_ACCEPTED)
+@role_required([UserRole.super_admin, UserRole.hr_admin])
+def send_bulk_offers(
+    candidate_ids: List[int] = Form(...),
+    expiry_days: int = Form(7),
+    hr_name: str = Form(...),
+    hr_email: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Sends offers to a list of candidates, with one shared offer letter or one per candidate
+    (in the same order). Emails are queued; poll the batch for delivery progress.
+    """
+    batch = onboarding_service.send_bulk_offers(db, candidate_ids, expiry_days, current_user.id, hr_name, hr_email, files)
+    return onboarding_service.get_offer_batch(db, batch.id)
+
+@router.get("/offers/batches/{batch_id}", response_model=OfferBatchStatus)
+@role_required([UserRole.super_admin, UserRole.hr_admin])
+def get_offer_batch(
+    batch_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return onboarding_service.get_offer_batch(db, batch_id)
+
 @router.post("/candidates/{id}/convert", status_code=status.HTTP_201_CREATED)
 @role_required([UserRole.super_admin, UserRole.hr_admin])
 def convert_candidate(
@@ -124,12 +151,9 @@ async def upload_candidate_document(
             status_code=400, 
             detail=f"Unsupported extension. Allowed: {ALLOWED_EXTENSIONS}"
         )
-    
-    # Validate size
-    if file.size and file.size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail=f"File {filename} exceeds 10MB limit")
 
-    file_path = onboarding_service.upload_document_via_token(db, token, task_id, file)
+    # Saves in a worker thread, enforcing the size limit while streaming
+    file_path = await run_in_threadpool(onboarding_service.upload_document_via_token, db, token, task_id, file)
     return {"message": "Document uploaded successfully", "file_path": file_path}
 
 # --- Existing Upload Endpoint (Refined) ---
@@ -158,14 +182,9 @@ async def upload_onboarding_document(
             status_code=400, 
             detail=f"Unsupported extension. Allowed: {ALLOWED_EXTENSIONS}"
         )
-    
-    # Validate size
-    if file.size and file.size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail=f"File {filename} exceeds 10MB limit")
 
-    # Save file
-    sub_folder = f"candidates/{candidate_id}"
-    relative_path = upload_file(file, sub_folder)
+    # Save file (size limit enforced while streaming)
+    relative_path = (await save_upload(file)).path
 
     # Update or create onboarding task
     task = db.query(CandidateOnboardingTask).filter(
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, status, Request, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from core.database import get_db
+from core.database import get_db, get_pool_stats
 from core.dependencies import get_current_user
 from core.permissions import role_required
 from models.user import User, UserRole
@@ -11,6 +11,7 @@ from schemas.settings import (
     DepartmentResponse, DepartmentCreate,
     DesignationResponse, DesignationCreate,
     EmploymentTypeResponse, EmploymentTypeCreate,
+    PoolStatsResponse,
 )
 from schemas.api import PaginatedResponse
 from utils.file_storage import upload_file
@@ -43,7 +44,7 @@ def upload_company_logo(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    path = upload_file(file, "branding")
+    path = upload_file(file).path
     settings = settings_service.get_company_settings(db)
     settings.logo_url = path
     db.add(settings)
@@ -58,7 +59,7 @@ def upload_company_letterhead(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    path = upload_file(file, "branding")
+    path = upload_file(file).path
     settings = settings_service.get_company_settings(db)
     settings.letterhead_url = path
     db.add(settings)
@@ -136,3 +137,8 @@ def get_employment_types(
 @role_required([UserRole.super_admin, UserRole.hr_admin])
 def create_employment_type(request: Request, obj_in: EmploymentTypeCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return settings_service.create_employment_type(db, obj_in, current_user.id, request.client.host)
+
+@router.get("/system/db-pool", response_model=PoolStatsResponse, response_model_by_alias=True)
+@role_required([UserRole.super_admin])
+def get_db_pool_stats(current_user: User = Depends(get_current_user)):
+    return get_pool_stats()
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException, Request
+from utils.file_storage import IMMUTABLE_CACHE, file_response, is_blob
+
+router = APIRouter()
+
+@router.get("/{key:path}")
+def get_upload(key: str, request: Request):
+    # Public like the static mount it replaces (photos and logos load in <img> tags); keys are unguessable
+    try:
+        # A blob key names its content, so what it serves never changes
+        return file_response(request, key, cache_control=f"public, {IMMUTABLE_CACHE}" if is_blob(key) else "no-cache")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
@@ -21,7 +21,62 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: Optional[str] = None
 
     # Storage
-    UPLOAD_ROOT: str
+    STORAGE_BACKEND: str = "local" # "local" (UPLOAD_ROOT) or "s3"
+    UPLOAD_ROOT: str # Local files, or scratch space for uploads in progress with S3
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None # MinIO or another S3-compatible service; AWS when unset
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    # Redirect downloads to presigned URLs so file bytes bypass the API (backends that support it)
+    STORAGE_PRESIGNED_DOWNLOADS: bool = False
+    STORAGE_PRESIGN_EXPIRY_SECONDS: int = 300
+    UPLOAD_MAX_SIZE: int = 10 * 1024 * 1024 # Bytes; larger uploads are cut off with 413
+    # Unreferenced blobs touched more recently than this are kept (a re-upload may be about to reference them)
+    BLOB_COLLECT_GRACE_SECONDS: int = 3600
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024 # Bytes per body message when a file is not sent zero-copy
+
+    # Previews (thumbnails and first-page PDF renders of uploads)
+    PREVIEW_WORKERS: int = 2 # Worker processes
+    PREVIEW_TIMEOUT_SECONDS: int = 20 # How long a request waits for a preview still being rendered
+
+    # Principal Cache (get_current_user)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 4096
+    # Resolve the principal from uid/role/employee_id claims in the access token, skipping the
+    # lookup entirely. Role changes then only apply once the token is refreshed.
+    TRUST_TOKEN_CLAIMS: bool = False
+
+    # Database Pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30 # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer (transaction pooling) server-side prepared statements can't be reused
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Bulk Import
+    LEAVE_IMPORT_MAX_ROWS: int = 10000
+    OFFER_BATCH_MAX_CANDIDATES: int = 1000
+
+    # Working-day calculator (POST /leaves/working-days)
+    WORKING_DAYS_MAX_RANGES: int = 500
+    WORKING_DAYS_MAX_YEAR_SPAN: int = 3 # Calendar years one request may touch; each is indexed and cached
+
+    # Caching
+    WORKING_DAY_CACHE_TTL_SECONDS: int = 300
+    DASHBOARD_CACHE_TTL_SECONDS: int = 60
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = 30
+    ORG_TREE_TTL_SECONDS: int = 300
+
+    # Audit Log (monthly partitions)
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3
+    AUDIT_RETENTION_MONTHS: int = 96 # Older partitions are detached by scripts/audit_maintenance.py
+
+    # Accrual Jobs (scripts/accrual_job.py)
+    ACCRUAL_JOB_CHUNK_SIZE: int = 1000 # Employees per chunk; each chunk commits on its own and is the unit of resume
+    ACCRUAL_JOB_WORKERS: int = 4 # Worker processes, each holding one database connection
 
     # Email
     SMTP_SERVER: Optional[str] = None
@@ -30,6 +85,15 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM_EMAIL: str = "noreply@hrms.leadtap.com"
     SMTP_TLS: bool = True
+    EMAIL_WORKER_ENABLED: bool = True # Deliver the outbox from each API process; turn off when scripts/email_worker.py runs instead
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_SECONDS: float = 5
+    EMAIL_SMTP_CONNECTIONS: int = 2 # Long-lived connections (and parallel sends) per worker
+    EMAIL_SMTP_IDLE_SECONDS: int = 30 # Idle connections are checked with NOOP before reuse
+    EMAIL_SMTP_TIMEOUT_SECONDS: int = 30
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 30 # Doubles per failed attempt, capped at EMAIL_RETRY_MAX_SECONDS
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
 
     @property
     def DATABASE_URL(self) -> str:
@@ -41,6 +105,10 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_DB}"
         )
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return self.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
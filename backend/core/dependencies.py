@@ -3,10 +3,12 @@ from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
-from core.database import get_db
+from core.database import get_db, get_async_db
 from core.config import settings
 from repositories.auth_repository import auth_repository
+from core.principal_cache import Principal, principal_cache
 
 class OAuth2PasswordBearerWithCookie(OAuth2PasswordBearer):
     """
@@ -35,7 +37,7 @@ class OAuth2PasswordBearerWithCookie(OAuth2PasswordBearer):
 
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="api/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
@@ -43,8 +45,28 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
              raise HTTPException(status_code=401, detail="Invalid credentials")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-        
+    return payload
+
+def _cached_principal(payload: dict) -> Optional[Principal]:
+    if settings.TRUST_TOKEN_CLAIMS:
+        principal = Principal.from_claims(payload)
+        if principal:
+            return principal
+    return principal_cache.get(payload["sub"])
+
+def _resolve_principal(db: Session, email: str) -> Principal:
     user = auth_repository.get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(email, principal)
+    return principal
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    payload = _decode_token(token)
+    return _cached_principal(payload) or _resolve_principal(db, payload["sub"])
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """Async variant of get_current_user for routes using get_async_db (shares the request's session)."""
+    payload = _decode_token(token)
+    return _cached_principal(payload) or await db.run_sync(_resolve_principal, payload["sub"])
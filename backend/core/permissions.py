@@ -9,6 +9,7 @@ PERMISSIONS_FILE = Path(__file__).resolve().parents[2] / "docs" / "permissions.j
 
 from functools import wraps
 from fastapi import HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from core.dependencies import get_current_user
 from models.user import User, UserRole
 
@@ -63,7 +64,8 @@ def role_required(allowed_roles: List[UserRole]):
             
             if asyncio.iscoroutinefunction(func):
                 return await func(*args, **kwargs)
-            return func(*args, **kwargs)
+            # The wrapper is async, so FastAPI no longer moves sync endpoints off the event loop itself
+            return await run_in_threadpool(func, *args, **kwargs)
         return wrapper
     return decorator
 
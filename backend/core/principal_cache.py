@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by endpoints (get_current_user).
+    A detached snapshot of the User row, so it can be shared across requests and sessions.
+    """
+    id: int
+    email: str
+    username: Optional[str]
+    role: UserRole
+    employee_id: Optional[int]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=UserRole(user.role),
+            employee_id=user.employee_id
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        """Builds a principal from the claims embedded by AuthService._create_tokens, if present."""
+        if "uid" not in payload or "role" not in payload:
+            return None
+        return cls(
+            id=payload["uid"],
+            email=payload["sub"],
+            username=payload.get("username"),
+            role=UserRole(payload["role"]),
+            employee_id=payload.get("employee_id")
+        )
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of resolved principals keyed on the token subject (email), each entry
+    living at most PRINCIPAL_CACHE_TTL_SECONDS. Entries are dropped whenever the User
+    row is updated or deleted in this process (at flush, and again once the change commits);
+    other worker processes converge within the TTL.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if not entry:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def set(self, subject: str, principal: Principal):
+        if settings.PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + settings.PRINCIPAL_CACHE_TTL_SECONDS, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > settings.PRINCIPAL_CACHE_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: Optional[str] = None):
+        """Drops one subject, or everything when called without arguments."""
+        with self._lock:
+            if subject is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(subject, None)
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session, flush_context):
+    # Covers role and employee linkage changes as well as email renames (old and new subject)
+    emails = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            emails.update(inspect(obj).attrs.email.history.deleted or ())
+            emails.add(obj.email)
+    if not emails:
+        return
+    # Dropped now so this session's own requests see the change, and again after commit: a request
+    # on another session may re-cache the old committed row in between
+    for email in emails:
+        principal_cache.invalidate(email)
+    session.info.setdefault("changed_principals", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    for email in session.info.pop("changed_principals", ()):
+        principal_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed_principals(session, previous_transaction):
+    session.info.pop("changed_principals", None)
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from core.config import settings
-from core.database import Base, engine
-from api import auth, users, leaves, documents, onboarding, employees, settings as settings_api, dashboard
+from core.database import Base, SessionLocal, engine
+from api import auth, users, leaves, documents, onboarding, employees, settings as settings_api, dashboard, uploads, audit
+import services.blob_service # Registers upload reference counting on every session
+from services.preview_service import preview_service
+from services.email_service import email_worker
+from services.audit_service import audit_service
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -32,9 +35,32 @@ app.include_router(onboarding.router, prefix="/api/onboarding", tags=["onboardin
 app.include_router(employees.router, prefix="/api/employees", tags=["employees"])
 app.include_router(settings_api.router, prefix="/api/settings", tags=["settings"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(audit.router, prefix="/api/audit", tags=["audit"])
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_ROOT), name="uploads")
+# Uploaded files, served from whichever storage backend is configured
+app.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+
+@app.on_event("startup")
+def ensure_audit_partitions():
+    # A no-op when scripts/audit_maintenance.py has kept partitions ahead
+    db = SessionLocal()
+    try:
+        audit_service.ensure_upcoming_partitions(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def start_email_worker():
+    if settings.EMAIL_WORKER_ENABLED:
+        email_worker.start()
+
+@app.on_event("shutdown")
+def stop_preview_workers():
+    preview_service.shutdown()
+
+@app.on_event("shutdown")
+def stop_email_worker():
+    email_worker.stop()
 
 @app.get("/")
 async def root():
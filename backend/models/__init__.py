@@ -3,9 +3,12 @@ from .master_data import Designation
 from .employee import Employee
 from .role import Role
 from .user import User
-from .leave import LeaveType, LeaveBalance, LeaveApplication, PublicHoliday
+from .leave import LeaveType, LeaveBalance, LeaveApplication, PublicHoliday, LeaveLedgerEntry
 from .leave_credit import LeaveCreditRequest
 from .document import EmployeeDocument, DocumentType, DocumentVerificationStatus
-from .candidate import Candidate, CandidateOnboardingTask, OnboardingChecklistItem, CandidateStatus
+from .candidate import Candidate, CandidateOnboardingTask, OnboardingChecklistItem, CandidateStatus, OfferBatch, OfferBatchItem
 from .audit import AuditLog
-from .settings import CompanySettings, EmploymentType
\ No newline at end of file
+from .settings import CompanySettings, EmploymentType
+from .storage import StoredBlob
+from .email_outbox import EmailOutbox, EmailStatus
+from .accrual_job import AccrualJob, AccrualJobChunk, AccrualJobKind, AccrualJobStatus
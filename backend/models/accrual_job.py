@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, Text, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from core.database import Base
+import enum
+
+class AccrualJobKind(str, enum.Enum):
+    monthly = "monthly" # Accrue `year` through `month`
+    rollover = "rollover" # Carry `year`'s closing balances into year + 1
+
+class AccrualJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed" # Some chunks failed; running the job again resumes from them
+
+class AccrualJob(Base):
+    """A company-wide accrual or rollover run, split into employee-id chunks processed in parallel."""
+    __tablename__ = "accrual_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(Enum(AccrualJobKind), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=True) # Monthly runs only
+    status = Column(Enum(AccrualJobStatus), default=AccrualJobStatus.pending, nullable=False)
+    total_chunks = Column(Integer, default=0, nullable=False)
+    completed_chunks = Column(Integer, default=0, nullable=False)
+    rows_written = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    chunks = relationship("AccrualJobChunk", back_populates="job", order_by="AccrualJobChunk.chunk_index", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_accrual_jobs_lookup", "kind", "year", "month"),
+    )
+
+class AccrualJobChunk(Base):
+    """One contiguous range of employee ids; committed independently, so a rerun skips completed ones."""
+    __tablename__ = "accrual_job_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("accrual_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    first_employee_id = Column(Integer, nullable=False)
+    last_employee_id = Column(Integer, nullable=False)
+    employee_count = Column(Integer, nullable=False)
+    status = Column(Enum(AccrualJobStatus), default=AccrualJobStatus.pending, nullable=False)
+    rows_written = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    job = relationship("AccrualJob", back_populates="chunks")
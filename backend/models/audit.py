@@ -1,15 +1,37 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, DDL, event
 from sqlalchemy.sql import func
 from core.database import Base
 
 class AuditLog(Base):
+    """
+    Range-partitioned by month on timestamp (audit_logs_YYYY_MM, created ahead of time by
+    services.audit_service; anything outside them lands in audit_logs_default). Partitioned
+    tables need the partition key in the primary key, hence (id, timestamp).
+    """
     __tablename__ = "audit_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String(255), nullable=False)
     entity_type = Column(String(255), nullable=False)
     entity_id = Column(Integer, nullable=False)
     details = Column(JSON)
     ip_address = Column(String(45))
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc), server_default=func.now())
+
+    __table_args__ = (
+        # History of one record, newest first; covers the action/user lookups on it without heap reads
+        Index("ix_audit_logs_entity", "entity_type", "entity_id", "timestamp", postgresql_include=["action", "user_id"]),
+        Index("ix_audit_logs_user", "user_id", "timestamp"),
+        Index("ix_audit_logs_action", "action", "timestamp"),
+        # Rows arrive in timestamp order, so a tiny BRIN index serves time-range scans within a partition
+        Index("ix_audit_logs_timestamp", "timestamp", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT").execute_if(dialect="postgresql"),
+)
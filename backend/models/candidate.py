@@ -79,3 +79,27 @@ class CandidateOnboardingTask(Base):
 
     candidate = relationship("Candidate", backref="onboarding_tasks")
     checklist_item = relationship("OnboardingChecklistItem")
+
+class OfferBatch(Base):
+    """Offers sent to many candidates in one go (hiring drives); delivery is tracked through each item's outbox email."""
+    __tablename__ = "offer_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_by_id = Column(Integer, ForeignKey("users.id"))
+    expiry_days = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    items = relationship("OfferBatchItem", back_populates="batch", cascade="all, delete-orphan", order_by="OfferBatchItem.id")
+
+class OfferBatchItem(Base):
+    __tablename__ = "offer_batch_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("offer_batches.id", ondelete="CASCADE"), nullable=False, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False)
+    email_id = Column(Integer, ForeignKey("email_outbox.id", ondelete="SET NULL"))
+
+    batch = relationship("OfferBatch", back_populates="items")
+    candidate = relationship("Candidate")
+    email = relationship("EmailOutbox")
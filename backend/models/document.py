@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -38,6 +38,11 @@ class DocumentVerificationStatus(str, enum.Enum):
 
 class EmployeeDocument(Base):
     __tablename__ = "employee_documents"
+    __table_args__ = (
+        # Cursor pagination sort key (utils.pagination): newest first, all or per employee
+        Index("ix_employee_documents_created", "created_at", "id"),
+        Index("ix_employee_documents_employee_created", "employee_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, JSON, Index
+from sqlalchemy.sql import func
+from core.database import Base
+import enum
+
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed" # Gave up: permanent SMTP error or EMAIL_MAX_ATTEMPTS reached
+    skipped = "skipped" # SMTP not configured; logged instead
+
+class EmailOutbox(Base):
+    """An outgoing email, written in the sender's transaction and delivered by the outbox worker."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(998), nullable=False)
+    body = Column(Text, nullable=False)
+    is_html = Column(Boolean, default=False, nullable=False)
+    attachments = Column(JSON, nullable=True) # Storage keys of uploaded files
+    status = Column(Enum(EmailStatus), default=EmailStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # The worker's claim query: pending rows that are due, oldest first
+        Index("ix_email_outbox_due", "next_attempt_at", postgresql_where=(status == EmailStatus.pending)),
+    )
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Index, extract
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from core.database import Base
+from core.database import Base, trigram_index
 
 class Employee(Base):
     __tablename__ = "employees"
@@ -65,3 +65,17 @@ class Employee(Base):
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
+
+
+def month_day(column):
+    """MMDD of a date column (e.g. 1231), so yearly recurring dates can be range-scanned."""
+    return extract("month", column) * 100 + extract("day", column)
+
+# Expression indexes for birthday / work anniversary lookups (dashboard celebrations)
+Index("ix_employees_birth_month_day", month_day(Employee.date_of_birth))
+Index("ix_employees_joining_month_day", month_day(Employee.date_of_joining))
+
+# Columns matched by the employee directory search, each with a trigram index
+EMPLOYEE_SEARCH_COLUMNS = (Employee.first_name, Employee.last_name, Employee.employee_code, Employee.email)
+for _column in EMPLOYEE_SEARCH_COLUMNS:
+    trigram_index(f"ix_employees_{_column.key}_trgm", _column)
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Numeric, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Numeric, Text, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
-from core.database import Base
+from core.database import Base, trigram_index
 import enum
 
 class LeaveTypeEnum(str, enum.Enum):
@@ -25,6 +25,16 @@ class LeaveApplicationStatus(str, enum.Enum):
     cancelled = 'cancelled'
     recalled = 'recalled'
 
+class LedgerEntryType(str, enum.Enum):
+    opening = 'opening'
+    accrual = 'accrual'
+    carry_forward = 'carry_forward'
+    credit = 'credit'
+    pending = 'pending'
+    taken = 'taken'
+    recall = 'recall'
+    encashment = 'encashment'
+
 class HolidayType(str, enum.Enum):
     national = 'national'
     festival = 'festival'
@@ -58,6 +68,10 @@ class LeaveType(Base):
 
 class LeaveBalance(Base):
     __tablename__ = "leave_balances"
+    __table_args__ = (
+        # One row per employee/type/year; also the conflict target for bulk accrual upserts
+        UniqueConstraint("employee_id", "leave_type_id", "leave_year", name="uq_leave_balance_employee_type_year"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
@@ -70,6 +84,7 @@ class LeaveBalance(Base):
     pending_approval = Column(Numeric(5, 2), default=0)
     available = Column(Numeric(5, 2), nullable=False)
     encashed = Column(Numeric(5, 2), default=0)
+    accrual_month = Column(Integer, nullable=True) # Month the accrual was last computed through; NULL = stale
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -77,8 +92,33 @@ class LeaveBalance(Base):
     employee = relationship("Employee", backref="leave_balances")
     leave_type = relationship("LeaveType")
 
+class LeaveLedgerEntry(Base):
+    """Append-only history of balance movements. LeaveBalance is the snapshot of these entries."""
+    __tablename__ = "leave_ledger_entries"
+    __table_args__ = (
+        Index("ix_leave_ledger_balance_key", "employee_id", "leave_type_id", "leave_year"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    leave_type_id = Column(Integer, ForeignKey("leave_types.id"), nullable=False)
+    leave_year = Column(Integer, nullable=False)
+    entry_type = Column(Enum(LedgerEntryType), nullable=False)
+    days = Column(Numeric(6, 2), nullable=False) # Signed; e.g. a released reservation is a negative 'pending' entry
+    application_id = Column(Integer, ForeignKey("leave_applications.id", ondelete="SET NULL"), nullable=True)
+    credit_request_id = Column(Integer, ForeignKey("leave_credit_requests.id", ondelete="SET NULL"), nullable=True)
+    note = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class LeaveApplication(Base):
     __tablename__ = "leave_applications"
+    __table_args__ = (
+        trigram_index("ix_leave_applications_reason_trgm", "reason"),
+        # Cursor pagination sort key (utils.pagination): newest first, all or per employee
+        Index("ix_leave_applications_created", "created_at", "id"),
+        Index("ix_leave_applications_employee_created", "employee_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, Enum, DateTime, ForeignKey, Date, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from core.database import Base
+from core.database import Base, trigram_index
 import enum
 
 class LeaveCreditStatus(str, enum.Enum):
@@ -11,6 +11,12 @@ class LeaveCreditStatus(str, enum.Enum):
 
 class LeaveCreditRequest(Base):
     __tablename__ = "leave_credit_requests"
+    __table_args__ = (
+        trigram_index("ix_leave_credit_requests_reason_trgm", "reason"),
+        # Cursor pagination sort key (utils.pagination): newest first, all or per employee
+        Index("ix_leave_credit_requests_created", "created_at", "id"),
+        Index("ix_leave_credit_requests_employee_created", "employee_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from core.database import Base
+
+class StoredBlob(Base):
+    """
+    One content-addressed upload (blobs/<sha256 prefix>/<sha256><ext>) and how many rows
+    point at it. Maintained by services.blob_service on flush; the file is removed once
+    the count drops to zero.
+    """
+    __tablename__ = "stored_blobs"
+
+    path = Column(String(255), primary_key=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
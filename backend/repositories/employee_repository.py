@@ -1,9 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, Query
 from sqlalchemy import or_
 from typing import List, Optional, Tuple
-from models.employee import Employee
+from models.employee import Employee, EMPLOYEE_SEARCH_COLUMNS
 from models.user import User
 from datetime import datetime
+from utils.pagination import paginate
+from utils.search import apply_search
 
 class EmployeeRepository:
     def get_employees(
@@ -15,23 +17,28 @@ class EmployeeRepository:
         department_id: Optional[int] = None,
         status: Optional[str] = None,
         manager_id: Optional[int] = None,
-        archived: bool = False
+        archived: bool = False,
+        cursor: Optional[str] = None
     ) -> Tuple[List[Employee], int]:
-        query = db.query(Employee)
-        
+        query, rank = self.filter_employees(db.query(Employee), search, department_id, status, manager_id, archived)
+        return paginate(query, (Employee.id,), skip, limit, cursor, descending=False, rank=rank)
+
+    def filter_employees(
+        self,
+        query: Query,
+        search: Optional[str] = None,
+        department_id: Optional[int] = None,
+        status: Optional[str] = None,
+        manager_id: Optional[int] = None,
+        archived: bool = False
+    ) -> Tuple[Query, Optional[object]]:
+        """Applies the employee list filters to any query over Employee; returns it with the search rank (if searching)."""
         if not archived:
             query = query.filter(Employee.archived_at == None)
         else:
             query = query.filter(Employee.archived_at != None)
 
-        if search:
-            search_filter = or_(
-                Employee.first_name.ilike(f"%{search}%"),
-                Employee.last_name.ilike(f"%{search}%"),
-                Employee.employee_code.ilike(f"%{search}%"),
-                Employee.email.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
+        query, rank = apply_search(query, search, *EMPLOYEE_SEARCH_COLUMNS)
         
         if department_id:
             query = query.filter(Employee.department_id == department_id)
@@ -43,10 +50,7 @@ class EmployeeRepository:
         if manager_id:
             query = query.filter(or_(Employee.manager_id == manager_id, Employee.id == manager_id))
 
-        total = query.count()
-        items = query.offset(skip).limit(limit).all()
-        
-        return items, total
+        return query, rank
 
     def get_employee_by_id(self, db: Session, employee_id: int) -> Optional[Employee]:
         return db.query(Employee).filter(Employee.id == employee_id).first()
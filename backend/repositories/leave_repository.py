@@ -1,9 +1,12 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, select, text
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, or_, func, text
+from sqlalchemy.dialects.postgresql import insert
 from typing import List, Optional, Tuple
 from datetime import date
 from models.leave import LeaveType, LeaveBalance, LeaveApplication, PublicHoliday, LeaveApplicationStatus
 from models.employee import Employee
+from utils.pagination import paginate
+from utils.search import apply_search
 
 class LeaveRepository:
     # Leave Types
@@ -42,6 +45,21 @@ class LeaveRepository:
             LeaveBalance.leave_year == year
         ).all()
 
+    def get_eligible_balances(self, db: Session, employee_id: int, year: int) -> List[LeaveBalance]:
+        """Balances for the year with their leave type loaded, excluding gender-ineligible types."""
+        return db.query(LeaveBalance).join(Employee, LeaveBalance.employee_id == Employee.id)\
+            .join(LeaveType, LeaveBalance.leave_type_id == LeaveType.id)\
+            .options(contains_eager(LeaveBalance.leave_type))\
+            .filter(
+                LeaveBalance.employee_id == employee_id,
+                LeaveBalance.leave_year == year,
+                or_(
+                    LeaveType.gender_eligibility == None,
+                    LeaveType.gender_eligibility == "All",
+                    func.lower(LeaveType.gender_eligibility) == func.lower(Employee.gender)
+                )
+            ).all()
+
     def create_balance(self, db: Session, balance: LeaveBalance) -> LeaveBalance:
         db.add(balance)
         db.commit()
@@ -53,6 +71,59 @@ class LeaveRepository:
         db.refresh(balance)
         return balance
 
+    def upsert_balances(self, db: Session, rows: List[dict], overwrite_accrued: bool = True):
+        """
+        Bulk INSERT ... ON CONFLICT on (employee_id, leave_type_id, leave_year).
+        Existing rows keep their opening/carry forward/taken/pending figures; only
+        'accrued' (optionally), 'accrual_month' and the derived 'available' are updated.
+        Does not commit.
+        """
+        if not rows:
+            return
+        stmt = insert(LeaveBalance).values(rows)
+        accrued = stmt.excluded.accrued if overwrite_accrued else LeaveBalance.accrued
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["employee_id", "leave_type_id", "leave_year"],
+            set_={
+                "accrued": accrued,
+                "accrual_month": stmt.excluded.accrual_month,
+                "available": LeaveBalance.opening_balance + accrued + LeaveBalance.carry_forward - LeaveBalance.taken - LeaveBalance.pending_approval - LeaveBalance.encashed,
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+    def insert_missing_balances(self, db: Session, rows: List[dict]) -> set:
+        """
+        Bulk INSERT ... ON CONFLICT DO NOTHING; returns the (employee_id, leave_type_id) keys
+        actually inserted. A row being inserted by another open transaction is waited for
+        and skipped. Does not commit.
+        """
+        if not rows:
+            return set()
+        stmt = insert(LeaveBalance).values(rows).on_conflict_do_nothing(
+            index_elements=["employee_id", "leave_type_id", "leave_year"]
+        ).returning(LeaveBalance.employee_id, LeaveBalance.leave_type_id)
+        return {(r.employee_id, r.leave_type_id) for r in db.execute(stmt)}
+
+    def upsert_carry_forward(self, db: Session, rows: List[dict]):
+        """
+        Bulk INSERT ... ON CONFLICT setting 'carry_forward' (and the derived 'available')
+        on the given rows; every other figure of an existing row is kept. Does not commit.
+        """
+        if not rows:
+            return
+        stmt = insert(LeaveBalance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["employee_id", "leave_type_id", "leave_year"],
+            set_={
+                "carry_forward": stmt.excluded.carry_forward,
+                "available": LeaveBalance.opening_balance + LeaveBalance.accrued + stmt.excluded.carry_forward - LeaveBalance.taken - LeaveBalance.pending_approval - LeaveBalance.encashed,
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
     # Leave Applications
     def create_application(self, db: Session, application: LeaveApplication) -> LeaveApplication:
         db.add(application)
@@ -73,7 +144,8 @@ class LeaveRepository:
         status: Optional[str] = None, 
         year: Optional[int] = None,
         search: Optional[str] = None,
-        exclude_employee_id: Optional[int] = None
+        exclude_employee_id: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> Tuple[List[LeaveApplication], int]:
         query = db.query(LeaveApplication).join(Employee, LeaveApplication.employee_id == Employee.id).join(LeaveType, LeaveApplication.leave_type_id == LeaveType.id)
         
@@ -91,74 +163,57 @@ class LeaveRepository:
         if exclude_employee_id:
             query = query.filter(LeaveApplication.employee_id != exclude_employee_id)
         
-        if search:
-            from sqlalchemy import or_
-            query = query.filter(or_(
-                Employee.first_name.ilike(f"%{search}%"),
-                Employee.last_name.ilike(f"%{search}%"),
-                LeaveApplication.reason.ilike(f"%{search}%")
-            ))
+        query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, LeaveApplication.reason,
+                                   via={Employee: LeaveApplication.employee_id})
             
-        total = query.count()
-        apps = query.order_by(LeaveApplication.created_at.desc()).offset(skip).limit(limit).all()
-        
+        # Hydrate employee and leave type from the joins already in the query (no per-row lazy loads)
+        apps, total = paginate(
+            query, (LeaveApplication.created_at, LeaveApplication.id), skip, limit, cursor,
+            options=(contains_eager(LeaveApplication.employee), contains_eager(LeaveApplication.leave_type)), rank=rank
+        )
+        self._set_display_names(apps)
+        return apps, total
+
+    def _set_display_names(self, apps: List[LeaveApplication]):
         for app in apps:
             app.leave_type_name = app.leave_type.name.value.replace('_', ' ').title() if app.leave_type else None
             app.employee_name = app.employee.full_name if app.employee else None
-        
-        return apps, total
     
-    def get_balances_for_employees(self, db: Session, employee_ids: List[int], year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None) -> Tuple[List[LeaveBalance], int]:
+    def get_balances_for_employees(self, db: Session, employee_ids: List[int], year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None, cursor: Optional[str] = None) -> Tuple[List[LeaveBalance], int]:
         query = db.query(LeaveBalance).join(Employee).join(LeaveType).filter(
             LeaveBalance.employee_id.in_(employee_ids),
             LeaveBalance.leave_year == year
         )
 
-        if search:
-            from sqlalchemy import or_
-            search_filter = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Employee.first_name.ilike(search_filter),
-                    Employee.last_name.ilike(search_filter),
-                    LeaveType.name.ilike(search_filter)
-                )
-            )
+        query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, LeaveType.name,
+                                   via={Employee: LeaveBalance.employee_id, LeaveType: LeaveBalance.leave_type_id})
 
-        total = query.count()
-        items = query.offset(skip).limit(limit).all()
-        return items, total
+        return paginate(
+            query, (LeaveBalance.id,), skip, limit, cursor, descending=False,
+            options=(contains_eager(LeaveBalance.employee), contains_eager(LeaveBalance.leave_type)), rank=rank
+        )
 
-    def get_pending_applications_for_approver(self, db: Session, approver_id: int, skip: int = 0, limit: int = 10, search: Optional[str] = None) -> Tuple[List[LeaveApplication], int]:
+    def get_pending_applications_for_approver(self, db: Session, approver_id: int, skip: int = 0, limit: int = 10, search: Optional[str] = None, cursor: Optional[str] = None) -> Tuple[List[LeaveApplication], int]:
          # Uses manager_id to find direct reports
          # Manager only sees Level 1 pending approvals
          # Explicitly exclude the approver's own applications if they somehow report to themselves or if the query structure allows it
-         query = db.query(LeaveApplication).join(Employee, LeaveApplication.employee_id == Employee.id).filter(
+         query = db.query(LeaveApplication).join(Employee, LeaveApplication.employee_id == Employee.id)\
+             .join(LeaveType, LeaveApplication.leave_type_id == LeaveType.id).filter(
              Employee.manager_id == approver_id,
              LeaveApplication.status == LeaveApplicationStatus.pending,
              LeaveApplication.current_approval_step == 1,
              LeaveApplication.employee_id != approver_id
          )
          
-         if search:
-             from sqlalchemy import or_
-             query = query.filter(or_(
-                 Employee.first_name.ilike(f"%{search}%"),
-                 Employee.last_name.ilike(f"%{search}%"),
-                 LeaveApplication.reason.ilike(f"%{search}%")
-             ))
-
-         total = query.count()
-         apps = query.order_by(LeaveApplication.created_at.desc()).offset(skip).limit(limit).all()
-         for app in apps:
-            app.leave_type_name = app.leave_type.name.value.replace('_', ' ').title() if app.leave_type else None
-            app.employee_name = app.employee.full_name if app.employee else None
-         return apps, total
+         query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, LeaveApplication.reason,
+                                    via={Employee: LeaveApplication.employee_id})
 
-    def get_team_employee_ids(self, db: Session, manager_id: int) -> List[int]:
-        # Call the recursive function from DB using select()
-        result = db.execute(select(func.get_team_employee_ids(manager_id))).fetchall()
-        return [r[0] for r in result]
+         apps, total = paginate(
+             query, (LeaveApplication.created_at, LeaveApplication.id), skip, limit, cursor,
+             options=(contains_eager(LeaveApplication.employee), contains_eager(LeaveApplication.leave_type)), rank=rank
+         )
+         self._set_display_names(apps)
+         return apps, total
 
     def update_application_status(self, db: Session, application: LeaveApplication, status: str, approver_id: int):
         application.status = status
@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Optional
 from pydantic import BaseModel
 
 T = TypeVar("T")
@@ -9,3 +9,6 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     size: int
     pages: int
+    # Opt-in keyset pagination: pass as ?cursor= to get the next page (skip is then ignored
+    # and total may come from a short-lived cache)
+    next_cursor: Optional[str] = None
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional, List, Any
+from datetime import datetime
+
+class AuditLogResponse(BaseModel):
+    id: int
+    timestamp: datetime
+    user_id: Optional[int] = None
+    action: str
+    entity_type: str
+    entity_id: int
+    details: Optional[Any] = None
+    ip_address: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    # Pass as ?cursor= for the next (older) page; there is no total
+    next_cursor: Optional[str] = None
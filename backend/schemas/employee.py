@@ -110,3 +110,4 @@ class EmployeeListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None # Pass as ?cursor= for keyset pagination
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, condecimal
+from pydantic import BaseModel, Field, condecimal, model_validator
 from typing import Optional, List
 from datetime import date, datetime
-from models.leave import LeaveTypeEnum, LeaveApplicationStatus, HolidayType
+from core.config import settings
+from models.leave import LeaveTypeEnum, LeaveApplicationStatus, HolidayType, LedgerEntryType
 from schemas.employee import EmployeeResponse
 
 # Leave Type Schemas
@@ -54,6 +55,21 @@ class LeaveBalanceResponse(LeaveBalanceBase):
     class Config:
         from_attributes = True
 
+class LeaveLedgerEntryResponse(BaseModel):
+    id: int
+    employee_id: int
+    leave_type_id: int
+    leave_year: int
+    entry_type: LedgerEntryType
+    days: float
+    application_id: Optional[int] = None
+    credit_request_id: Optional[int] = None
+    note: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 # Leave Application Schemas
 class LeaveApplicationCreate(BaseModel):
     leave_type_id: int
@@ -113,6 +129,55 @@ class PublicHolidayResponse(PublicHolidayBase):
     class Config:
         from_attributes = True
 
+class WorkingDaysRange(BaseModel):
+    from_date: date
+    to_date: Optional[date] = None
+    duration_type: str = "Full Day"
+
+    @model_validator(mode="after")
+    def validate_order(self):
+        if self.to_date and self.to_date < self.from_date:
+            raise ValueError("to_date must not be before from_date")
+        return self
+
+class WorkingDaysRequest(BaseModel):
+    ranges: List[WorkingDaysRange]
+
+    @model_validator(mode="after")
+    def validate_size(self):
+        # Every year touched gets a cached per-day index, so bound what one request can build
+        if len(self.ranges) > settings.WORKING_DAYS_MAX_RANGES:
+            raise ValueError(f"At most {settings.WORKING_DAYS_MAX_RANGES} ranges per request")
+        if self.ranges:
+            first = min(r.from_date.year for r in self.ranges)
+            last = max((r.to_date or r.from_date).year for r in self.ranges)
+            if last - first + 1 > settings.WORKING_DAYS_MAX_YEAR_SPAN:
+                raise ValueError(f"Ranges may span at most {settings.WORKING_DAYS_MAX_YEAR_SPAN} calendar years")
+        return self
+
+class LeaveImportRow(LeaveApplicationCreate):
+    employee_id: int
+    number_of_days: Optional[float] = None # Recomputed from the working-day calendar
+    status: LeaveApplicationStatus = LeaveApplicationStatus.pending
+
+class LeaveImportRequest(BaseModel):
+    rows: List[LeaveImportRow]
+    dry_run: bool = False
+
+class LeaveImportRowResult(BaseModel):
+    row: int
+    success: bool
+    application_id: Optional[int] = None
+    number_of_days: Optional[float] = None
+    error: Optional[str] = None
+
+class LeaveImportReport(BaseModel):
+    total: int
+    imported: int
+    failed: int
+    dry_run: bool = False
+    results: List[LeaveImportRowResult]
+
 class LeaveApprovalAction(BaseModel):
     comments: Optional[str] = None
 
@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
 from models.candidate import CandidateStatus
+from models.email_outbox import EmailStatus
 
 # --- Candidate Management (Admin) ---
 
@@ -54,6 +55,23 @@ class OfferGenerationRequest(BaseModel):
     expiry_days: int = 7
     # In future: template_id, custom_clauses
 
+class OfferBatchItemStatus(BaseModel):
+    candidate_id: int
+    full_name: str
+    email: str
+    status: Optional[EmailStatus] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+class OfferBatchStatus(BaseModel):
+    id: int
+    total: int
+    created_at: Optional[datetime] = None
+    counts: Dict[str, int] # Offer emails per delivery status
+    completed: bool # Nothing left pending
+    items: List[OfferBatchItemStatus]
+
 # --- Portal (Candidate View) ---
 
 class OnboardingChecklistItemSchema(BaseModel):
@@ -72,3 +72,20 @@ class EmploymentTypeResponse(EmploymentTypeCreate):
     
     class Config:
         from_attributes = True
+
+# --- System ---
+
+class PoolStats(BaseModel):
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+class PoolStatsResponse(BaseModel):
+    sync: PoolStats
+    async_: PoolStats = Field(..., alias="async")
@@ -0,0 +1,55 @@
+"""
+Company-wide leave accrual, meant to run from cron: `monthly` at month end accrues the
+year through the current month, `rollover` after year end carries the year's closing
+balances into the next one. Work is split into employee chunks run in parallel worker
+processes; rerunning an unfinished job resumes from the chunks it has not completed.
+Usage: python -m scripts.accrual_job monthly|rollover [--year YEAR] [--workers N] [--chunk-size N]
+       python -m scripts.accrual_job status
+"""
+import argparse
+import sys
+from datetime import date
+
+from core.database import SessionLocal
+from models.accrual_job import AccrualJobKind, AccrualJobStatus
+from services.accrual_job_service import accrual_job_service
+
+
+def _print_job(job):
+    print(f"  job {job.id}: {job.kind.value} {job.year}{f'/{job.month:02d}' if job.month else ''} "
+          f"{job.status.value}, {job.completed_chunks}/{job.total_chunks} chunks, {job.rows_written} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run company-wide leave accrual jobs")
+    parser.add_argument("command", choices=[k.value for k in AccrualJobKind] + ["status"])
+    parser.add_argument("--year", type=int, help="Year to accrue (monthly) or to roll over from (default: this year, last year for rollover)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: ACCRUAL_JOB_WORKERS)")
+    parser.add_argument("--chunk-size", type=int, help="Employees per chunk for a new job (default: ACCRUAL_JOB_CHUNK_SIZE)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "status":
+            for job in accrual_job_service.get_jobs(db):
+                _print_job(job)
+            return
+
+        kind = AccrualJobKind(args.command)
+        year = args.year or (date.today().year - 1 if kind == AccrualJobKind.rollover else date.today().year)
+        job = accrual_job_service.start(db, kind, year, chunk_size=args.chunk_size)
+        resumed = job.completed_chunks or job.status != AccrualJobStatus.pending
+        print(f"{'Resuming' if resumed else 'Starting'} {kind.value} job {job.id} for {year}: {job.total_chunks} chunks")
+
+        job = accrual_job_service.run(db, job, workers=args.workers, progress=lambda j: print(
+            f"  {j.completed_chunks}/{j.total_chunks} chunks, {j.rows_written} rows", flush=True
+        ))
+        _print_job(job)
+        if job.status != AccrualJobStatus.completed:
+            print(f"Error: {job.error}. Run again to retry the failed chunks.")
+            sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
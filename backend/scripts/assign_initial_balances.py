@@ -10,6 +10,8 @@ from models.employee import Employee
 from models.leave import LeaveType, LeaveBalance, LeaveTypeEnum
 from repositories.leave_repository import leave_repository
 from services.leave_service import leave_service
+from services.balance_ledger_service import balance_ledger_service
+from models.leave import LedgerEntryType
 
 def main():
     db = SessionLocal()
@@ -23,34 +25,29 @@ def main():
         current_year = date.today().year
         
         print(f"Assigning initial balances for {len(employees)} employees for year {current_year}...")
+
+        # Existing balances for the year in one query rather than one per employee/type
+        balances = {
+            (b.employee_id, b.leave_type_id): b
+            for b in db.query(LeaveBalance).filter(LeaveBalance.leave_year == current_year)
+        }
         
         for emp in employees:
             for lt in leave_types:
                 # Check if balance exists
-                balance = leave_repository.get_balance(db, emp.id, lt.id, current_year)
+                balance = balances.get((emp.id, lt.id))
                 
                 # We want to give some initial "Opening Balance" so they can actually apply
                 initial_available = Decimal("10.0") # Give 10 days of each type for testing
                 
                 if not balance:
-                    balance = LeaveBalance(
-                        employee_id=emp.id,
-                        leave_type_id=lt.id,
-                        leave_year=current_year,
-                        opening_balance=initial_available,
-                        available=initial_available,
-                        accrued=0,
-                        taken=0,
-                        pending_approval=0,
-                        carry_forward=0
-                    )
-                    db.add(balance)
+                    balance = balance_ledger_service.get_or_create_balance(db, emp.id, lt.id, current_year)
+                    balance_ledger_service.post(db, balance, LedgerEntryType.opening, initial_available, note="Initial balance")
                     print(f"  Created balance for {emp.email}: {lt.name.value} = {initial_available}")
                 else:
                     # Update existing balance to have some days
                     if balance.available == 0:
-                        balance.opening_balance = initial_available
-                        balance.available = initial_available
+                        balance_ledger_service.post(db, balance, LedgerEntryType.opening, initial_available - balance.opening_balance, note="Initial balance")
                         print(f"  Updated balance for {emp.email}: {lt.name.value} = {initial_available}")
         
         db.commit()
@@ -0,0 +1,24 @@
+"""
+Audit log partition upkeep, meant to run daily from cron: creates the coming months'
+partitions and detaches those older than AUDIT_RETENTION_MONTHS (kept as standalone
+tables for archiving, or dropped with --drop).
+Usage: python -m scripts.audit_maintenance [--drop]
+"""
+import sys
+
+from core.database import SessionLocal
+from services.audit_service import audit_service
+
+
+def main():
+    db = SessionLocal()
+    try:
+        created = audit_service.ensure_upcoming_partitions(db)
+        print(f"Created partitions: {', '.join(created) or 'none'}")
+        detached = audit_service.detach_expired_partitions(db, drop="--drop" in sys.argv[1:])
+        print(f"{'Dropped' if '--drop' in sys.argv[1:] else 'Detached'} partitions: {', '.join(detached) or 'none'}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Employee directory and leave applications search latency at 10k / 100k / 1M rows, with the
+trigram indexes versus a forced sequential scan (the plan the old leading-wildcard ILIKE
+search got). The leave search spans employee names and the application reason, so it also
+measures the per-table UNION subqueries (utils.search) against the joined scan.
+
+Synthetic employees, each with one leave application, are inserted inside one transaction
+that is rolled back at the end, so nothing is left behind.
+Usage: python -m scripts.benchmark_search [10000 100000 1000000]
+"""
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from core.database import SessionLocal
+from repositories.employee_repository import employee_repository
+from repositories.leave_repository import leave_repository
+
+SIZES = [10_000, 100_000, 1_000_000]
+TERMS = ["Kumar", "priya kumar", "BENCH04242", "bench7@", "zzqx"]
+LEAVE_TERMS = ["Kumar", "priya fever", "wedding", "zzqx"]
+RUNS = 5
+
+FIRST_NAMES = "ARRAY['Priya','Arun','Kavya','Rahul','Divya','Karthik','Meena','Vijay','Anitha','Suresh']"
+LAST_NAMES = "ARRAY['Kumar','Sharma','Iyer','Nair','Reddy','Menon','Pillai','Das','Rao','Singh','Varma']"
+REASONS = "ARRAY['Fever and cold','Family function','Sister''s wedding','Medical appointment','Travelling home','Personal work','Child unwell']"
+
+
+def insert_employees(db, start: int, stop: int):
+    db.execute(text(f"""
+        INSERT INTO employees (first_name, last_name, email, employee_code, hashed_password, employment_status, is_active)
+        SELECT {FIRST_NAMES}[1 + i % 10],
+               {LAST_NAMES}[1 + i % 11] || (i % 97)::text,
+               'bench' || i || '@example.invalid',
+               'BENCH' || lpad(i::text, 7, '0'),
+               'benchmark', 'active', true
+        FROM generate_series(:start, :stop - 1) AS i
+    """), {"start": start, "stop": stop})
+    db.execute(text("ANALYZE employees"))
+
+
+def insert_leave_applications(db, start: int, stop: int):
+    """One application per synthetic employee inserted above, under the first leave type."""
+    if db.execute(text("SELECT 1 FROM leave_types LIMIT 1")).first() is None:
+        db.execute(text("""
+            INSERT INTO leave_types (name, abbr, annual_entitlement, accrual_method)
+            VALUES ('casual_leave', 'CL', 12, 'yearly')
+        """))
+    db.execute(text(f"""
+        INSERT INTO leave_applications (employee_id, leave_type_id, duration_type, from_date, to_date,
+                                        number_of_days, reason, status, current_approval_step)
+        SELECT e.id, (SELECT min(id) FROM leave_types), 'Full Day',
+               DATE '2024-01-01' + (e.id % 365), DATE '2024-01-01' + (e.id % 365), 1,
+               {REASONS}[1 + e.id % 7] || ' ' || e.id, 'pending', 1
+        FROM employees e
+        WHERE e.employee_code BETWEEN 'BENCH' || lpad(CAST(:start AS text), 7, '0') AND 'BENCH' || lpad(CAST(:stop - 1 AS text), 7, '0')
+    """), {"start": start, "stop": stop})
+    db.execute(text("ANALYZE leave_applications"))
+
+
+def median_ms(db, search) -> float:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        search()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def compare(db, size: int, label: str, search):
+    indexed = median_ms(db, search)
+    db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    db.execute(text("SET LOCAL enable_indexscan = off"))
+    sequential = median_ms(db, search)
+    db.execute(text("SET LOCAL enable_bitmapscan = on"))
+    db.execute(text("SET LOCAL enable_indexscan = on"))
+    print(f"{size:>9}  {label:<22} {indexed:>11.1f} {sequential:>12.1f}")
+
+
+def main(sizes):
+    db = SessionLocal()
+    try:
+        inserted = 0
+        print(f"{'rows':>9}  {'search':<22} {'trigram ms':>11} {'seq scan ms':>12}")
+        for size in sizes:
+            insert_employees(db, inserted, size)
+            insert_leave_applications(db, inserted, size)
+            inserted = size
+            for term in TERMS:
+                compare(db, size, f"employees: {term}", lambda: employee_repository.get_employees(db, skip=0, limit=20, search=term))
+            for term in LEAVE_TERMS:
+                compare(db, size, f"leaves: {term}", lambda: leave_repository.get_applications(db, skip=0, limit=20, search=term))
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,15 @@
+"""
+Upload store upkeep, meant to run hourly from cron: deletes every blob that is no longer
+referenced and is past BLOB_COLLECT_GRACE_SECONDS. Blobs released within the grace period
+(e.g. a document replaced soon after upload) are only removed by this sweep.
+Usage: python -m scripts.blob_maintenance
+"""
+from services.blob_service import blob_service
+
+
+def main():
+    removed = blob_service.collect()
+    print(f"Removed {removed} unreferenced blob(s)")
+
+if __name__ == "__main__":
+    main()
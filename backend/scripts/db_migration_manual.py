@@ -1,8 +1,13 @@
 
+from datetime import date, datetime, timezone
+from pathlib import Path
 from sqlalchemy import create_engine, text
 from core.config import settings
-from core.database import Base, engine as db_engine
+from core.database import Base, SessionLocal, engine as db_engine
 import models # Register all models
+from services.audit_service import add_months, audit_service
+from services.blob_service import BLOB_REFERENCES, blob_service
+from utils.file_storage import adopt_file, is_blob
 
 def migrate():
     print("Starting manual migration...")
@@ -50,10 +55,143 @@ def migrate():
         except Exception as e:
             print(f" - Error adding approver_note: {e}")
 
+        print("Checking/Adding 'accrual_month' to leave_balances...")
+        try:
+            conn.execute(text("ALTER TABLE leave_balances ADD COLUMN IF NOT EXISTS accrual_month INTEGER"))
+            print(" - 'accrual_month' column checked/added.")
+        except Exception as e:
+            print(f" - Error adding accrual_month: {e}")
+
+        print("Checking/Adding unique index on leave_balances...")
+        try:
+            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_leave_balance_employee_type_year ON leave_balances (employee_id, leave_type_id, leave_year)"))
+            print(" - 'uq_leave_balance_employee_type_year' index checked/added.")
+        except Exception as e:
+            print(f" - Error adding leave_balances unique index (remove duplicate balance rows first): {e}")
+
+        print("Checking/Adding month-day indexes on employees...")
+        try:
+            for name, column in [("ix_employees_birth_month_day", "date_of_birth"), ("ix_employees_joining_month_day", "date_of_joining")]:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON employees ((EXTRACT(month FROM {column}) * 100 + EXTRACT(day FROM {column})))"))
+            print(" - Celebration indexes checked/added.")
+        except Exception as e:
+            print(f" - Error adding celebration indexes: {e}")
+
+        print("Checking/Adding trigram search indexes...")
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for table, column in [
+                ("employees", "first_name"),
+                ("employees", "last_name"),
+                ("employees", "employee_code"),
+                ("employees", "email"),
+                ("leave_applications", "reason"),
+                ("leave_credit_requests", "reason"),
+            ]:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)"))
+            print(" - Search indexes checked/added.")
+        except Exception as e:
+            print(f" - Error adding search indexes (pg_trgm must be available): {e}")
+
+        print("Checking/Adding pagination sort-key indexes...")
+        try:
+            for table in ["leave_applications", "leave_credit_requests", "employee_documents"]:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_created ON {table} (created_at, id)"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_employee_created ON {table} (employee_id, created_at, id)"))
+            print(" - Pagination indexes checked/added.")
+        except Exception as e:
+            print(f" - Error adding pagination indexes: {e}")
+
+        # A plain audit_logs table is set aside here; create_all then creates the partitioned one
+        # (with its indexes) and the rows are copied across below
+        kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('audit_logs')")).scalar()
+        if kind == "r":
+            print("Setting aside unpartitioned audit_logs...")
+            conn.execute(text("ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned"))
+            conn.execute(text("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey"))
+            for index in ["ix_audit_logs_id", "ix_audit_logs_entity", "ix_audit_logs_user", "ix_audit_logs_action", "ix_audit_logs_timestamp"]:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
         conn.commit()
     
     print("Running Base.metadata.create_all to create new tables if missing (Settings, etc.)...")
     Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        # Seed the ledger from existing snapshots so rebuilds reproduce today's balances
+        has_entries = conn.execute(text("SELECT EXISTS (SELECT 1 FROM leave_ledger_entries)")).scalar()
+        if not has_entries:
+            print("Backfilling leave_ledger_entries from leave_balances...")
+            for column, entry_type in [
+                ("opening_balance", "opening"),
+                ("accrued", "accrual"),
+                ("carry_forward", "carry_forward"),
+                ("taken", "taken"),
+                ("pending_approval", "pending"),
+                ("encashed", "encashment"),
+            ]:
+                conn.execute(text(f"""
+                    INSERT INTO leave_ledger_entries (employee_id, leave_type_id, leave_year, entry_type, days, note)
+                    SELECT employee_id, leave_type_id, leave_year, '{entry_type}', {column}, 'Backfilled from snapshot'
+                    FROM leave_balances
+                    WHERE COALESCE({column}, 0) <> 0
+                """))
+            conn.commit()
+            print(" - Ledger backfilled.")
+
+    print("Checking audit_logs partitions...")
+    db = SessionLocal()
+    try:
+        legacy = db.execute(text("SELECT to_regclass('audit_logs_unpartitioned')")).scalar()
+        first, last = date.today(), date.today()
+        if legacy:
+            bounds = db.execute(text("SELECT min(timestamp), max(timestamp) FROM audit_logs_unpartitioned")).one()
+            first, last = (bounds[0] or datetime.now(timezone.utc)).date(), (bounds[1] or datetime.now(timezone.utc)).date()
+        audit_service.ensure_partitions(db, min(first, date.today()), add_months(date.today().replace(day=1), settings.AUDIT_PARTITION_MONTHS_AHEAD))
+        if legacy:
+            columns = "id, user_id, action, entity_type, entity_id, details, ip_address, timestamp"
+            copied = db.execute(text(
+                f"INSERT INTO audit_logs ({columns}) "
+                f"SELECT id, user_id, action, entity_type, entity_id, details, ip_address, COALESCE(timestamp, now()) FROM audit_logs_unpartitioned"
+            )).rowcount
+            db.execute(text("SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), COALESCE((SELECT max(id) FROM audit_logs), 1))"))
+            db.execute(text("DROP TABLE audit_logs_unpartitioned"))
+            db.commit()
+            print(f" - {copied} audit entries moved into monthly partitions.")
+        print(" - Audit log partitions checked/added.")
+    finally:
+        db.close()
+
+    print("Moving uploads into the content-addressed blob store...")
+    db = SessionLocal()
+    adopted = {}
+    try:
+        for model, attr, key in BLOB_REFERENCES:
+            for obj in db.query(model).filter(getattr(model, attr).isnot(None)):
+                value = getattr(obj, attr)
+                path = (value.get(key) if isinstance(value, dict) else None) if key else value
+                # Lists (email attachments) only ever hold blob keys
+                if not isinstance(path, str) or not path or is_blob(path):
+                    continue
+                if path not in adopted:
+                    try:
+                        adopted[path] = adopt_file(path)
+                    except FileNotFoundError:
+                        print(f" - Missing file, left as is: {path}")
+                        adopted[path] = None
+                if adopted[path]:
+                    setattr(obj, attr, {**value, key: adopted[path]} if key else adopted[path])
+        db.flush()
+        blob_service.recount(db)
+        db.commit()
+    finally:
+        db.close()
+    # Originals only go once the rows point at their blobs
+    for path, blob in adopted.items():
+        if blob:
+            (Path(settings.UPLOAD_ROOT) / path).unlink(missing_ok=True)
+    print(f" - {sum(1 for b in adopted.values() if b)} files moved.")
+
     print("Migration complete.")
 
 if __name__ == "__main__":
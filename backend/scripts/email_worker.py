@@ -0,0 +1,22 @@
+"""
+Delivers the email outbox from a dedicated process, for deployments that set
+EMAIL_WORKER_ENABLED=false on the API. Several can run at once; each claims its own rows.
+Usage: python -m scripts.email_worker
+"""
+import logging
+
+from services.email_service import email_worker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print("Delivering outbox email (Ctrl+C to stop)...")
+    try:
+        email_worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        email_worker.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import SessionLocal
+import models # Spawned workers need every mapper registered
+from models.accrual_job import AccrualJob, AccrualJobChunk, AccrualJobKind, AccrualJobStatus
+from models.employee import Employee
+from services.accrual_service import accrual_service
+
+ACTIVE_STATUS = "active"
+
+
+def split_chunks(ids: List[int], size: int) -> List[List[int]]:
+    """Consecutive runs of `size` sorted ids; each becomes one chunk's id range."""
+    ids = sorted(ids)
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def process_chunk(db: Session, chunk_id: int) -> int:
+    """
+    Runs one chunk's accrual or rollover and marks it completed. The service call commits
+    all of the chunk's balance and ledger writes in one transaction and the mark follows in
+    a second, so a crash between them only means the chunk is redone, which the closed-form
+    computations make a no-op.
+    """
+    chunk = db.get(AccrualJobChunk, chunk_id)
+    job = chunk.job
+    try:
+        employee_ids = [row.id for row in db.query(Employee.id).filter(
+            Employee.id.between(chunk.first_employee_id, chunk.last_employee_id),
+            Employee.employment_status == ACTIVE_STATUS
+        )]
+        if job.kind == AccrualJobKind.rollover:
+            rows = accrual_service.rollover(db, employee_ids, job.year)
+        else:
+            rows = accrual_service.refresh(db, employee_ids, job.year)
+    except Exception as e:
+        db.rollback()
+        chunk.status = AccrualJobStatus.failed
+        chunk.error = str(e)
+        db.commit()
+        raise
+    chunk.status = AccrualJobStatus.completed
+    chunk.rows_written = rows
+    chunk.error = None
+    chunk.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return rows
+
+
+def run_chunk(chunk_id: int) -> int:
+    """Worker-process entry point: one session per chunk."""
+    db = SessionLocal()
+    try:
+        return process_chunk(db, chunk_id)
+    finally:
+        db.close()
+
+
+class AccrualJobService:
+    def start(self, db: Session, kind: AccrualJobKind, year: int, chunk_size: Optional[int] = None) -> AccrualJob:
+        """
+        The unfinished job for this kind/year/month if there is one (so a rerun resumes it),
+        otherwise a new job with active employees split into id-range chunks.
+        """
+        month = accrual_service.target_month(year) if kind == AccrualJobKind.monthly else None
+        job = db.query(AccrualJob).filter(
+            AccrualJob.kind == kind,
+            AccrualJob.year == year,
+            AccrualJob.month.is_(None) if month is None else AccrualJob.month == month,
+            AccrualJob.status != AccrualJobStatus.completed
+        ).order_by(AccrualJob.id.desc()).first()
+        if job:
+            return job
+
+        ids = [row.id for row in db.query(Employee.id).filter(Employee.employment_status == ACTIVE_STATUS)]
+        chunks = split_chunks(ids, chunk_size or settings.ACCRUAL_JOB_CHUNK_SIZE)
+        job = AccrualJob(kind=kind, year=year, month=month, total_chunks=len(chunks))
+        job.chunks = [
+            AccrualJobChunk(chunk_index=i, first_employee_id=c[0], last_employee_id=c[-1], employee_count=len(c))
+            for i, c in enumerate(chunks)
+        ]
+        db.add(job)
+        db.commit()
+        return job
+
+    def run(self, db: Session, job: AccrualJob, workers: Optional[int] = None,
+            progress: Optional[Callable[[AccrualJob], None]] = None) -> AccrualJob:
+        """
+        Processes the job's outstanding chunks across a process pool (inline in `db` with one
+        worker) and returns the job with its final status. Failed chunks are recorded and left
+        for the next run; the others still complete.
+        """
+        workers = workers or settings.ACCRUAL_JOB_WORKERS
+        pending = [c.id for c in job.chunks if c.status != AccrualJobStatus.completed]
+        job.status = AccrualJobStatus.running
+        job.started_at = job.started_at or datetime.now(timezone.utc)
+        job.error = None
+        db.commit()
+
+        errors = []
+        if workers <= 1:
+            for chunk_id in pending:
+                try:
+                    process_chunk(db, chunk_id)
+                except Exception as e:
+                    errors.append(str(e))
+                self._report(db, job, progress)
+        elif pending:
+            # Spawned workers import the app fresh and open their own connections
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=multiprocessing.get_context("spawn")) as pool:
+                for future in as_completed([pool.submit(run_chunk, chunk_id) for chunk_id in pending]):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(str(e))
+                    self._report(db, job, progress)
+
+        self._update_totals(db, job)
+        job.status = AccrualJobStatus.completed if job.completed_chunks == job.total_chunks else AccrualJobStatus.failed
+        job.error = "; ".join(errors[:5]) or None
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return job
+
+    def _update_totals(self, db: Session, job: AccrualJob):
+        completed, rows = db.query(func.count(AccrualJobChunk.id), func.coalesce(func.sum(AccrualJobChunk.rows_written), 0)).filter(
+            AccrualJobChunk.job_id == job.id,
+            AccrualJobChunk.status == AccrualJobStatus.completed
+        ).one()
+        job.completed_chunks = completed
+        job.rows_written = rows
+
+    def _report(self, db: Session, job: AccrualJob, progress: Optional[Callable[[AccrualJob], None]]):
+        self._update_totals(db, job)
+        db.commit()
+        if progress:
+            progress(job)
+
+    def get_jobs(self, db: Session, limit: int = 10) -> List[AccrualJob]:
+        return db.query(AccrualJob).order_by(AccrualJob.id.desc()).limit(limit).all()
+
+accrual_job_service = AccrualJobService()
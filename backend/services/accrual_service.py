@@ -0,0 +1,259 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+from repositories.leave_repository import leave_repository
+from models.leave import LeaveType, LeaveTypeEnum, LeaveBalance, LeaveLedgerEntry, LedgerEntryType
+from models.employee import Employee
+
+# CO is credited through approved credit requests and LOP has no entitlement,
+# so the engine must never overwrite their 'accrued' value.
+MANUALLY_CREDITED_TYPES = {LeaveTypeEnum.compensatory_off, LeaveTypeEnum.loss_of_pay}
+
+# Rows per INSERT ... ON CONFLICT statement (keeps us well under the bind-parameter limit)
+UPSERT_CHUNK_SIZE = 1000
+
+# Balances are stored as Numeric(5, 2)
+CENTS = Decimal("0.01")
+
+
+def accrual_months(date_of_joining: Optional[date], year: int, target_month: int) -> Decimal:
+    """
+    Number of monthly entitlements earned in `year` up to and including `target_month`.
+    Joining Month: 1-10 (Full), 11-20 (Half), 21+ (None)
+    """
+    if not date_of_joining or date_of_joining.year < year:
+        return Decimal(target_month)
+    if date_of_joining.year > year or date_of_joining.month > target_month:
+        return Decimal(0)
+
+    if date_of_joining.day <= 10:
+        joining_month = Decimal(1)
+    elif date_of_joining.day <= 20:
+        joining_month = Decimal("0.5")
+    else:
+        joining_month = Decimal(0)
+
+    return Decimal(target_month - date_of_joining.month) + joining_month
+
+
+def carry_forward_days(available: Optional[Decimal], max_carry_forward: Optional[int]) -> Decimal:
+    """Days carried into the next year: the unused closing balance, capped at max_carry_forward."""
+    days = max(Decimal(available or 0), Decimal(0))
+    if max_carry_forward is not None:
+        days = min(days, Decimal(max_carry_forward))
+    return days.quantize(CENTS)
+
+
+def is_eligible(gender: Optional[str], leave_type: LeaveType) -> bool:
+    if not leave_type.gender_eligibility or leave_type.gender_eligibility == "All":
+        return True
+    return bool(gender) and gender.lower() == leave_type.gender_eligibility.lower()
+
+
+class AccrualService:
+    def target_month(self, year: int) -> int:
+        # If querying for a past year, assume full accrual unless joined that year
+        # If querying for current year, accrue up to current month
+        today = date.today()
+        return 12 if year < today.year else today.month
+
+    def entitlement(self, leave_type: LeaveType, date_of_joining: Optional[date], year: int, target_month: int) -> Optional[Decimal]:
+        """Accrued days for one employee/type, or None when the type is credited manually."""
+        if leave_type.accrual_method == 'monthly':
+            monthly_entitlement = Decimal(str(leave_type.annual_entitlement)) / 12
+            return (monthly_entitlement * accrual_months(date_of_joining, year, target_month)).quantize(CENTS)
+        if leave_type.name in MANUALLY_CREDITED_TYPES:
+            return None
+        # For Manual/Annual/Fixed types (Maternity, Paternity, etc.)
+        return Decimal(str(leave_type.annual_entitlement))
+
+    def refresh(self, db: Session, employee_ids: Iterable[int], year: int, commit: bool = True) -> int:
+        """
+        Recomputes 'accrued' and 'available' for every eligible (employee, leave type)
+        pair of the given employees in closed form and upserts all balance rows in bulk.
+        Accrual changes are appended to the balance ledger. Commits once, or not at all
+        with commit=False so the caller's commit (or rollback) covers the writes.
+        Returns the number of rows written.
+        """
+        employee_ids = list(set(employee_ids))
+        if not employee_ids:
+            return 0
+
+        employees = db.query(Employee.id, Employee.gender, Employee.date_of_joining).filter(
+            Employee.id.in_(employee_ids)
+        ).all()
+        leave_types = leave_repository.get_leave_types(db)
+        target_month = self.target_month(year)
+
+        computed_rows: List[dict] = []
+        manual_rows: List[dict] = []
+        ledger_rows: List[dict] = []
+        for emp in employees:
+            for lt in leave_types:
+                if not is_eligible(emp.gender, lt):
+                    continue
+                accrued = self.entitlement(lt, emp.date_of_joining, year, target_month)
+                row = {
+                    "employee_id": emp.id,
+                    "leave_type_id": lt.id,
+                    "leave_year": year,
+                    "opening_balance": 0,
+                    "accrued": accrued or 0,
+                    "carry_forward": 0,
+                    "taken": 0,
+                    "pending_approval": 0,
+                    "encashed": 0,
+                    "available": accrued or 0,
+                    "accrual_month": target_month,
+                }
+                (manual_rows if accrued is None else computed_rows).append(row)
+
+        current_accrued = self._lock_accrued(db, employee_ids, year, computed_rows)
+        for row in computed_rows:
+            delta = row["accrued"] - current_accrued.get((row["employee_id"], row["leave_type_id"]), 0)
+            if delta:
+                ledger_rows.append({
+                    "employee_id": row["employee_id"],
+                    "leave_type_id": row["leave_type_id"],
+                    "leave_year": year,
+                    "entry_type": LedgerEntryType.accrual,
+                    "days": delta,
+                    "note": f"Accrued through month {target_month}",
+                })
+
+        for rows, overwrite_accrued in ((computed_rows, True), (manual_rows, False)):
+            for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                leave_repository.upsert_balances(db, rows[i:i + UPSERT_CHUNK_SIZE], overwrite_accrued=overwrite_accrued)
+
+        if ledger_rows:
+            db.execute(insert(LeaveLedgerEntry), ledger_rows)
+
+        if commit:
+            db.commit()
+        return len(computed_rows) + len(manual_rows)
+
+    def _lock_accrued(self, db: Session, employee_ids: List[int], year: int, rows: List[dict]) -> Dict[Tuple[int, int], Decimal]:
+        """
+        Current 'accrued' per (employee, type), with the rows locked until commit so a concurrent
+        refresh of the same employees waits and then sees this one's result instead of appending
+        the same ledger delta. Missing rows are claimed first by inserting them at zero.
+        """
+        def read(ids):
+            return {
+                (b.employee_id, b.leave_type_id): b.accrued or 0
+                for b in db.query(LeaveBalance.employee_id, LeaveBalance.leave_type_id, LeaveBalance.accrued).filter(
+                    LeaveBalance.employee_id.in_(ids),
+                    LeaveBalance.leave_year == year
+                ).order_by(LeaveBalance.id).with_for_update()
+            }
+
+        current = read(employee_ids)
+        missing = [
+            {**row, "accrued": 0, "available": 0, "accrual_month": None}
+            for row in rows if (row["employee_id"], row["leave_type_id"]) not in current
+        ]
+        inserted = set()
+        for i in range(0, len(missing), UPSERT_CHUNK_SIZE):
+            inserted |= leave_repository.insert_missing_balances(db, missing[i:i + UPSERT_CHUNK_SIZE])
+        # Rows another refresh created in the meantime: read them back (now committed) under lock
+        raced = {row["employee_id"] for row in missing if (row["employee_id"], row["leave_type_id"]) not in inserted}
+        if raced:
+            current.update(read(list(raced)))
+        return current
+
+    def rollover(self, db: Session, employee_ids: Iterable[int], year: int) -> int:
+        """
+        Carries the given employees' closing `year` balances into year + 1 for leave types with
+        carry forward, first bringing `year` up to date. New-year rows are upserted in bulk with
+        only 'carry_forward' set (their accrual is left stale for the next refresh), and the change
+        against any earlier carry forward goes to the ledger, so rerunning is harmless. The year-end
+        refresh and the carry forward are committed together, once.
+        Returns the number of rows written.
+        """
+        employee_ids = list(set(employee_ids))
+        if not employee_ids:
+            return 0
+        self.refresh_stale(db, employee_ids, year, commit=False)
+
+        closing = db.query(
+            LeaveBalance.employee_id, LeaveBalance.leave_type_id, LeaveBalance.available, LeaveType.max_carry_forward
+        ).join(LeaveType, LeaveType.id == LeaveBalance.leave_type_id).filter(
+            LeaveBalance.employee_id.in_(employee_ids),
+            LeaveBalance.leave_year == year,
+            LeaveType.carry_forward.is_(True)
+        ).all()
+        current = {
+            (b.employee_id, b.leave_type_id): b.carry_forward or 0
+            for b in db.query(LeaveBalance.employee_id, LeaveBalance.leave_type_id, LeaveBalance.carry_forward).filter(
+                LeaveBalance.employee_id.in_(employee_ids),
+                LeaveBalance.leave_year == year + 1
+            )
+        }
+
+        rows: List[dict] = []
+        ledger_rows: List[dict] = []
+        for b in closing:
+            days = carry_forward_days(b.available, b.max_carry_forward)
+            rows.append({
+                "employee_id": b.employee_id,
+                "leave_type_id": b.leave_type_id,
+                "leave_year": year + 1,
+                "opening_balance": 0,
+                "accrued": 0,
+                "carry_forward": days,
+                "taken": 0,
+                "pending_approval": 0,
+                "encashed": 0,
+                "available": days,
+                "accrual_month": None,
+            })
+            delta = days - current.get((b.employee_id, b.leave_type_id), 0)
+            if delta:
+                ledger_rows.append({
+                    "employee_id": b.employee_id,
+                    "leave_type_id": b.leave_type_id,
+                    "leave_year": year + 1,
+                    "entry_type": LedgerEntryType.carry_forward,
+                    "days": delta,
+                    "note": f"Carried forward from {year}",
+                })
+
+        for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            leave_repository.upsert_carry_forward(db, rows[i:i + UPSERT_CHUNK_SIZE])
+        if ledger_rows:
+            db.execute(insert(LeaveLedgerEntry), ledger_rows)
+
+        db.commit()
+        return len(rows)
+
+    def stale_employee_ids(self, db: Session, employee_ids: Iterable[int], year: int) -> List[int]:
+        """Employees with no balances for the year, or whose snapshot predates the target month."""
+        employee_ids = set(employee_ids)
+        if not employee_ids:
+            return []
+        rows = db.query(LeaveBalance.employee_id, LeaveBalance.accrual_month).filter(
+            LeaveBalance.employee_id.in_(employee_ids),
+            LeaveBalance.leave_year == year
+        ).all()
+        target_month = self.target_month(year)
+        seen = {r.employee_id for r in rows}
+        stale = {r.employee_id for r in rows if r.accrual_month != target_month}
+        return list(stale | (employee_ids - seen))
+
+    def refresh_stale(self, db: Session, employee_ids: Iterable[int], year: int, commit: bool = True) -> int:
+        """Refreshes only employees whose snapshot is out of date, so steady-state reads never write."""
+        stale = self.stale_employee_ids(db, employee_ids, year)
+        return self.refresh(db, stale, year, commit=commit) if stale else 0
+
+    def invalidate(self, db: Session, employee_id: Optional[int] = None, leave_type_id: Optional[int] = None):
+        """Marks snapshots stale so the next read recomputes them. Does not commit."""
+        query = db.query(LeaveBalance)
+        if employee_id:
+            query = query.filter(LeaveBalance.employee_id == employee_id)
+        if leave_type_id:
+            query = query.filter(LeaveBalance.leave_type_id == leave_type_id)
+        query.update({LeaveBalance.accrual_month: None}, synchronize_session=False)
+
+accrual_service = AccrualService()
@@ -0,0 +1,188 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import Text, cast, text, tuple_
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import SessionLocal
+from models.audit import AuditLog
+from models.user import User
+from utils.export import EXPORT_BATCH_SIZE, arrow_schema, csv_chunks, parquet_chunks, resolve_columns
+from utils.pagination import decode_cursor, encode_cursor
+
+PARENT = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_NAME = re.compile(r"^audit_logs_(\d{4})_(\d{2})$")
+
+EXPORT_COLUMNS = {
+    "id": ("ID", AuditLog.id),
+    "timestamp": ("Timestamp", AuditLog.timestamp),
+    "user_id": ("User ID", AuditLog.user_id),
+    "user_email": ("User", User.email),
+    "action": ("Action", AuditLog.action),
+    "entity_type": ("Entity Type", AuditLog.entity_type),
+    "entity_id": ("Entity ID", AuditLog.entity_id),
+    "details": ("Details", cast(AuditLog.details, Text)),
+    "ip_address": ("IP Address", AuditLog.ip_address),
+}
+
+SORT_COLUMNS = (AuditLog.timestamp, AuditLog.id)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month.year:04d}_{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    # Literal partition bound at midnight UTC (DDL takes no bind parameters)
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+class AuditService:
+    def _filtered(self, query, entity_type: Optional[str] = None, entity_id: Optional[int] = None,
+                  user_id: Optional[int] = None, action: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None):
+        # A time range lets the planner skip whole monthly partitions
+        if entity_type:
+            query = query.filter(AuditLog.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.filter(AuditLog.entity_id == entity_id)
+        if user_id is not None:
+            query = query.filter(AuditLog.user_id == user_id)
+        if action:
+            query = query.filter(AuditLog.action == action)
+        if since:
+            query = query.filter(AuditLog.timestamp >= since)
+        if until:
+            query = query.filter(AuditLog.timestamp < until)
+        return query
+
+    def get_logs(self, db: Session, limit: int = 50, cursor: Optional[str] = None, **filters) -> Tuple[List[AuditLog], Optional[str]]:
+        """
+        Newest-first page of matching entries and the cursor for the next one. Keyset paging
+        only, with no total: counting a table this size would cost more than the page itself.
+        """
+        query = self._filtered(db.query(AuditLog), **filters)
+        if cursor:
+            query = query.filter(tuple_(*SORT_COLUMNS) < decode_cursor(cursor, SORT_COLUMNS))
+        rows = query.order_by(*[c.desc() for c in SORT_COLUMNS]).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].timestamp, rows[-1].id])
+        return rows, next_cursor
+
+    def first_actor(self, db: Session, entity_type: str, entity_id: int, action: str) -> Optional[int]:
+        """User who first did `action` to the entity (e.g. created it); an index-only lookup."""
+        return db.query(AuditLog.user_id).filter(
+            AuditLog.entity_type == entity_type,
+            AuditLog.entity_id == entity_id,
+            AuditLog.action == action
+        ).order_by(AuditLog.timestamp).limit(1).scalar()
+
+    def resolve_export_columns(self, columns: Optional[str] = None) -> List[str]:
+        return resolve_columns(columns, EXPORT_COLUMNS, list(EXPORT_COLUMNS))
+
+    def _export_query(self, db: Session, keys: List[str], **filters):
+        query = db.query(*[EXPORT_COLUMNS[k][1].label(k) for k in keys]).select_from(AuditLog)
+        if "user_email" in keys:
+            query = query.outerjoin(User, AuditLog.user_id == User.id)
+        query = self._filtered(query, **filters)
+        # Server-side cursor: rows arrive EXPORT_BATCH_SIZE at a time
+        return query.order_by(*SORT_COLUMNS).yield_per(EXPORT_BATCH_SIZE)
+
+    def stream(self, keys: List[str], format: str = "csv", **filters) -> Iterator:
+        """
+        Yields the export (CSV text or Parquet bytes) oldest first as rows arrive, for a StreamingResponse.
+        Opens its own session: the request's session is closed before the body is streamed.
+        """
+        db = SessionLocal()
+        try:
+            query = self._export_query(db, keys, **filters)
+            if format == "parquet":
+                yield from parquet_chunks(query, arrow_schema(query))
+            else:
+                yield from csv_chunks(query, [EXPORT_COLUMNS[k][0] for k in keys])
+        finally:
+            db.close()
+
+    # --- Partition maintenance ---
+
+    def _lock(self, db: Session) -> bool:
+        """Serializes maintainers (API startup on several workers, the cron job); False until the table is partitioned."""
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('audit_logs_partitions'))"))
+        kind = db.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:parent)"), {"parent": PARENT}).scalar()
+        return kind == "p"
+
+    def list_partitions(self, db: Session) -> List[Tuple[str, date]]:
+        """Monthly partitions currently attached, as (name, first day of month), oldest first."""
+        names = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ), {"parent": PARENT}).scalars()
+        partitions = []
+        for name in names:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def ensure_partitions(self, db: Session, first: date, last: date) -> List[str]:
+        """
+        Creates the monthly partitions from `first` through `last` that don't exist yet and
+        returns their names. Rows for those months already in the default partition are moved
+        in, since a range can't be attached while the default partition holds rows in it.
+        """
+        if not self._lock(db):
+            db.commit()
+            return []
+        existing = {name for name, _ in self.list_partitions(db)}
+        created = []
+        month = date(first.year, first.month, 1)
+        while month <= last:
+            name, end = partition_name(month), add_months(month, 1)
+            if name not in existing:
+                db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                db.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ), {"start": datetime(month.year, month.month, 1, tzinfo=timezone.utc), "end": datetime(end.year, end.month, 1, tzinfo=timezone.utc)})
+                db.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({_bound(month)}) TO ({_bound(end)})"))
+                created.append(name)
+            month = end
+        db.commit()
+        return created
+
+    def ensure_upcoming_partitions(self, db: Session) -> List[str]:
+        """This month's partition and the next AUDIT_PARTITION_MONTHS_AHEAD, so inserts never hit the default one."""
+        this_month = date.today().replace(day=1)
+        return self.ensure_partitions(db, this_month, add_months(this_month, settings.AUDIT_PARTITION_MONTHS_AHEAD))
+
+    def detach_expired_partitions(self, db: Session, before: Optional[date] = None, drop: bool = False) -> List[str]:
+        """
+        Detaches monthly partitions that end on or before `before` (default: AUDIT_RETENTION_MONTHS
+        ago) and returns their names. Detached tables stay in the database for archiving unless
+        `drop` is set; either way queries on audit_logs no longer touch them.
+        """
+        if before is None:
+            before = add_months(date.today().replace(day=1), -settings.AUDIT_RETENTION_MONTHS)
+        if not self._lock(db):
+            db.commit()
+            return []
+        detached = []
+        for name, month in self.list_partitions(db):
+            if add_months(month, 1) > before:
+                break
+            db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if drop:
+                db.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+        db.commit()
+        return detached
+
+audit_service = AuditService()
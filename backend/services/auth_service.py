@@ -91,7 +91,8 @@ class AuthService:
 
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.email, "role": role_str}, expires_delta=access_token_expires
+            data={"sub": user.email, "role": role_str, "uid": user.id, "employee_id": user.employee_id, "username": user.username},
+            expires_delta=access_token_expires
         )
         
         refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
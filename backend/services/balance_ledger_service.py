@@ -0,0 +1,122 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List, Optional
+from decimal import Decimal
+from repositories.leave_repository import leave_repository
+from models.leave import LeaveBalance, LeaveLedgerEntry, LedgerEntryType
+
+# Snapshot column each entry type moves, and in which direction
+ENTRY_EFFECTS = {
+    LedgerEntryType.opening: ("opening_balance", 1),
+    LedgerEntryType.accrual: ("accrued", 1),
+    LedgerEntryType.credit: ("accrued", 1),
+    LedgerEntryType.carry_forward: ("carry_forward", 1),
+    LedgerEntryType.pending: ("pending_approval", 1),
+    LedgerEntryType.taken: ("taken", 1),
+    LedgerEntryType.recall: ("taken", -1),
+    LedgerEntryType.encashment: ("encashed", 1),
+}
+
+SNAPSHOT_COLUMNS = ("opening_balance", "accrued", "carry_forward", "taken", "pending_approval", "encashed")
+
+
+def compute_available(balance: LeaveBalance) -> Decimal:
+    return (
+        (balance.opening_balance or 0) + (balance.accrued or 0) + (balance.carry_forward or 0)
+        - (balance.taken or 0) - (balance.pending_approval or 0) - (balance.encashed or 0)
+    )
+
+
+class BalanceLedgerService:
+    def get_or_create_balance(self, db: Session, employee_id: int, leave_type_id: int, year: int) -> LeaveBalance:
+        balance = leave_repository.get_balance(db, employee_id, leave_type_id, year)
+        if not balance:
+            # Initialize a zero balance on the fly if it doesn't exist
+            balance = LeaveBalance(
+                employee_id=employee_id,
+                leave_type_id=leave_type_id,
+                leave_year=year,
+                available=0,
+                opening_balance=0,
+                accrued=0,
+                taken=0,
+                pending_approval=0,
+                carry_forward=0,
+                encashed=0
+            )
+            db.add(balance)
+            db.flush() # Get ID
+        return balance
+
+    def post(
+        self,
+        db: Session,
+        balance: LeaveBalance,
+        entry_type: LedgerEntryType,
+        days: Decimal,
+        application_id: Optional[int] = None,
+        credit_request_id: Optional[int] = None,
+        note: Optional[str] = None
+    ) -> LeaveLedgerEntry:
+        """
+        Appends a ledger entry and applies it to the snapshot row.
+        Does not commit; the caller's transaction covers both writes.
+        """
+        days = Decimal(str(days))
+        column, sign = ENTRY_EFFECTS[entry_type]
+        setattr(balance, column, (getattr(balance, column) or 0) + sign * days)
+        balance.available = compute_available(balance)
+
+        entry = LeaveLedgerEntry(
+            employee_id=balance.employee_id,
+            leave_type_id=balance.leave_type_id,
+            leave_year=balance.leave_year,
+            entry_type=entry_type,
+            days=days,
+            application_id=application_id,
+            credit_request_id=credit_request_id,
+            note=note
+        )
+        db.add(entry)
+        return entry
+
+    def get_entries(self, db: Session, employee_id: int, year: int, leave_type_id: Optional[int] = None) -> List[LeaveLedgerEntry]:
+        query = db.query(LeaveLedgerEntry).filter(
+            LeaveLedgerEntry.employee_id == employee_id,
+            LeaveLedgerEntry.leave_year == year
+        )
+        if leave_type_id:
+            query = query.filter(LeaveLedgerEntry.leave_type_id == leave_type_id)
+        return query.order_by(LeaveLedgerEntry.created_at, LeaveLedgerEntry.id).all()
+
+    def rebuild(self, db: Session, employee_id: int, year: int) -> List[LeaveBalance]:
+        """Recomputes an employee's snapshot rows for the year purely from the ledger."""
+        totals = db.query(
+            LeaveLedgerEntry.leave_type_id,
+            LeaveLedgerEntry.entry_type,
+            func.sum(LeaveLedgerEntry.days)
+        ).filter(
+            LeaveLedgerEntry.employee_id == employee_id,
+            LeaveLedgerEntry.leave_year == year
+        ).group_by(LeaveLedgerEntry.leave_type_id, LeaveLedgerEntry.entry_type).all()
+
+        balances = {}
+        for leave_type_id, _, _ in totals:
+            if leave_type_id not in balances:
+                balance = self.get_or_create_balance(db, employee_id, leave_type_id, year)
+                for column in SNAPSHOT_COLUMNS:
+                    setattr(balance, column, Decimal(0))
+                balances[leave_type_id] = balance
+
+        for leave_type_id, entry_type, total in totals:
+            balance = balances[leave_type_id]
+            column, sign = ENTRY_EFFECTS[entry_type]
+            setattr(balance, column, getattr(balance, column) + sign * total)
+
+        for balance in balances.values():
+            balance.available = compute_available(balance)
+
+        db.commit()
+        return list(balances.values())
+
+balance_ledger_service = BalanceLedgerService()
@@ -0,0 +1,217 @@
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import String, event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, attributes
+from core.config import settings
+from core.database import SessionLocal
+from models.candidate import Candidate, CandidateOnboardingTask
+from models.document import EmployeeDocument
+from models.employee import Employee
+from models.email_outbox import EmailOutbox, EmailStatus
+from models.leave import LeaveApplication
+from models.settings import CompanySettings
+from models.storage import StoredBlob
+from services.preview_service import PREVIEW_SIZES, preview_key
+from utils.file_storage import BLOB_FOLDER, is_blob
+from utils.storage import get_storage
+
+# Attributes that hold upload paths: (model, attribute, key inside a JSON attribute).
+# A JSON list attribute holds one path per element.
+BLOB_REFERENCES: Tuple[Tuple[type, str, Optional[str]], ...] = (
+    (EmployeeDocument, "file_path", None),
+    (CandidateOnboardingTask, "uploaded_file", None),
+    (LeaveApplication, "attachment", None),
+    (Employee, "profile_photo", None),
+    (CompanySettings, "logo_url", None),
+    (CompanySettings, "letterhead_url", None),
+    (Candidate, "salary_structure", "offer_document"),
+    (EmailOutbox, "attachments", None),
+)
+
+# Models whose rows only hold their blobs while `column` has one of these values:
+# queued email keeps its attachments until it is sent, fails or is skipped
+REFERENCE_ACTIVE_WHEN: Dict[type, Tuple[str, frozenset]] = {
+    EmailOutbox: ("status", frozenset({EmailStatus.pending})),
+}
+
+_REFERENCES_BY_MODEL: Dict[type, List[Tuple[str, Optional[str]]]] = {}
+for _model, _attr, _key in BLOB_REFERENCES:
+    _REFERENCES_BY_MODEL.setdefault(_model, []).append((_attr, _key))
+
+
+def _blobs(value, key: Optional[str]) -> List[str]:
+    if key is not None:
+        value = value.get(key) if isinstance(value, dict) else None
+    values = value if isinstance(value, list) else [value]
+    return [v for v in values if isinstance(v, str) and is_blob(v)]
+
+
+def _old_and_new(obj, attr: str) -> Tuple[list, list, bool]:
+    """The attribute's values before and after the pending change, and whether it changed."""
+    history = attributes.get_history(obj, attr)
+    if history.has_changes():
+        return list(history.deleted), list(history.added), True
+    return list(history.unchanged), list(history.unchanged), False
+
+
+def _active(obj, values: Optional[list] = None) -> bool:
+    """Whether the row holds its blobs, given its state values (defaults to the current one)."""
+    condition = REFERENCE_ACTIVE_WHEN.get(type(obj))
+    if condition is None:
+        return True
+    if values is None:
+        values = [getattr(obj, condition[0])]
+    return any(v in condition[1] for v in values)
+
+
+class BlobService:
+    """
+    Reference counts for the content-addressed upload store. Rows that gain or drop a blob
+    path adjust stored_blobs.ref_count in their own flush, so counts commit or roll back with
+    the change; blobs left unreferenced by a commit are removed right after it, unless still
+    inside the grace period, in which case scripts/blob_maintenance.py sweeps them later.
+    """
+
+    def reference_deltas(self, session: Session) -> Counter:
+        """Net change in references per blob path across the session's pending changes."""
+        deltas: Counter = Counter()
+        for obj in session.new:
+            if not _active(obj):
+                continue
+            for attr, key in _REFERENCES_BY_MODEL.get(type(obj), ()):
+                for path in _blobs(getattr(obj, attr), key):
+                    deltas[path] += 1
+        for obj in session.dirty:
+            refs = _REFERENCES_BY_MODEL.get(type(obj))
+            if not refs:
+                continue
+            was_active = is_active = True
+            activity_changed = False
+            if type(obj) in REFERENCE_ACTIVE_WHEN:
+                old, new, activity_changed = _old_and_new(obj, REFERENCE_ACTIVE_WHEN[type(obj)][0])
+                was_active, is_active = _active(obj, old), _active(obj, new)
+            for attr, key in refs:
+                old_values, new_values, changed = _old_and_new(obj, attr)
+                if not changed and (not activity_changed or was_active == is_active):
+                    continue
+                # An old value that was never loaded isn't released: the blob is kept rather than lost
+                if is_active:
+                    for value in new_values:
+                        for path in _blobs(value, key):
+                            deltas[path] += 1
+                if was_active:
+                    for value in old_values:
+                        for path in _blobs(value, key):
+                            deltas[path] -= 1
+        for obj in session.deleted:
+            if not _active(obj):
+                continue
+            for attr, key in _REFERENCES_BY_MODEL.get(type(obj), ()):
+                for path in _blobs(getattr(obj, attr), key):
+                    deltas[path] -= 1
+        return deltas
+
+    def apply_deltas(self, connection, deltas: Counter) -> List[str]:
+        """Applies reference deltas; returns the paths whose count reached zero."""
+        released = []
+        for path, delta in sorted(deltas.items()):
+            if delta > 0:
+                stmt = insert(StoredBlob).values(path=path, ref_count=delta)
+                connection.execute(stmt.on_conflict_do_update(
+                    index_elements=[StoredBlob.path],
+                    set_={"ref_count": StoredBlob.ref_count + delta}
+                ))
+            elif delta < 0:
+                remaining = connection.execute(
+                    StoredBlob.__table__.update()
+                    .where(StoredBlob.path == path)
+                    .values(ref_count=StoredBlob.ref_count + delta)
+                    .returning(StoredBlob.ref_count)
+                ).scalar()
+                if remaining is not None and remaining <= 0:
+                    released.append(path)
+        return released
+
+    def collect(self, paths: Optional[Iterable[str]] = None) -> int:
+        """
+        Deletes unreferenced blobs (only `paths` when given) and their rows; returns how many.
+        Rows are claimed with SKIP LOCKED, so concurrent collectors split the work. Uploads don't
+        go through stored_blobs: storing content that already exists refreshes the file's mtime
+        instead, and files modified within BLOB_COLLECT_GRACE_SECONDS are skipped, which gives a
+        re-upload that long to commit its reference. Skipped blobs wait for the next sweep.
+        """
+        db = SessionLocal()
+        try:
+            query = select(StoredBlob).where(StoredBlob.ref_count <= 0)
+            if paths is not None:
+                query = query.where(StoredBlob.path.in_(list(paths)))
+            removed = 0
+            storage = get_storage()
+            cutoff = time.time() - settings.BLOB_COLLECT_GRACE_SECONDS
+            for blob in db.scalars(query.with_for_update(skip_locked=True)):
+                try:
+                    if storage.stat(blob.path).modified > cutoff:
+                        continue
+                    storage.delete(blob.path)
+                    for variant in PREVIEW_SIZES:
+                        storage.delete(preview_key(blob.path, variant))
+                except FileNotFoundError:
+                    pass
+                db.delete(blob)
+                removed += 1
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def recount(self, db: Session):
+        """Rebuilds every ref_count from the referencing rows (after a backfill, or to repair drift)."""
+        counts: Counter = Counter()
+        for model, attr, key in BLOB_REFERENCES:
+            column = getattr(model, attr)
+            is_text = key is None and isinstance(column.type, String)
+            query = db.query(column).filter(column.like(f"{BLOB_FOLDER}/%") if is_text else column.isnot(None))
+            if model in REFERENCE_ACTIVE_WHEN:
+                state, values = REFERENCE_ACTIVE_WHEN[model]
+                query = query.filter(getattr(model, state).in_(values))
+            counts.update(path for (value,) in query for path in _blobs(value, key))
+
+        connection = db.connection()
+        connection.execute(StoredBlob.__table__.update().values(ref_count=0))
+        for path, count in counts.items():
+            stmt = insert(StoredBlob).values(path=path, ref_count=count)
+            connection.execute(stmt.on_conflict_do_update(index_elements=[StoredBlob.path], set_={"ref_count": count}))
+
+blob_service = BlobService()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_blob_deltas(session, flush_context, instances):
+    # Read here, while deleted rows' paths can still be loaded
+    deltas = blob_service.reference_deltas(session)
+    if deltas:
+        session.info["blob_deltas"] = deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_blob_deltas(session, flush_context):
+    deltas = session.info.pop("blob_deltas", None)
+    if deltas:
+        released = blob_service.apply_deltas(session.connection(), deltas)
+        if released:
+            session.info.setdefault("released_blobs", set()).update(released)
+
+
+@event.listens_for(Session, "after_commit")
+def _collect_released_blobs(session):
+    released = session.info.pop("released_blobs", None)
+    if released:
+        blob_service.collect(released)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_blob_deltas(session, previous_transaction):
+    session.info.pop("blob_deltas", None)
+    session.info.pop("released_blobs", None)
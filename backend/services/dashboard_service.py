@@ -1,46 +1,189 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, extract, and_, or_, select, literal, true, event
 from datetime import date, datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 import calendar
+import threading
+import time
 
-from models.employee import Employee
+from core.config import settings
+from models.employee import Employee, month_day
 from models.leave import LeaveApplication, LeaveType, LeaveBalance, LeaveApplicationStatus
 from models.document import EmployeeDocument, DocumentVerificationStatus
+from repositories.leave_repository import leave_repository
+from services.org_tree_service import org_tree_service
 from schemas.dashboard import DashboardResponse, DashboardStat, Celebration, LeaveBalanceItem, UpcomingLeave
 
+ADMIN_ROLES = ('super_admin', 'hr_admin')
+
+
+class DashboardCache:
+    """
+    Short-lived per-user cache of the assembled dashboard, keyed on (employee_id, role).
+    Leave and document writes drop the owner's entry plus every admin and manager entry,
+    since their counts span other employees.
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, employee_id: int, role: str) -> Optional[DashboardResponse]:
+        with self._lock:
+            entry = self._entries.get((employee_id, role))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, employee_id: int, role: str, data: DashboardResponse):
+        if settings.DASHBOARD_CACHE_TTL_SECONDS <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired entries so the cache never outgrows the set of active users
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[(employee_id, role)] = (now + settings.DASHBOARD_CACHE_TTL_SECONDS, data)
+
+    def invalidate(self, employee_ids: Optional[Iterable[int]] = None):
+        """Drops entries affected by writes for the given employees (everything when None)."""
+        with self._lock:
+            if employee_ids is None:
+                self._entries.clear()
+                return
+            employee_ids = set(employee_ids)
+            self._entries = {
+                (emp_id, role): entry for (emp_id, role), entry in self._entries.items()
+                if emp_id not in employee_ids and role != 'manager' and role not in ADMIN_ROLES
+            }
+
+dashboard_cache = DashboardCache()
+
+# Birthdays and anniversaries from today up to and including today + 7
+CELEBRATION_WINDOW_DAYS = 7
+
+
+def celebration_window(start: date, days: int) -> Dict[int, date]:
+    """
+    Maps each MMDD key falling in [start, start + days] to the date it is celebrated on.
+    Crossing New Year simply continues into the next year's dates; in non-leap years
+    Feb 29 is celebrated on Mar 1.
+    """
+    dates_by_key = {}
+    for offset in range(days + 1):
+        day = start + timedelta(days=offset)
+        dates_by_key[day.month * 100 + day.day] = day
+        if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+            dates_by_key[229] = day
+    return dates_by_key
+
+
+def key_ranges(dates_by_key: Dict[int, date]) -> List[tuple]:
+    """Contiguous (low, high) MMDD ranges per calendar year, i.e. two ranges when the window wraps."""
+    by_year: Dict[int, List[int]] = {}
+    for key, day in dates_by_key.items():
+        by_year.setdefault(day.year, []).append(key)
+    return [(min(keys), max(keys)) for _, keys in sorted(by_year.items())]
+
+
+class CelebrationCache:
+    """Celebration lists per scope (a manager's id, or None for company-wide), valid for one calendar day."""
+
+    def __init__(self):
+        self._entries: Dict[Optional[int], tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: Optional[int], day: date) -> Optional[List[Celebration]]:
+        with self._lock:
+            entry = self._entries.get(scope)
+        if entry and entry[0] == day:
+            return entry[1]
+        return None
+
+    def set(self, scope: Optional[int], day: date, celebrations: List[Celebration]):
+        with self._lock:
+            if any(d != day for d, _ in self._entries.values()):
+                self._entries = {k: v for k, v in self._entries.items() if v[0] == day}
+            self._entries[scope] = (day, celebrations)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+celebration_cache = CelebrationCache()
+
+# Models whose writes change what a dashboard shows
+DASHBOARD_SOURCES = (LeaveApplication, LeaveBalance, EmployeeDocument)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dashboard_changes(session, flush_context):
+    changed = {
+        obj.employee_id for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, DASHBOARD_SOURCES)
+    }
+    if changed:
+        session.info.setdefault("dashboard_changes", set()).update(changed)
+    if any(isinstance(obj, Employee) for obj in (*session.new, *session.dirty, *session.deleted)):
+        # Birth/joining dates, status or reporting line may have changed
+        session.info["celebrations_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dashboards(session):
+    changed = session.info.pop("dashboard_changes", None)
+    if changed:
+        dashboard_cache.invalidate(changed)
+    if session.info.pop("celebrations_changed", False):
+        celebration_cache.invalidate()
+        dashboard_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_dashboard_changes(session, previous_transaction):
+    session.info.pop("dashboard_changes", None)
+    session.info.pop("celebrations_changed", None)
+
+
 class DashboardService:
     def get_dashboard_data(self, db: Session, current_user: Any) -> DashboardResponse:
-        employee = db.query(Employee).filter(Employee.id == current_user.employee_id).first()
-        if not employee:
+        role = current_user.role.value if hasattr(current_user.role, 'value') else current_user.role
+        cached = dashboard_cache.get(current_user.employee_id, role)
+        if cached:
+            return cached
+
+        # 1. Greeting, role-based stats and the next approved leave in one statement
+        summary = self._get_summary(db, current_user.employee_id, role)
+        if summary.first_name is None:
             return None
+        greeting = self._get_greeting(summary.first_name)
 
-        # 1. Greeting
-        greeting = self._get_greeting(employee.first_name)
+        # 2. Leave Balances (Mainly for Employee/Manager), loaded once for stats and the balance cards
+        leave_balances = None
+        upcoming_leave = None
+        balances = []
+        if role not in ADMIN_ROLES:
+            balances = leave_repository.get_eligible_balances(db, current_user.employee_id, date.today().year)
 
-        # 2. Role-based Stats
-        stats = []
-        if current_user.role in ['super_admin', 'hr_admin']:
-            stats = self._get_admin_stats(db)
-        elif current_user.role == 'manager':
-            stats = self._get_manager_stats(db, employee.id)
+        if role in ADMIN_ROLES:
+            stats = self._get_admin_stats(summary)
+        elif role == 'manager':
+            stats = self._get_manager_stats(summary)
         else:
-            stats = self._get_employee_stats(db, employee.id)
+            stats = self._get_employee_stats(summary, balances)
 
         # 3. Celebrations (Weekly)
-        celebrations = self._get_celebrations(db, employee.id, current_user.role)
+        celebrations = self._get_celebrations(db, current_user.employee_id, role)
 
-        # 4. Leave Balances & Upcoming Leave (Mainly for Employee/Manager)
-        leave_balances = None
-        upcoming_leave = None
-        if current_user.role in ['employee', 'manager']:
-            leave_balances = self._get_leave_balances(db, employee.id)
-            upcoming_leave = self._get_upcoming_leave(db, employee.id)
+        # 4. Leave Balances & Upcoming Leave
+        if role in ['employee', 'manager']:
+            leave_balances = self._get_leave_balances(balances)
+            upcoming_leave = self._get_upcoming_leave(summary)
 
         # 5. Quick Actions
-        quick_actions = self._get_quick_actions(current_user.role)
+        quick_actions = self._get_quick_actions(role)
 
-        return DashboardResponse(
+        data = DashboardResponse(
             greeting=greeting,
             stats=stats,
             celebrations=celebrations,
@@ -48,6 +191,12 @@ class DashboardService:
             upcoming_leave=upcoming_leave,
             quick_actions=quick_actions
         )
+        dashboard_cache.set(current_user.employee_id, role, data)
+        return data
+
+    async def get_dashboard_data_async(self, db: AsyncSession, current_user: Any) -> Optional[DashboardResponse]:
+        # Runs the sync aggregation on the AsyncSession's connection; the result is already a plain schema
+        return await db.run_sync(self.get_dashboard_data, current_user)
 
     def _get_greeting(self, first_name: str) -> str:
         hour = datetime.now().hour
@@ -59,173 +208,175 @@ class DashboardService:
             period = "evening"
         return f"Good {period}, {first_name}"
 
-    def _get_admin_stats(self, db: Session) -> List[DashboardStat]:
-        total_employees = db.query(func.count(Employee.id)).filter(Employee.employment_status == 'active').scalar()
-        
+    def _count(self, model, *criteria):
+        return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+    def _get_summary(self, db: Session, employee_id: int, role: str):
+        """
+        All counts the role's stat cards need, as scalar subqueries of a single SELECT.
+        Employees and managers also get their next approved leave through a LEFT JOIN.
+        """
         today = date.today()
-        on_leave_today = db.query(func.count(LeaveApplication.id)).filter(
-            LeaveApplication.status == LeaveApplicationStatus.approved,
-            LeaveApplication.from_date <= today,
-            LeaveApplication.to_date >= today
-        ).scalar()
+        columns = [select(Employee.first_name).where(Employee.id == employee_id).scalar_subquery().label("first_name")]
+
+        if role in ADMIN_ROLES:
+            columns += [
+                self._count(Employee, Employee.employment_status == 'active').label("total_employees"),
+                self._count(
+                    LeaveApplication,
+                    LeaveApplication.status == LeaveApplicationStatus.approved,
+                    LeaveApplication.from_date <= today,
+                    LeaveApplication.to_date >= today
+                ).label("on_leave_today"),
+                self._count(LeaveApplication, LeaveApplication.status == LeaveApplicationStatus.pending).label("pending_leaves"),
+                self._count(EmployeeDocument, EmployeeDocument.verification_status == DocumentVerificationStatus.pending).label("pending_docs"),
+            ]
+            return db.execute(select(*columns)).one()
 
-        pending_leaves = db.query(func.count(LeaveApplication.id)).filter(
-            LeaveApplication.status == LeaveApplicationStatus.pending
-        ).scalar()
+        if role == 'manager':
+            team = select(Employee.id, Employee.date_of_birth, Employee.date_of_joining).where(
+                Employee.id.in_(org_tree_service.team_ids(db, employee_id, depth=1)),
+                Employee.employment_status == 'active'
+            ).cte("team")
+            in_team = LeaveApplication.employee_id.in_(select(team.c.id))
+            columns += [
+                select(func.count()).select_from(team).scalar_subquery().label("team_count"),
+                self._count(
+                    LeaveApplication, in_team,
+                    LeaveApplication.status == LeaveApplicationStatus.approved,
+                    LeaveApplication.from_date <= today,
+                    LeaveApplication.to_date >= today
+                ).label("on_leave_today"),
+                self._count(LeaveApplication, in_team, LeaveApplication.status == LeaveApplicationStatus.pending).label("pending_approvals"),
+                # Team Celebrations count this month
+                select(func.count()).select_from(team).where(or_(
+                    extract('month', team.c.date_of_birth) == today.month,
+                    extract('month', team.c.date_of_joining) == today.month
+                )).scalar_subquery().label("team_celebrations"),
+            ]
+        else:
+            columns += [
+                self._count(
+                    EmployeeDocument,
+                    EmployeeDocument.employee_id == employee_id,
+                    EmployeeDocument.verification_status == DocumentVerificationStatus.pending
+                ).label("pending_docs"),
+                self._count(
+                    LeaveApplication,
+                    LeaveApplication.employee_id == employee_id,
+                    LeaveApplication.status == LeaveApplicationStatus.approved,
+                    LeaveApplication.from_date > today
+                ).label("upcoming_leaves"),
+            ]
 
-        pending_docs = db.query(func.count(EmployeeDocument.id)).filter(
-            EmployeeDocument.verification_status == DocumentVerificationStatus.pending
-        ).scalar()
+        next_leave = select(
+            LeaveApplication.from_date.label("next_from_date"),
+            LeaveApplication.number_of_days.label("next_days"),
+            LeaveApplication.status.label("next_status"),
+            LeaveType.name.label("next_type")
+        ).join(LeaveType, LeaveApplication.leave_type_id == LeaveType.id).where(
+            LeaveApplication.employee_id == employee_id,
+            LeaveApplication.status == LeaveApplicationStatus.approved,
+            LeaveApplication.from_date >= today
+        ).order_by(LeaveApplication.from_date.asc()).limit(1).subquery()
 
+        one_row = select(literal(1).label("one")).subquery()
+        stmt = select(*columns, next_leave).select_from(one_row.outerjoin(next_leave, true()))
+        return db.execute(stmt).one()
+
+    def _get_admin_stats(self, summary) -> List[DashboardStat]:
+        pending_leaves = summary.pending_leaves
+        pending_docs = summary.pending_docs
         return [
-            DashboardStat(title="Total Employees", value=str(total_employees), description="Active members", icon="Users", accentColor="bg-blue-500"),
-            DashboardStat(title="On Leave Today", value=str(on_leave_today), description="Approved leaves", icon="CalendarClock", accentColor="bg-orange-500"),
+            DashboardStat(title="Total Employees", value=str(summary.total_employees), description="Active members", icon="Users", accentColor="bg-blue-500"),
+            DashboardStat(title="On Leave Today", value=str(summary.on_leave_today), description="Approved leaves", icon="CalendarClock", accentColor="bg-orange-500"),
             DashboardStat(title="Pending Leaves", value=str(pending_leaves), description="Awaiting approval", icon="Clock", trend="Action needed" if pending_leaves > 0 else None, accentColor="bg-red-500"),
             DashboardStat(title="Pending Documents", value=str(pending_docs), description="Verification required", icon="FileCheck", trend="Check now" if pending_docs > 0 else None, accentColor="bg-purple-500")
         ]
 
-    def _get_manager_stats(self, db: Session, manager_id: int) -> List[DashboardStat]:
-        team_members = db.query(Employee).filter(Employee.manager_id == manager_id, Employee.employment_status == 'active').all()
-        team_ids = [e.id for e in team_members]
-        team_count = len(team_members)
-
-        today = date.today()
-        on_leave_today = db.query(func.count(LeaveApplication.id)).filter(
-            LeaveApplication.employee_id.in_(team_ids) if team_ids else False,
-            LeaveApplication.status == LeaveApplicationStatus.approved,
-            LeaveApplication.from_date <= today,
-            LeaveApplication.to_date >= today
-        ).scalar()
-
-        pending_approvals = db.query(func.count(LeaveApplication.id)).filter(
-            LeaveApplication.employee_id.in_(team_ids) if team_ids else False,
-            LeaveApplication.status == LeaveApplicationStatus.pending
-        ).scalar()
-
-        # Just to fill the 4th card, maybe "Team Attendance" or "Total Tasks"
-        # Let's go with "Team Celebrations" count this month
-        month = today.month
-        team_celebrations = db.query(func.count(Employee.id)).filter(
-            Employee.id.in_(team_ids) if team_ids else False,
-            or_(
-                extract('month', Employee.date_of_birth) == month,
-                extract('month', Employee.date_of_joining) == month
-            )
-        ).scalar()
-
+    def _get_manager_stats(self, summary) -> List[DashboardStat]:
+        pending_approvals = summary.pending_approvals
         return [
-            DashboardStat(title="My Team", value=str(team_count), description="Direct reports", icon="Users", accentColor="bg-blue-500"),
-            DashboardStat(title="Team On Leave", value=str(on_leave_today), description="Out today", icon="CalendarClock", accentColor="bg-orange-500"),
+            DashboardStat(title="My Team", value=str(summary.team_count), description="Direct reports", icon="Users", accentColor="bg-blue-500"),
+            DashboardStat(title="Team On Leave", value=str(summary.on_leave_today), description="Out today", icon="CalendarClock", accentColor="bg-orange-500"),
             DashboardStat(title="Pending Approvals", value=str(pending_approvals), description="Leaves to review", icon="Clock", trend="Action needed" if pending_approvals > 0 else None, accentColor="bg-red-500"),
-            DashboardStat(title="Monthly Celebrations", value=str(team_celebrations), description="Birthdays & Work Anniv.", icon="PartyPopper", accentColor="bg-purple-500")
+            DashboardStat(title="Monthly Celebrations", value=str(summary.team_celebrations), description="Birthdays & Work Anniv.", icon="PartyPopper", accentColor="bg-purple-500")
         ]
 
-    def _get_employee_stats(self, db: Session, employee_id: int) -> List[DashboardStat]:
-        # Leave Balance
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
-        balances = db.query(LeaveBalance).join(LeaveType, LeaveBalance.leave_type_id == LeaveType.id).filter(LeaveBalance.employee_id == employee_id, LeaveBalance.leave_year == date.today().year).all()
-        
-        filtered_balances = []
-        if employee:
-             for b in balances:
-                 if b.leave_type.gender_eligibility == "All":
-                     filtered_balances.append(b)
-                     continue
-                 if employee.gender and b.leave_type.gender_eligibility.lower() == employee.gender.lower():
-                     filtered_balances.append(b)
-        else:
-            filtered_balances = balances
-
-        total_balance = sum(float(b.available) for b in filtered_balances)
-        
-        # Pending Docs
-        pending_docs = db.query(func.count(EmployeeDocument.id)).filter(
-            EmployeeDocument.employee_id == employee_id,
-            EmployeeDocument.verification_status == DocumentVerificationStatus.pending
-        ).scalar()
-
-        # Approved Leaves (Upcoming)
-        today = date.today()
-        upcoming_leaves = db.query(func.count(LeaveApplication.id)).filter(
-            LeaveApplication.employee_id == employee_id,
-            LeaveApplication.status == LeaveApplicationStatus.approved,
-            LeaveApplication.from_date > today
-        ).scalar()
-
-        # Leaves Used
-        leaves_used = sum(float(b.taken) for b in filtered_balances)
+    def _get_employee_stats(self, summary, balances: List[LeaveBalance]) -> List[DashboardStat]:
+        total_balance = sum(float(b.available) for b in balances)
+        leaves_used = sum(float(b.taken) for b in balances)
+        pending_docs = summary.pending_docs
 
         return [
             DashboardStat(title="Available Balance", value=str(total_balance), description="Total across all types", icon="Calendar", accentColor="bg-blue-500"),
             DashboardStat(title="Leaves Used", value=str(leaves_used), description="This year so far", icon="CalendarCheck", accentColor="bg-orange-500"),
-            DashboardStat(title="Upcoming Leaves", value=str(upcoming_leaves), description="Approved requests", icon="Plane", accentColor="bg-red-500"),
+            DashboardStat(title="Upcoming Leaves", value=str(summary.upcoming_leaves), description="Approved requests", icon="Plane", accentColor="bg-red-500"),
             DashboardStat(title="Docs to Verify", value=str(pending_docs), description="Pending HR check", icon="FileText", trend="Check status" if pending_docs > 0 else None, accentColor="bg-purple-500")
         ]
 
     def _get_celebrations(self, db: Session, employee_id: int, role: str) -> List[Celebration]:
+        # Direct reports for managers, everyone else sees the whole company
+        scope = employee_id if role == 'manager' else None
         today = date.today()
-        end_date = today + timedelta(days=7)
-        
+        cached = celebration_cache.get(scope, today)
+        if cached is not None:
+            return cached
+
+        dates_by_key = celebration_window(today, CELEBRATION_WINDOW_DAYS)
+        ranges = key_ranges(dates_by_key)
+
+        def in_window(column):
+            return or_(*(month_day(column).between(low, high) for low, high in ranges))
+
+        query = db.query(
+            Employee.id, Employee.first_name, Employee.last_name, Employee.date_of_birth, Employee.date_of_joining
+        ).filter(
+            Employee.employment_status == 'active',
+            or_(in_window(Employee.date_of_birth), in_window(Employee.date_of_joining))
+        )
+        if scope:
+            query = query.filter(Employee.id.in_(org_tree_service.team_ids(db, scope, depth=1)))
+
         celebrations = []
-        
-        # We need a custom logic to filter by month/day ignoring year
-        # Fetch all employees for birthdays/anniversaries (or just team for manager)
-        if role == 'manager':
-            # Only direct reports
-            employees = db.query(Employee).filter(Employee.manager_id == employee_id, Employee.employment_status == 'active').all()
-        else:
-            # Everyone (or filter by department? Let's go everyone for now)
-            employees = db.query(Employee).filter(Employee.employment_status == 'active').all()
+        for emp in query.all():
+            name = f"{emp.first_name} {emp.last_name}"
+            initials = f"{emp.first_name[0]}{emp.last_name[0]}"
 
-        for emp in employees:
             # Check Birthday
             if emp.date_of_birth:
-                b_date = emp.date_of_birth
-                # Check if this year birthday is in range
-                try:
-                    this_year_b = date(today.year, b_date.month, b_date.day) if not (b_date.month == 2 and b_date.day == 29 and not calendar.isleap(today.year)) else date(today.year, 3, 1)
-                except ValueError:
-                     continue
-                
-                if today <= this_year_b <= end_date:
+                b_date = dates_by_key.get(emp.date_of_birth.month * 100 + emp.date_of_birth.day)
+                if b_date:
                     celebrations.append(Celebration(
                         employee_id=emp.id,
-                        name=emp.full_name,
+                        name=name,
                         type="birthday",
-                        date="Today" if this_year_b == today else this_year_b.strftime("%d %b"),
-                        actual_date=this_year_b,
-                        initials=f"{emp.first_name[0]}{emp.last_name[0]}"
+                        date="Today" if b_date == today else b_date.strftime("%d %b"),
+                        actual_date=b_date,
+                        initials=initials
                     ))
 
             # Check Work Anniversary
             if emp.date_of_joining:
-                j_date = emp.date_of_joining
-                try:
-                    this_year_j = date(today.year, j_date.month, j_date.day) if not (j_date.month == 2 and j_date.day == 29 and not calendar.isleap(today.year)) else date(today.year, 3, 1)
-                except ValueError:
-                     continue
-                
-                if today <= this_year_j <= end_date and this_year_j > j_date:
+                j_date = dates_by_key.get(emp.date_of_joining.month * 100 + emp.date_of_joining.day)
+                if j_date and j_date > emp.date_of_joining:
                     celebrations.append(Celebration(
                         employee_id=emp.id,
-                        name=emp.full_name,
+                        name=name,
                         type="anniversary",
-                        date="Today" if this_year_j == today else this_year_j.strftime("%d %b"),
-                        actual_date=this_year_j,
-                        years=today.year - j_date.year,
-                        initials=f"{emp.first_name[0]}{emp.last_name[0]}"
+                        date="Today" if j_date == today else j_date.strftime("%d %b"),
+                        actual_date=j_date,
+                        years=j_date.year - emp.date_of_joining.year,
+                        initials=initials
                     ))
 
         # Sort by actual date
         celebrations.sort(key=lambda x: x.actual_date)
-        return celebrations[:5] # Limit to 5
-
-    def _get_leave_balances(self, db: Session, employee_id: int) -> List[LeaveBalanceItem]:
-        balances = db.query(LeaveBalance, LeaveType).join(LeaveType, LeaveBalance.leave_type_id == LeaveType.id)\
-            .filter(LeaveBalance.employee_id == employee_id, LeaveBalance.leave_year == date.today().year).all()
-        
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        celebrations = celebrations[:5] # Limit to 5
+        celebration_cache.set(scope, today, celebrations)
+        return celebrations
 
+    def _get_leave_balances(self, balances: List[LeaveBalance]) -> List[LeaveBalanceItem]:
         items = []
         colors = {
             "earned_holiday": ("bg-blue-500", "bg-blue-100"),
@@ -234,12 +385,9 @@ class DashboardService:
             "restricted_holiday": ("bg-zinc-500", "bg-zinc-100"),
         }
         
-        for bal, lt in balances:
-            # Gender check
-            if lt.gender_eligibility and lt.gender_eligibility != "All":
-                if not employee or not employee.gender or employee.gender.lower() != lt.gender_eligibility.lower():
-                    continue
-
+        # Gender-ineligible types are already excluded by the query
+        for bal in balances:
+            lt = bal.leave_type
             color_pair = colors.get(lt.name.value, ("bg-primary", "bg-secondary"))
             # Total for the bar is opening_balance + accrued + carry_forward
             total = float(bal.opening_balance + bal.accrued + bal.carry_forward)
@@ -252,19 +400,13 @@ class DashboardService:
             ))
         return items
 
-    def _get_upcoming_leave(self, db: Session, employee_id: int) -> Optional[UpcomingLeave]:
-        today = date.today()
-        upcoming = db.query(LeaveApplication, LeaveType).join(LeaveType, LeaveApplication.leave_type_id == LeaveType.id)\
-            .filter(LeaveApplication.employee_id == employee_id, LeaveApplication.status == LeaveApplicationStatus.approved, LeaveApplication.from_date >= today)\
-            .order_by(LeaveApplication.from_date.asc()).first()
-        
-        if upcoming:
-            app, lt = upcoming
+    def _get_upcoming_leave(self, summary) -> Optional[UpcomingLeave]:
+        if summary.next_from_date:
             return UpcomingLeave(
-                type=lt.name.value.replace('_', ' ').title(),
-                start_date=app.from_date,
-                days=float(app.number_of_days),
-                status=app.status.value
+                type=summary.next_type.value.replace('_', ' ').title(),
+                start_date=summary.next_from_date,
+                days=float(summary.next_days),
+                status=summary.next_status.value
             )
         return None
 
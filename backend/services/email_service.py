@@ -1,55 +1,310 @@
+import logging
+import os
 import smtplib
-from email.mime.text import MIMEText
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
 from core.config import settings
-import logging
+from core.database import SessionLocal
+from models.email_outbox import EmailOutbox, EmailStatus
+from utils.storage import get_storage
 
 logger = logging.getLogger(__name__)
 
-class EmailService:
-    def send_email(self, to_email: str, subject: str, body: str, is_html: bool = False, attachments: list[str] = None):
-        if not settings.SMTP_SERVER or not settings.SMTP_USER:
-            logger.warning(f"Email not sent to {to_email} because SMTP is not configured.")
-            logger.info(f"Subject: {subject}\nBody: {body}")
-            if attachments:
-                 logger.info(f"Attachments: {attachments}")
-            return
 
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_FROM_EMAIL
-        msg['To'] = to_email
-        msg['Subject'] = subject
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try after `attempts` failed ones."""
+    seconds = settings.EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.EMAIL_RETRY_MAX_SECONDS))
 
-        msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
 
-        if attachments:
-            import os
-            from email.mime.application import MIMEApplication
-            
-            for file_path in attachments:
-                try:
-                    with open(file_path, "rb") as f:
-                        part = MIMEApplication(f.read(), Name=os.path.basename(file_path))
-                    # After the file is closed
-                    part['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
-                    msg.attach(part)
-                except Exception as e:
-                    logger.error(f"Failed to attach file {file_path}: {e}")
+def is_permanent(error: Exception) -> bool:
+    """
+    5xx replies and deleted attachments won't succeed on retry; bad credentials are a config
+    problem that gets fixed, and storage outages pass, so those do.
+    """
+    if isinstance(error, FileNotFoundError):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
 
+class SMTPConnectionPool:
+    """
+    Up to EMAIL_SMTP_CONNECTIONS open, logged-in SMTP sessions reused across messages, so a batch
+    pays for the TCP/TLS handshake and AUTH once. Connections that error are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS)
         try:
-            server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
             if settings.SMTP_TLS:
                 server.starttls()
-            
             if settings.SMTP_USER and settings.SMTP_PASSWORD:
                 server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            
-            server.send_message(msg)
+        except BaseException:
+            self._discard(server)
+            raise
+        return server
+
+    def _discard(self, server: smtplib.SMTP):
+        try:
             server.quit()
-            logger.info(f"Email sent to {to_email}")
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            # In production, might want to re-raise or use a task queue
-            pass
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> Tuple[smtplib.SMTP, bool]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop() # Most recently used first
+            if time.monotonic() - last_used < settings.EMAIL_SMTP_IDLE_SECONDS:
+                return server, True
+            try:
+                if server.noop()[0] == 250:
+                    return server, True
+            except Exception:
+                pass
+            self._discard(server)
+        return self._connect(), False
+
+    def _checkin(self, server: smtplib.SMTP):
+        with self._lock:
+            if len(self._idle) < settings.EMAIL_SMTP_CONNECTIONS:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._discard(server)
+
+    @contextmanager
+    def connection(self):
+        """Yields (connection, reused), `reused` telling whether it came from the pool."""
+        server, reused = self._checkout()
+        try:
+            yield server, reused
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # Rejected message; smtplib has reset the session, so it stays usable
+            self._checkin(server)
+            raise
+        except OSError: # Includes SMTPServerDisconnected
+            server.close()
+            raise
+        except BaseException:
+            self._discard(server)
+            raise
+        self._checkin(server)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._discard(server)
+
+
+class EmailService:
+    """
+    Outgoing email goes through the email_outbox table: callers enqueue in their own
+    transaction (so a rolled-back change sends nothing), and the outbox worker delivers
+    committed messages in batches over pooled SMTP connections, retrying with backoff.
+    """
+
+    def __init__(self):
+        self.pool = SMTPConnectionPool()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def enqueue(self, db: Session, to_email: str, subject: str, body: str, is_html: bool = False, attachments: list[str] = None) -> EmailOutbox:
+        """Adds a message to the outbox; it is sent once `db` commits. `attachments` are storage keys of uploaded files."""
+        # Status set up front: the blob service counts the attachments of pending rows before the insert
+        email = EmailOutbox(to_email=to_email, subject=subject, body=body, is_html=is_html,
+                            attachments=attachments or None, status=EmailStatus.pending)
+        db.add(email)
+        db.info["email_enqueued"] = True
+        return email
+
+    def _configured(self) -> bool:
+        return bool(settings.SMTP_SERVER and settings.SMTP_USER)
+
+    def _message(self, email: EmailOutbox) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = settings.SMTP_FROM_EMAIL
+        msg['To'] = email.to_email
+        msg['Subject'] = email.subject
+
+        msg.attach(MIMEText(email.body, 'html' if email.is_html else 'plain'))
+
+        # A missing attachment fails the message rather than sending it without the file
+        for file_path in email.attachments or []:
+            try:
+                content = get_storage().get(file_path)
+            except FileNotFoundError as e:
+                raise FileNotFoundError(f"Attachment {file_path} not found") from e
+            part = MIMEApplication(content, Name=os.path.basename(file_path))
+            part['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
+            msg.attach(part)
+        return msg
+
+    def deliver(self, msg: MIMEMultipart) -> Optional[Exception]:
+        """Sends one message over a pooled connection; returns the error instead of raising."""
+        for retry in (False, True):
+            reused = False
+            try:
+                with self.pool.connection() as (server, reused):
+                    server.send_message(msg)
+                return None
+            except smtplib.SMTPServerDisconnected as e:
+                # A pooled connection the server dropped since its last check gets one more go
+                if retry or not reused:
+                    return e
+            except Exception as e:
+                return e
+
+    def _senders(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.EMAIL_SMTP_CONNECTIONS, thread_name_prefix="smtp")
+            return self._executor
+
+    def process_outbox(self, db: Session, batch_size: Optional[int] = None) -> int:
+        """
+        Delivers up to `batch_size` due messages; returns how many were handled. Rows are claimed
+        with SKIP LOCKED and their retry time pushed out before sending, so several workers can
+        run side by side and a crash mid-batch only delays those messages.
+        """
+        now = datetime.now(timezone.utc)
+        emails = db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(batch_size or settings.EMAIL_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not emails:
+            db.commit()
+            return 0
+
+        if not self._configured():
+            for email in emails:
+                logger.warning(f"Email not sent to {email.to_email} because SMTP is not configured.")
+                logger.info(f"Subject: {email.subject}\nBody: {email.body}")
+                if email.attachments:
+                    logger.info(f"Attachments: {email.attachments}")
+                email.status = EmailStatus.skipped
+            db.commit()
+            return len(emails)
+
+        messages, errors = {}, {}
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + retry_delay(email.attempts)
+            try:
+                messages[email.id] = self._message(email)
+            except Exception as e:
+                # Recorded like a failed send: retried after the backoff, or failed for good
+                errors[email.id] = e
+        ids = [email.id for email in emails]
+        db.commit()
+
+        errors.update(zip(messages, self._senders().map(self.deliver, messages.values())))
+
+        emails = {email.id: email for email in db.scalars(select(EmailOutbox).where(EmailOutbox.id.in_(ids)))}
+        sent_at = datetime.now(timezone.utc)
+        for email_id in ids:
+            email, error = emails[email_id], errors[email_id]
+            if error is None:
+                email.status = EmailStatus.sent
+                email.sent_at = sent_at
+                email.last_error = None
+                logger.info(f"Email sent to {email.to_email}")
+                continue
+            email.last_error = str(error)[:1000]
+            if is_permanent(error) or email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                email.status = EmailStatus.failed
+                logger.error(f"Giving up on email {email.id} to {email.to_email}: {error}")
+            else:
+                logger.warning(f"Email {email.id} to {email.to_email} failed (attempt {email.attempts}), retrying: {error}")
+        db.commit()
+        return len(ids)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.pool.close()
 
 email_service = EmailService()
+
+
+class EmailOutboxWorker:
+    """
+    Background thread draining the outbox: woken when a transaction that queued mail commits,
+    and polling every EMAIL_POLL_SECONDS for retries and mail queued by other processes.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self):
+        while not self._stop.is_set():
+            handled = 0
+            try:
+                db = SessionLocal()
+                try:
+                    handled = email_service.process_outbox(db)
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Email outbox run failed: {e}")
+            if handled < settings.EMAIL_BATCH_SIZE:
+                # Drained (or failing): wait for new mail or the next poll
+                self._wake.wait(settings.EMAIL_POLL_SECONDS)
+                self._wake.clear()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        email_service.close()
+
+email_worker = EmailOutboxWorker()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_email_worker(session):
+    if session.info.pop("email_enqueued", False):
+        email_worker.wake()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_enqueued_email(session, previous_transaction):
+    session.info.pop("email_enqueued", None)
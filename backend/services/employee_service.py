@@ -7,9 +7,35 @@ from schemas.employee import EmployeeCreate, EmployeeUpdate
 from core.security import get_password_hash
 from models.user import User, UserRole
 from models.employee import Employee
-from utils.audit import log_action
-import csv
-import io
+from utils.audit import diff_changes, log_action
+from services.accrual_service import accrual_service
+from core.database import SessionLocal
+from models.department import Department
+from models.master_data import Designation
+from openpyxl import Workbook
+from sqlalchemy.orm import aliased
+from typing import Iterator
+from utils.export import EXPORT_BATCH_SIZE, csv_chunks, resolve_columns
+import os
+import tempfile
+
+ReportingManager = aliased(Employee)
+
+# Exportable columns: key -> (header, expression). The default set matches the original export.
+EXPORT_COLUMNS = {
+    "employee_code": ("Employee Code", Employee.employee_code),
+    "first_name": ("First Name", Employee.first_name),
+    "last_name": ("Last Name", Employee.last_name),
+    "email": ("Email", Employee.email),
+    "phone": ("Phone", Employee.phone),
+    "department": ("Department", Department.name),
+    "designation": ("Designation", Designation.name),
+    "manager": ("Reporting Manager", ReportingManager.first_name + " " + ReportingManager.last_name),
+    "employment_type": ("Employment Type", Employee.employment_type),
+    "status": ("Status", Employee.employment_status),
+    "date_of_joining": ("Date of Joining", Employee.date_of_joining),
+}
+DEFAULT_EXPORT_COLUMNS = ("employee_code", "first_name", "last_name", "email", "department", "designation", "status")
 
 class EmployeeService:
     def get_employees_scoped(
@@ -21,7 +47,8 @@ class EmployeeService:
         search: Optional[str] = None,
         department_id: Optional[int] = None,
         status_filter: Optional[str] = None,
-        archived: bool = False
+        archived: bool = False,
+        cursor: Optional[str] = None
     ) -> Tuple[List, int]:
         manager_id = None
         if current_user.role == UserRole.manager:
@@ -33,7 +60,7 @@ class EmployeeService:
         
         # Admin and HR Admin can see all
         return employee_repository.get_employees(
-            db, skip, limit, search, department_id, status_filter, manager_id, archived
+            db, skip, limit, search, department_id, status_filter, manager_id, archived, cursor
         )
 
     def _clean_emp_data(self, data: dict) -> dict:
@@ -82,8 +109,7 @@ class EmployeeService:
         employee = employee_repository.get_employee_by_id(db, employee_id)
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
-        
-        old_data = {c.name: str(getattr(employee, c.name)) for c in employee.__table__.columns if c.name not in ['hashed_password', 'created_at', 'updated_at']}
+
 
         # RBAC Check
         if current_user.role not in [UserRole.super_admin, UserRole.hr_admin]:
@@ -102,52 +128,85 @@ class EmployeeService:
             update_data = employee_in.model_dump(exclude_unset=True)
 
         update_data = self._clean_emp_data(update_data)
-        updated_employee = employee_repository.update_employee(db, employee, update_data)
-        
-        log_action(
-            db, current_user.id, "UPDATE", "Employee", employee_id,
-            details={"old": old_data, "new": {k: str(v) for k, v in update_data.items()}}, ip_address=ip_address
-        )
-        
-        return updated_employee
+        if "date_of_joining" in update_data or "gender" in update_data:
+            # Pro-rata accrual and gender eligibility depend on these
+            accrual_service.invalidate(db, employee_id=employee_id)
+        # Only what actually changes is recorded; the entry commits with the update
+        changes = diff_changes(employee, update_data)
+        if changes:
+            log_action(db, current_user.id, "UPDATE", "Employee", employee_id, details={"changes": changes}, ip_address=ip_address)
+        return employee_repository.update_employee(db, employee, update_data)
 
     def archive_employee(self, db: Session, employee_id: int, archiver_id: int, ip_address: str = None):
-        employee = employee_repository.archive_employee(db, employee_id)
-        if employee:
-            log_action(
-                db, archiver_id, "ARCHIVE", "Employee", employee_id, 
-                ip_address=ip_address
-            )
-        return employee
+        if not employee_repository.get_employee_by_id(db, employee_id):
+            return None
+        log_action(
+            db, archiver_id, "ARCHIVE", "Employee", employee_id, 
+            ip_address=ip_address
+        )
+        return employee_repository.archive_employee(db, employee_id)
 
     def restore_employee(self, db: Session, employee_id: int, restorer_id: int, ip_address: str = None):
-        employee = employee_repository.restore_employee(db, employee_id)
-        if employee:
-            log_action(
-                db, restorer_id, "RESTORE", "Employee", employee_id,
-                ip_address=ip_address
-            )
-        return employee
-
-    def export_employees(self, db: Session, current_user: User):
-        # Implementation for CSV export
-        employees, _ = self.get_employees_scoped(db, current_user, limit=1000)
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Employee Code", "First Name", "Last Name", "Email", "Department", "Designation", "Status"])
-        
-        for emp in employees:
-            writer.writerow([
-                emp.employee_code,
-                emp.first_name,
-                emp.last_name,
-                emp.email,
-                emp.department.name if emp.department else "",
-                emp.designation_rel.name if emp.designation_rel else "",
-                emp.employment_status
-            ])
-            
-        return output.getvalue()
+        if not employee_repository.get_employee_by_id(db, employee_id):
+            return None
+        log_action(
+            db, restorer_id, "RESTORE", "Employee", employee_id,
+            ip_address=ip_address
+        )
+        return employee_repository.restore_employee(db, employee_id)
+
+    def resolve_export_columns(self, columns: Optional[str] = None) -> List[str]:
+        return resolve_columns(columns, EXPORT_COLUMNS, DEFAULT_EXPORT_COLUMNS)
+
+    def _export_query(
+        self,
+        db: Session,
+        current_user: User,
+        keys: List[str],
+        search: Optional[str] = None,
+        department_id: Optional[int] = None,
+        status_filter: Optional[str] = None,
+        archived: bool = False
+    ):
+        # Plain column rows with department/designation/manager names joined in (no ORM objects or lazy loads),
+        # fetched from a server-side cursor EXPORT_BATCH_SIZE rows at a time
+        query = db.query(*[EXPORT_COLUMNS[k][1].label(k) for k in keys]).select_from(Employee)\
+            .outerjoin(Department, Employee.department_id == Department.id)\
+            .outerjoin(Designation, Employee.designation_id == Designation.id)\
+            .outerjoin(ReportingManager, Employee.manager_id == ReportingManager.id)
+
+        manager_id = current_user.employee_id if current_user.role == UserRole.manager else None
+        query, _ = employee_repository.filter_employees(query, search, department_id, status_filter, manager_id, archived)
+        if current_user.role == UserRole.employee:
+            query = query.filter(Employee.id == current_user.employee_id)
+        return query.order_by(Employee.id).yield_per(EXPORT_BATCH_SIZE)
+
+    def stream_employees_csv(self, current_user: User, keys: List[str], **filters) -> Iterator[str]:
+        """
+        Yields the CSV export in chunks as rows arrive, for a StreamingResponse.
+        Opens its own session: the request's session is closed before the body is streamed.
+        """
+        db = SessionLocal()
+        try:
+            rows = self._export_query(db, current_user, keys, **filters)
+            yield from csv_chunks(rows, [EXPORT_COLUMNS[k][0] for k in keys])
+        finally:
+            db.close()
+
+    def export_employees_xlsx(self, db: Session, current_user: User, keys: List[str], **filters) -> str:
+        """
+        Writes the export to a temporary .xlsx file and returns its path (the caller removes it).
+        Write-only mode flushes rows to disk as they are added, so memory stays flat.
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Employees")
+        sheet.append([EXPORT_COLUMNS[k][0] for k in keys])
+        for row in self._export_query(db, current_user, keys, **filters):
+            sheet.append(list(row))
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        workbook.save(path)
+        return path
 
 employee_service = EmployeeService()
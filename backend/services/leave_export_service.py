@@ -0,0 +1,128 @@
+from datetime import date
+from typing import Iterator, List, Optional
+from sqlalchemy import Numeric, case, func, type_coerce
+from sqlalchemy.orm import Session, aliased
+from core.database import SessionLocal
+from models.department import Department
+from models.employee import Employee
+from models.leave import LeaveApplication, LeaveBalance, LeaveType, LeaveApplicationStatus
+from services.accrual_service import accrual_service
+from utils.export import EXPORT_BATCH_SIZE, arrow_schema, csv_chunks, parquet_chunks, resolve_columns
+
+Approver = aliased(Employee)
+
+EMPLOYEE_COLUMNS = {
+    "employee_code": ("Employee Code", Employee.employee_code),
+    "employee_name": ("Employee Name", Employee.first_name + " " + Employee.last_name),
+    "department": ("Department", Department.name),
+    "leave_type": ("Leave Type", LeaveType.name),
+}
+
+APPLICATION_COLUMNS = {
+    "application_id": ("Application ID", LeaveApplication.id),
+    **EMPLOYEE_COLUMNS,
+    "from_date": ("From", LeaveApplication.from_date),
+    "to_date": ("To", LeaveApplication.to_date),
+    "duration_type": ("Duration", LeaveApplication.duration_type),
+    "number_of_days": ("Days", LeaveApplication.number_of_days),
+    "status": ("Status", LeaveApplication.status),
+    "approver": ("Approver", Approver.first_name + " " + Approver.last_name),
+    "approved_date": ("Approved On", LeaveApplication.approved_date),
+    "applied_at": ("Applied On", LeaveApplication.created_at),
+}
+
+BALANCE_COLUMNS = {
+    **EMPLOYEE_COLUMNS,
+    "leave_year": ("Year", LeaveBalance.leave_year),
+    "opening_balance": ("Opening", LeaveBalance.opening_balance),
+    "accrued": ("Accrued", LeaveBalance.accrued),
+    "carry_forward": ("Carry Forward", LeaveBalance.carry_forward),
+    "taken": ("Taken", LeaveBalance.taken),
+    "pending_approval": ("Pending", LeaveBalance.pending_approval),
+    "encashed": ("Encashed", LeaveBalance.encashed),
+    "available": ("Available", LeaveBalance.available),
+}
+
+# Days payroll could be asked to encash: the available balance (once it reaches the minimum
+# balance to encash), capped at the type's yearly encashment limit
+ENCASHABLE_DAYS = type_coerce(
+    case(
+        (
+            LeaveBalance.available >= func.coalesce(LeaveType.min_balance_to_encash, 0),
+            func.least(
+                func.greatest(LeaveBalance.available, 0),
+                func.coalesce(LeaveType.max_encashment_per_year, LeaveBalance.available)
+            )
+        ),
+        else_=0
+    ),
+    Numeric(5, 2)
+)
+
+LIABILITY_COLUMNS = {
+    **EMPLOYEE_COLUMNS,
+    "available": ("Available", LeaveBalance.available),
+    "max_encashment_per_year": ("Max Encashment / Year", LeaveType.max_encashment_per_year),
+    "encashable_days": ("Encashable Days", ENCASHABLE_DAYS),
+}
+
+# Report name -> exportable columns (all of them by default)
+REPORTS = {
+    "applications": APPLICATION_COLUMNS,
+    "balances": BALANCE_COLUMNS,
+    "liability": LIABILITY_COLUMNS,
+}
+
+
+class LeaveExportService:
+    def resolve_columns(self, report: str, columns: Optional[str] = None) -> List[str]:
+        return resolve_columns(columns, REPORTS[report], list(REPORTS[report]))
+
+    def prepare(self, db: Session, report: str, year: int):
+        """Brings stale balance snapshots up to date (one bulk upsert) before balances are streamed."""
+        if report in ("balances", "liability"):
+            active_ids = [e.id for e in db.query(Employee.id).filter(Employee.employment_status == "active")]
+            accrual_service.refresh_stale(db, active_ids, year)
+
+    def _query(self, db: Session, report: str, keys: List[str], year: int, status: Optional[LeaveApplicationStatus] = None):
+        # Only the requested columns are selected, as plain rows (no ORM objects)
+        query = db.query(*[REPORTS[report][k][1].label(k) for k in keys])
+
+        if report == "applications":
+            query = query.select_from(LeaveApplication)\
+                .join(Employee, LeaveApplication.employee_id == Employee.id)\
+                .join(LeaveType, LeaveApplication.leave_type_id == LeaveType.id)\
+                .outerjoin(Approver, LeaveApplication.approver_id == Approver.id)\
+                .filter(LeaveApplication.from_date >= date(year, 1, 1), LeaveApplication.from_date <= date(year, 12, 31))
+            if status:
+                query = query.filter(LeaveApplication.status == status)
+            order = (LeaveApplication.from_date, LeaveApplication.id)
+        else:
+            query = query.select_from(LeaveBalance)\
+                .join(Employee, LeaveBalance.employee_id == Employee.id)\
+                .join(LeaveType, LeaveBalance.leave_type_id == LeaveType.id)\
+                .filter(LeaveBalance.leave_year == year)
+            if report == "liability":
+                query = query.filter(LeaveType.encashment == True, Employee.employment_status == "active")
+            order = (LeaveBalance.employee_id, LeaveBalance.leave_type_id)
+
+        query = query.outerjoin(Department, Employee.department_id == Department.id)
+        # Server-side cursor: rows arrive EXPORT_BATCH_SIZE at a time
+        return query.order_by(*order).yield_per(EXPORT_BATCH_SIZE)
+
+    def stream(self, report: str, keys: List[str], year: int, format: str = "csv", status: Optional[LeaveApplicationStatus] = None) -> Iterator:
+        """
+        Yields the report file (CSV text or Parquet bytes) as rows arrive, for a StreamingResponse.
+        Opens its own session: the request's session is closed before the body is streamed.
+        """
+        db = SessionLocal()
+        try:
+            query = self._query(db, report, keys, year, status)
+            if format == "parquet":
+                yield from parquet_chunks(query, arrow_schema(query))
+            else:
+                yield from csv_chunks(query, [REPORTS[report][k][0] for k in keys])
+        finally:
+            db.close()
+
+leave_export_service = LeaveExportService()
@@ -0,0 +1,239 @@
+import csv
+import io
+from bisect import bisect_right
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException
+from pydantic import ValidationError
+from core.config import settings
+from repositories.leave_repository import leave_repository
+from services.accrual_service import accrual_service, is_eligible
+from services.balance_ledger_service import balance_ledger_service
+from services.leave_service import leave_service
+from models.leave import LeaveApplication, LeaveApplicationStatus, LeaveBalance, LeaveTypeEnum, PublicHoliday, LedgerEntryType
+from models.employee import Employee
+from schemas.leave import LeaveImportRow, LeaveImportRowResult, LeaveImportReport
+
+IMPORTABLE_STATUSES = {LeaveApplicationStatus.pending, LeaveApplicationStatus.approved}
+
+
+class _IntervalIndex:
+    """
+    Non-overlapping date intervals for one employee, sorted by start date.
+    Existing applications are merged on load; imported rows are only added when they
+    don't overlap, so a single neighbour check answers every overlap query.
+    """
+
+    def __init__(self, intervals: List[Tuple[date, date]]):
+        self._starts: List[date] = []
+        self._intervals: List[Tuple[date, date]] = []
+        for start, end in sorted(intervals):
+            if self._intervals and start <= self._intervals[-1][1]:
+                last_start, last_end = self._intervals[-1]
+                self._intervals[-1] = (last_start, max(last_end, end))
+            else:
+                self._starts.append(start)
+                self._intervals.append((start, end))
+
+    def find_overlap(self, start: date, end: date) -> Optional[Tuple[date, date]]:
+        # Overlap Logic: (StartA <= EndB) and (EndA >= StartB)
+        i = bisect_right(self._starts, end)
+        if i and self._intervals[i - 1][1] >= start:
+            return self._intervals[i - 1]
+        return None
+
+    def add(self, start: date, end: date):
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._intervals.insert(i, (start, end))
+
+
+class LeaveImportService:
+    def parse_csv(self, content: bytes) -> Tuple[List[Optional[LeaveImportRow]], Dict[int, str]]:
+        """
+        Parses an import CSV whose header matches LeaveImportRow fields.
+        Returns the rows (None where a row failed validation) and the per-row parse errors.
+        """
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded CSV")
+
+        rows: List[Optional[LeaveImportRow]] = []
+        errors: Dict[int, str] = {}
+        for i, record in enumerate(csv.DictReader(io.StringIO(text))):
+            values = {k.strip(): v.strip() for k, v in record.items() if k and v and v.strip()}
+            try:
+                rows.append(LeaveImportRow(**values))
+            except ValidationError as e:
+                rows.append(None)
+                errors[i] = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return rows, errors
+
+    def import_applications(
+        self,
+        db: Session,
+        rows: List[Optional[LeaveImportRow]],
+        approver_id: Optional[int] = None,
+        dry_run: bool = False,
+        parse_errors: Optional[Dict[int, str]] = None
+    ) -> LeaveImportReport:
+        """
+        Validates and creates many leave applications in a single transaction.
+
+        Applies the same rules as apply_leave except advance notice and supporting
+        documents, which don't apply to historical or admin-entered records. Overlaps
+        are checked against an in-memory interval index per employee (covering existing
+        applications and earlier rows of the same import), working days come from the
+        shared calendar, and balances are reserved in aggregate per (employee, type, year).
+        Invalid rows are reported and skipped; valid rows are committed once.
+        """
+        if len(rows) > settings.LEAVE_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"A single import is limited to {settings.LEAVE_IMPORT_MAX_ROWS} rows.")
+
+        errors: Dict[int, str] = dict(parse_errors or {})
+        valid = [(i, row) for i, row in enumerate(rows) if row is not None and i not in errors]
+        for _, row in valid:
+            row.to_date = row.to_date or row.from_date
+
+        employee_ids = {row.employee_id for _, row in valid}
+        years = {row.from_date.year for _, row in valid}
+
+        employees = {
+            e.id: e for e in db.query(Employee.id, Employee.gender).filter(Employee.id.in_(employee_ids))
+        } if employee_ids else {}
+        leave_types = {lt.id: lt for lt in leave_repository.get_leave_types(db)}
+
+        # Ensure accruals are up to date (no-op unless snapshots are stale); written in this
+        # transaction, so a dry run rolls them back and a real import commits them with the rows
+        for year in years:
+            accrual_service.refresh_stale(db, employees.keys(), year, commit=False)
+
+        days_requested = dict(zip(
+            (i for i, _ in valid),
+            leave_service.calculate_working_days_bulk(
+                db, [(row.from_date, row.to_date, row.duration_type) for _, row in valid]
+            )
+        ))
+
+        window_start = min((row.from_date for _, row in valid), default=None)
+        window_end = max((row.to_date for _, row in valid), default=None)
+
+        existing = defaultdict(list)
+        balances: Dict[Tuple[int, int, int], LeaveBalance] = {}
+        restricted_dates = set()
+        if employees and window_start:
+            for app in db.query(LeaveApplication.employee_id, LeaveApplication.from_date, LeaveApplication.to_date).filter(
+                LeaveApplication.employee_id.in_(employees.keys()),
+                LeaveApplication.status.in_(IMPORTABLE_STATUSES),
+                LeaveApplication.from_date <= window_end,
+                func.coalesce(LeaveApplication.to_date, LeaveApplication.from_date) >= window_start
+            ):
+                existing[app.employee_id].append((app.from_date, app.to_date or app.from_date))
+
+            for balance in db.query(LeaveBalance).filter(
+                LeaveBalance.employee_id.in_(employees.keys()),
+                LeaveBalance.leave_year.in_(years)
+            ):
+                balances[(balance.employee_id, balance.leave_type_id, balance.leave_year)] = balance
+
+            restricted_dates = {
+                h.holiday_date for h in db.query(PublicHoliday.holiday_date).filter(
+                    PublicHoliday.holiday_date >= window_start,
+                    PublicHoliday.holiday_date <= window_end,
+                    PublicHoliday.is_restricted == True
+                )
+            }
+
+        indexes = {emp_id: _IntervalIndex(existing[emp_id]) for emp_id in employees}
+        reserved: Dict[Tuple[int, int, int], Decimal] = defaultdict(Decimal)
+        accepted: List[Tuple[int, LeaveApplication, Tuple[int, int, int]]] = []
+
+        for i, row in valid:
+            employee = employees.get(row.employee_id)
+            leave_type = leave_types.get(row.leave_type_id)
+            days = days_requested[i]
+            key = (row.employee_id, row.leave_type_id, row.from_date.year)
+
+            if not employee:
+                errors[i] = "Employee not found"
+            elif not leave_type:
+                errors[i] = "Leave type not found"
+            elif row.status not in IMPORTABLE_STATUSES:
+                errors[i] = "Only pending or approved applications can be imported"
+            elif row.to_date < row.from_date:
+                errors[i] = "to_date must not be before from_date"
+            elif days <= 0:
+                errors[i] = "The selected date range contains no working days (weekends or holidays only)."
+            elif leave_type.name == LeaveTypeEnum.restricted_holiday and row.from_date not in restricted_dates:
+                errors[i] = f"The selected date {row.from_date} is not a configured Restricted Holiday."
+            elif leave_type.name == LeaveTypeEnum.restricted_holiday and row.to_date != row.from_date:
+                errors[i] = "Restricted Holidays can only be applied for a single day."
+            elif not is_eligible(employee.gender, leave_type):
+                errors[i] = f"This leave type is only applicable for {leave_type.gender_eligibility} employees."
+            elif leave_type.max_consecutive_days and days > leave_type.max_consecutive_days:
+                errors[i] = f"This leave type allows maximum {leave_type.max_consecutive_days} consecutive days."
+            else:
+                overlap = indexes[row.employee_id].find_overlap(row.from_date, row.to_date)
+                if overlap:
+                    errors[i] = f"Leave application overlaps with an existing application ({overlap[0]} to {overlap[1]})"
+                    continue
+
+                balance = balances.get(key)
+                available = (balance.available if balance else 0) - reserved[key]
+                if not leave_type.negative_balance_allowed and available < days:
+                    errors[i] = f"Insufficient leave balance. Available: {available}"
+                    continue
+
+                reserved[key] += days
+                indexes[row.employee_id].add(row.from_date, row.to_date)
+                app = LeaveApplication(
+                    **row.model_dump(exclude={'number_of_days', 'attachment', 'status'}),
+                    number_of_days=float(days),
+                    status=row.status
+                )
+                if row.status == LeaveApplicationStatus.approved:
+                    app.approver_id = approver_id
+                    app.approved_date = func.now()
+                accepted.append((i, app, key))
+
+        results = {
+            i: LeaveImportRowResult(row=i + 1, success=False, error=error)
+            for i, error in errors.items()
+        }
+
+        if accepted:
+            db.add_all([app for _, app, _ in accepted])
+            db.flush() # Get IDs for the ledger entries
+
+            for i, app, key in accepted:
+                balance = balances.get(key)
+                if not balance:
+                    balance = balances[key] = balance_ledger_service.get_or_create_balance(db, *key)
+                entry_type = LedgerEntryType.taken if app.status == LeaveApplicationStatus.approved else LedgerEntryType.pending
+                balance_ledger_service.post(db, balance, entry_type, days_requested[i], application_id=app.id, note="Imported")
+                results[i] = LeaveImportRowResult(
+                    row=i + 1,
+                    success=True,
+                    application_id=None if dry_run else app.id,
+                    number_of_days=float(days_requested[i])
+                )
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+        return LeaveImportReport(
+            total=len(rows),
+            imported=len(accepted),
+            failed=len(rows) - len(accepted),
+            dry_run=dry_run,
+            results=[results[i] for i in sorted(results)]
+        )
+
+leave_import_service = LeaveImportService()
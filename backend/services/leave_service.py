@@ -1,16 +1,23 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, text
 from typing import List, Optional, Tuple
 from fastapi import HTTPException, status, UploadFile
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from decimal import Decimal
 from repositories.leave_repository import leave_repository
-from models.leave import LeaveApplication, LeaveBalance, LeaveTypeEnum, LeaveApplicationStatus, LeaveType, PublicHoliday, LeaveApprovalLog
+from services.accrual_service import accrual_service
+from services.balance_ledger_service import balance_ledger_service
+from services.working_day_calendar import working_day_calendar
+from services.org_tree_service import org_tree_service
+from models.leave import LeaveApplication, LeaveBalance, LeaveTypeEnum, LeaveApplicationStatus, LeaveType, PublicHoliday, LeaveApprovalLog, LeaveLedgerEntry, LedgerEntryType
 from models.leave_credit import LeaveCreditRequest, LeaveCreditStatus
 from models.employee import Employee
-from schemas.leave import LeaveApplicationCreate
+from schemas.leave import LeaveApplicationCreate, LeaveApplicationResponse, LeaveBalanceResponse
 from schemas.leave_credit import LeaveCreditRequestCreate
 from utils.file_storage import upload_file, delete_file
+from utils.pagination import paginate
+from utils.search import apply_search
 
 class LeaveService:
     def initialize_leave_types(self, db: Session):
@@ -45,77 +52,9 @@ class LeaveService:
         Logic based on spec:
         - Monthly Accrual = (Annual Entitlement / 12)
         - Joining Month: 1-10 (Full), 11-20 (Half), 21+ (None)
+        Delegates to the set-based accrual engine.
         """
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
-        if not employee:
-            return
-
-        leave_types = leave_repository.get_leave_types(db)
-        current_date = date.today()
-        
-        # If querying for a past year, assume full accrual unless joined that year
-        # If querying for current year, accrue up to current month
-        
-        target_month = 12 if year < current_date.year else current_date.month
-        
-        for lt in leave_types:
-            # Gender Eligibility Check
-            if lt.gender_eligibility and lt.gender_eligibility != "All":
-                # Ensure employee gender is present and matches
-                if not employee.gender or employee.gender.lower() != lt.gender_eligibility.lower():
-                     continue
-
-            # Check if balance record exists
-            balance = leave_repository.get_balance(db, employee_id, lt.id, year)
-            if not balance:
-                balance = LeaveBalance(
-                    employee_id=employee_id, 
-                    leave_type_id=lt.id, 
-                    leave_year=year,
-                    available=0,
-                    opening_balance=0,
-                    accrued=0,
-                    taken=0,
-                    pending_approval=0,
-                    carry_forward=0
-                )
-                leave_repository.create_balance(db, balance)
-
-            if lt.accrual_method == 'monthly':
-                monthly_entitlement = Decimal(str(lt.annual_entitlement)) / 12
-                total_accrued = Decimal(0)
-
-                # Iterate months to calculate accrual
-                for month in range(1, target_month + 1):
-                    # Check joining date logic
-                    if employee.date_of_joining:
-                        join_date = employee.date_of_joining
-                        if join_date.year > year:
-                            continue # Not joined yet
-                        if join_date.year == year and join_date.month > month:
-                            continue # Joined after this month
-                        if join_date.year == year and join_date.month == month:
-                            # Joining month logic
-                            if join_date.day <= 10:
-                                total_accrued += monthly_entitlement
-                            elif join_date.day <= 20:
-                                total_accrued += monthly_entitlement / 2
-                            else:
-                                total_accrued += 0
-                            continue
-    
-                    # Standard month
-                    total_accrued += monthly_entitlement
-
-                balance.accrued = total_accrued
-            
-            else:
-                 # For Manual/Annual/Fixed types (Maternity, Paternity, etc.)
-                 if lt.name not in [LeaveTypeEnum.compensatory_off, LeaveTypeEnum.loss_of_pay]:
-                      balance.accrued = Decimal(str(lt.annual_entitlement))
-            
-            balance.available = balance.opening_balance + balance.accrued + balance.carry_forward - balance.taken - balance.pending_approval
-            leave_repository.update_balance(db, balance)
+        accrual_service.refresh(db, [employee_id], year)
 
     def calculate_working_days(self, db: Session, from_date: date, to_date: date, duration_type: str) -> Decimal:
         """Calculates working days excluding weekends and public holidays."""
@@ -125,29 +64,24 @@ class LeaveService:
         if not to_date:
             to_date = from_date
 
-        # Fetch non-restricted holidays in range (Regular holidays)
-        holidays = db.query(PublicHoliday.holiday_date).filter(
-            PublicHoliday.holiday_date >= from_date,
-            PublicHoliday.holiday_date <= to_date,
-            PublicHoliday.is_restricted == False
-        ).all()
-        holiday_dates = {h.holiday_date for h in holidays}
-
-        working_days = 0
-        current_date = from_date
-        while current_date <= to_date:
-            # 5 = Saturday, 6 = Sunday
-            if current_date.weekday() < 5 and current_date not in holiday_dates:
-                working_days += 1
-            current_date += timedelta(days=1)
-        
+        # Non-restricted (regular) holidays and weekends come from the cached per-year index
+        working_days = working_day_calendar.count(db, from_date, to_date)
         return Decimal(str(working_days))
 
+    def calculate_working_days_bulk(self, db: Session, ranges: List[Tuple[date, Optional[date], str]]) -> List[Decimal]:
+        """Same as calculate_working_days for many (from_date, to_date, duration_type) ranges in one call."""
+        full_day_ranges = [(f, t or f) for f, t, duration in ranges if duration != "Half Day"]
+        counts = iter(working_day_calendar.count_many(db, full_day_ranges))
+        return [
+            Decimal("0.5") if duration == "Half Day" else Decimal(str(next(counts)))
+            for _, _, duration in ranges
+        ]
+
     def apply_leave(self, db: Session, application_data: LeaveApplicationCreate, employee_id: int, attachment: Optional[UploadFile] = None):
         # 1. Check Balance
-        # Ensure accruals are up to date
+        # Ensure accruals are up to date (no-op unless the snapshot is stale)
         current_year = application_data.from_date.year
-        self.calculate_pro_rata_accrual(db, employee_id, current_year)
+        accrual_service.refresh_stale(db, [employee_id], current_year)
         
         # Calculate precise days excluding weekends/holidays
         days_requested = self.calculate_working_days(
@@ -232,24 +166,7 @@ class LeaveService:
         if leave_type.max_consecutive_days and days_requested > leave_type.max_consecutive_days:
             raise HTTPException(status_code=400, detail=f"This leave type allows maximum {leave_type.max_consecutive_days} consecutive days.")
 
-        balance = leave_repository.get_balance(db, employee_id, application_data.leave_type_id, current_year)
-        if not balance:
-             # Initialize a zero balance on the fly if it doesn't exist
-             balance = LeaveBalance(
-                employee_id=employee_id,
-                leave_type_id=application_data.leave_type_id,
-                leave_year=current_year,
-                available=0,
-                opening_balance=0,
-                accrued=0,
-                taken=0,
-                pending_approval=0,
-                carry_forward=0
-             )
-             db.add(balance)
-             db.flush() # Get ID
-        
-        leave_type = leave_repository.get_leave_type(db, application_data.leave_type_id)
+        balance = balance_ledger_service.get_or_create_balance(db, employee_id, application_data.leave_type_id, current_year)
         
         if not leave_type.negative_balance_allowed and balance.available < days_requested:
              raise HTTPException(status_code=400, detail=f"Insufficient leave balance. Available: {balance.available}")
@@ -264,17 +181,17 @@ class LeaveService:
         
         # Handle attachment
         if attachment:
-            sub_folder = f"leaves/{employee_id}/{leave_type.name.value}"
-            relative_path = upload_file(attachment, sub_folder)
+            relative_path = upload_file(attachment).path
             app.attachment = relative_path
             
-        leave_repository.create_application(db, app)
+        db.add(app)
+        db.flush() # Get ID for the ledger entry
 
-        # 3. Update Pending Balance
-        balance.pending_approval += days_requested
-        balance.available -= days_requested
-        leave_repository.update_balance(db, balance)
-        
+        # 3. Reserve Pending Balance
+        balance_ledger_service.post(db, balance, LedgerEntryType.pending, days_requested, application_id=app.id)
+
+        db.commit()
+        db.refresh(app)
         return app
 
     def approve_leave(self, db: Session, application_id: int, approver_id: int, role: str = 'manager', comments: str = None):
@@ -318,17 +235,14 @@ class LeaveService:
             return app
         else:
             # Final Approval
-            leave_repository.update_application_status(db, app, LeaveApplicationStatus.approved, approver_id)
-
             # Move from pending to taken
             balance = leave_repository.get_balance(db, app.employee_id, app.leave_type_id, app.from_date.year)
             if balance:
                 days = app.number_of_days
-                balance.pending_approval -= days
-                balance.taken += days
-                balance.available = balance.opening_balance + balance.accrued + balance.carry_forward - balance.taken - balance.pending_approval
-                leave_repository.update_balance(db, balance)
-            
+                balance_ledger_service.post(db, balance, LedgerEntryType.pending, -days, application_id=app.id)
+                balance_ledger_service.post(db, balance, LedgerEntryType.taken, days, application_id=app.id)
+
+            leave_repository.update_application_status(db, app, LeaveApplicationStatus.approved, approver_id)
             return app
 
     def reject_leave(self, db: Session, application_id: int, approver_id: int, comments: str = None):
@@ -349,21 +263,17 @@ class LeaveService:
         )
         db.add(log)
 
-        # Update status
-        leave_repository.update_application_status(db, app, LeaveApplicationStatus.rejected, approver_id)
-
         # Revert pending balance
         balance = leave_repository.get_balance(db, app.employee_id, app.leave_type_id, app.from_date.year)
         if balance:
-            days = app.number_of_days
-            balance.pending_approval -= days
-            balance.available += days # Give it back
-            leave_repository.update_balance(db, balance)
-            
+            balance_ledger_service.post(db, balance, LedgerEntryType.pending, -app.number_of_days, application_id=app.id)
+
+        # Update status
+        leave_repository.update_application_status(db, app, LeaveApplicationStatus.rejected, approver_id)
         return app
     
     def get_team_calendar(self, db: Session, manager_id: int, from_date: date, to_date: date):
-        employee_ids = leave_repository.get_team_employee_ids(db, manager_id)
+        employee_ids = org_tree_service.team_ids(db, manager_id, include_self=True)
         
         # Fetch approved applications in range
         apps = db.query(LeaveApplication).filter(
@@ -389,10 +299,10 @@ class LeaveService:
         # Revert pending balance
         balance = leave_repository.get_balance(db, app.employee_id, app.leave_type_id, app.from_date.year)
         if balance:
-            days_to_revert = Decimal(str(app.number_of_days))
-            balance.pending_approval -= days_to_revert
-            balance.available += days_to_revert
-            leave_repository.update_balance(db, balance)
+            balance_ledger_service.post(
+                db, balance, LedgerEntryType.pending, -Decimal(str(app.number_of_days)),
+                application_id=app.id, note="Cancelled by employee"
+            )
 
         db.delete(app)
         db.commit()
@@ -425,42 +335,28 @@ class LeaveService:
         if new_days <= 0:
              raise HTTPException(status_code=400, detail="The updated date range contains no working days.")
 
-        # 1. Revert old balance reserved
+        old_days = Decimal(str(app.number_of_days))
         old_balance = leave_repository.get_balance(db, app.employee_id, app.leave_type_id, app.from_date.year)
-        if old_balance:
-            old_balance.pending_approval -= Decimal(str(app.number_of_days))
-            old_balance.available += Decimal(str(app.number_of_days))
-            leave_repository.update_balance(db, old_balance)
 
-        # 2. Check and reservation for NEW data
+        # 1. Check balance for NEW data, counting the old reservation as released if it is the same row
         current_year = application_data.from_date.year
-        new_balance = leave_repository.get_balance(db, employee_id, application_data.leave_type_id, current_year)
-        if not new_balance:
-             # Initialize if missing for the new year/type
-             new_balance = LeaveBalance(
-                employee_id=employee_id,
-                leave_type_id=application_data.leave_type_id,
-                leave_year=current_year,
-                available=0
-             )
-             db.add(new_balance)
-             db.flush()
-        
-        if not leave_type.negative_balance_allowed and new_balance.available < new_days:
-             # Revert back to old before failing
-             old_balance.pending_approval += Decimal(str(app.number_of_days))
-             old_balance.available -= Decimal(str(app.number_of_days))
-             leave_repository.update_balance(db, old_balance)
+        new_balance = balance_ledger_service.get_or_create_balance(db, employee_id, application_data.leave_type_id, current_year)
+        available = new_balance.available + (old_days if old_balance is new_balance else 0)
+
+        if not leave_type.negative_balance_allowed and available < new_days:
              raise HTTPException(status_code=400, detail="Insufficient balance for updated request")
 
+        # 2. Revert old balance reserved
+        if old_balance:
+            balance_ledger_service.post(db, old_balance, LedgerEntryType.pending, -old_days, application_id=app.id, note="Released on edit")
+
         # Handle attachment update
         if attachment:
             # Delete old file if exists
             if app.attachment:
                 delete_file(app.attachment)
             
-            sub_folder = f"leaves/{employee_id}/{leave_type.name.value}"
-            relative_path = upload_file(attachment, sub_folder)
+            relative_path = upload_file(attachment).path
             app.attachment = relative_path
         elif clear_attachment:
             # Explicitly remove attachment
@@ -475,81 +371,61 @@ class LeaveService:
         app.number_of_days = float(new_days)
         
         # 4. Reserve new balance
-        new_balance.pending_approval += new_days
-        new_balance.available -= new_days
+        balance_ledger_service.post(db, new_balance, LedgerEntryType.pending, new_days, application_id=app.id)
         
         db.commit()
         db.refresh(app)
         return app
     
     def get_employee_balances(self, db: Session, employee_id: int, year: int):
-        # Refresh accruals first
-        self.calculate_pro_rata_accrual(db, employee_id, year)
-        balances = leave_repository.get_balances(db, employee_id, year)
-        
-        # Filter out ineligible balances (in case they exist from before)
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
-        if employee:
-             filtered_balances = []
-             for b in balances:
-                 if b.leave_type.gender_eligibility == "All":
-                     filtered_balances.append(b)
-                     continue
-                 
-                 if employee.gender and b.leave_type.gender_eligibility.lower() == employee.gender.lower():
-                     filtered_balances.append(b)
-             return filtered_balances
-             
+        # Single lookup of the snapshot; ineligible balances (in case they exist from before) are filtered in SQL
+        balances = leave_repository.get_eligible_balances(db, employee_id, year)
+
+        # Only write when the snapshot is missing or predates this month's accrual
+        target_month = accrual_service.target_month(year)
+        if not balances or any(b.accrual_month != target_month for b in balances):
+            accrual_service.refresh(db, [employee_id], year)
+            balances = leave_repository.get_eligible_balances(db, employee_id, year)
         return balances
 
-    def get_team_balances(self, db: Session, manager_id: int, year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None):
-        employee_ids = leave_repository.get_team_employee_ids(db, manager_id)
-        # Ensure all are refreshed
-        # Optimistically refresh only if searching logic permits or do lazy refresh. 
-        # Ideally we should only refresh for the page we are viewing or refresh all async.
-        # For simplicity, we refresh all team members' balances as it's a team view.
-        # But wait, if employee_ids is huge, this is slow.
-        # Let's assume the roster size isn't massive for a manager.
-        for eid in employee_ids:
-            self.calculate_pro_rata_accrual(db, eid, year)
-        return leave_repository.get_balances_for_employees(db, employee_ids, year, skip=skip, limit=limit, search=search)
-
-    def get_all_balances(self, db: Session, year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None) -> Tuple[List[LeaveBalance], int]:
-        from sqlalchemy import or_
+    def get_team_balances(self, db: Session, manager_id: int, year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None, cursor: Optional[str] = None):
+        employee_ids = org_tree_service.team_ids(db, manager_id, include_self=True)
+        # Refresh stale team members in one bulk upsert
+        accrual_service.refresh_stale(db, employee_ids, year)
+        return leave_repository.get_balances_for_employees(db, employee_ids, year, skip=skip, limit=limit, search=search, cursor=cursor)
+
+    def get_all_balances(self, db: Session, year: int, skip: int = 0, limit: int = 10, search: Optional[str] = None, cursor: Optional[str] = None) -> Tuple[List[LeaveBalance], int]:
+        """Balances of one page of active employees; the page (and cursor) is over employees, ordered by id."""
         query = db.query(Employee).filter(Employee.employment_status == "active")
+        query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, Employee.employee_code)
         
-        if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Employee.first_name.ilike(search_filter),
-                    Employee.last_name.ilike(search_filter),
-                    Employee.employee_code.ilike(search_filter)
-                )
-            )
+        employees, total = paginate(query, (Employee.id,), skip, limit, cursor, descending=False, rank=rank)
         
-        total = query.count()
-        employees = query.offset(skip).limit(limit).all()
-        
-        for e in employees:
-            self.calculate_pro_rata_accrual(db, e.id, year)
-            
         employee_ids = [e.id for e in employees]
-        results = db.query(LeaveBalance).filter(
+        accrual_service.refresh_stale(db, employee_ids, year)
+
+        results = db.query(LeaveBalance).options(
+            joinedload(LeaveBalance.employee), joinedload(LeaveBalance.leave_type)
+        ).filter(
             LeaveBalance.leave_year == year,
             LeaveBalance.employee_id.in_(employee_ids)
-        ).all()
+        ).order_by(LeaveBalance.employee_id, LeaveBalance.leave_type_id).all()
+        # Keep the employee page order (relevance first when searching)
+        position = {emp_id: i for i, emp_id in enumerate(employee_ids)}
+        results.sort(key=lambda b: position[b.employee_id])
         
         return results, total
 
-    def get_team_applications(self, db: Session, manager_id: int, skip: int = 0, limit: int = 10, year: Optional[int] = None, search: Optional[str] = None):
-        employee_ids = leave_repository.get_team_employee_ids(db, manager_id)
+    def get_team_applications(self, db: Session, manager_id: int, skip: int = 0, limit: int = 10, year: Optional[int] = None, search: Optional[str] = None, cursor: Optional[str] = None):
+        employee_ids = org_tree_service.team_ids(db, manager_id, include_self=True)
         if not employee_ids:
             return [], 0
-        return leave_repository.get_applications(db, skip=skip, limit=limit, employee_ids=employee_ids, year=year, search=search)
+        return leave_repository.get_applications(db, skip=skip, limit=limit, employee_ids=employee_ids, year=year, search=search, cursor=cursor)
 
     def create_leave_type(self, db: Session, data: dict):
         lt = LeaveType(**data)
+        # Every employee needs a balance row for the new type
+        accrual_service.invalidate(db)
         return leave_repository.create_leave_type(db, lt)
 
     def update_leave_type(self, db: Session, lt_id: int, data: dict):
@@ -558,6 +434,8 @@ class LeaveService:
             raise HTTPException(status_code=404, detail="Leave type not found")
         for key, value in data.items():
             setattr(lt, key, value)
+        # Entitlement, accrual method or eligibility may have changed
+        accrual_service.invalidate(db, leave_type_id=lt_id)
         return leave_repository.update_leave_type(db, lt)
 
     def delete_leave_type(self, db: Session, lt_id: int):
@@ -565,8 +443,12 @@ class LeaveService:
         if not lt:
             raise HTTPException(status_code=404, detail="Leave type not found")
         
+        # The ledger is append-only: a type that balances have moved under is kept for that history
+        if db.query(LeaveLedgerEntry.id).filter(LeaveLedgerEntry.leave_type_id == lt_id).first():
+            raise HTTPException(status_code=400, detail="Leave type has balance history in the ledger and cannot be deleted")
+
         # Cascade delete dependencies manually to avoid Foreign Key violations
-        # 1. Delete associated balances
+        # 1. Delete associated balances (none has ledger history)
         db.query(LeaveBalance).filter(LeaveBalance.leave_type_id == lt_id).delete(synchronize_session=False)
         
         # 2. Delete associated applications (and logs if any)
@@ -714,32 +596,27 @@ class LeaveService:
         db.refresh(credit_req)
         return credit_req
 
-    def get_my_credit_requests(self, db: Session, employee_id: int, skip: int = 0, limit: int = 10):
+    def get_my_credit_requests(self, db: Session, employee_id: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
         query = db.query(LeaveCreditRequest).filter(LeaveCreditRequest.employee_id == employee_id)
-        total = query.count()
-        reqs = query.order_by(LeaveCreditRequest.created_at.desc()).offset(skip).limit(limit).all()
+        reqs, total = paginate(query, (LeaveCreditRequest.created_at, LeaveCreditRequest.id), skip, limit, cursor)
         for req in reqs:
             req.leave_type_name = req.leave_type.name.value.replace('_', ' ').title() if req.leave_type else None
             req.employee_name = req.employee.full_name if req.employee else None
         return reqs, total
 
-    def get_pending_credit_requests(self, db: Session, manager_id: int, role: str, skip: int = 0, limit: int = 10, search: Optional[str] = None):
+    def get_pending_credit_requests(self, db: Session, manager_id: int, role: str, skip: int = 0, limit: int = 10, search: Optional[str] = None, cursor: Optional[str] = None):
         query = db.query(LeaveCreditRequest).filter(LeaveCreditRequest.status == LeaveCreditStatus.pending)
         if role not in ['hr_admin', 'super_admin']:
-            from repositories.leave_repository import leave_repository
-            team_ids = leave_repository.get_team_employee_ids(db, manager_id)
+            team_ids = org_tree_service.team_ids(db, manager_id, include_self=True)
             query = query.filter(LeaveCreditRequest.employee_id.in_(team_ids))
         
+        rank = None
         if search:
-            from sqlalchemy import or_
-            query = query.join(Employee, LeaveCreditRequest.employee_id == Employee.id).filter(or_(
-                Employee.first_name.ilike(f"%{search}%"),
-                Employee.last_name.ilike(f"%{search}%"),
-                LeaveCreditRequest.reason.ilike(f"%{search}%")
-            ))
+            query = query.join(Employee, LeaveCreditRequest.employee_id == Employee.id)
+            query, rank = apply_search(query, search, Employee.first_name, Employee.last_name, LeaveCreditRequest.reason,
+                                       via={Employee: LeaveCreditRequest.employee_id})
             
-        total = query.count()
-        reqs = query.order_by(LeaveCreditRequest.created_at.desc()).offset(skip).limit(limit).all()
+        reqs, total = paginate(query, (LeaveCreditRequest.created_at, LeaveCreditRequest.id), skip, limit, cursor, rank=rank)
         for req in reqs:
             req.leave_type_name = req.leave_type.name.value.replace('_', ' ').title() if req.leave_type else None
             req.employee_name = req.employee.full_name if req.employee else None
@@ -759,29 +636,12 @@ class LeaveService:
 
         # Update Balance: Credit +1
         current_year = req.date_worked.year
-        balance = leave_repository.get_balance(db, req.employee_id, req.leave_type_id, current_year)
-        
-        if not balance:
-            # Create if missing
-             balance = LeaveBalance(
-                employee_id=req.employee_id,
-                leave_type_id=req.leave_type_id,
-                leave_year=current_year,
-                available=0
-             )
-             db.add(balance)
-             db.flush()
+        balance = balance_ledger_service.get_or_create_balance(db, req.employee_id, req.leave_type_id, current_year)
+
+        # Credits land in 'accrued' since they are earned during the year.
+        # CO is "manual" accrual method, so the accrual engine never overwrites it.
+        balance_ledger_service.post(db, balance, LedgerEntryType.credit, Decimal(1), credit_request_id=req.id)
 
-        # Add to Opening Balance or Create new 'credit_earned' field?
-        # Typically CO acts like accrual or direct addition. Let's add to 'accrued' or 'opening'.
-        # Safest is to add to 'accrued' since it is earned during the year.
-        # However, earlier logic overwrites 'accrued' based on pro-rata.
-        # CO is "manual" accrual method, so calculate_pro_rata_accrual ignores it.
-        
-        balance.accrued += Decimal(1)
-        balance.available += Decimal(1)
-        
-        leave_repository.update_balance(db, balance)
         db.commit()
         db.refresh(req)
         return req
@@ -803,7 +663,8 @@ class LeaveService:
     # --- Holidays ---
     def create_holiday(self, db: Session, data: dict):
         holiday = PublicHoliday(**data)
-        return leave_repository.create_holiday(db, holiday)
+        holiday = leave_repository.create_holiday(db, holiday)
+        return holiday
 
     def update_holiday(self, db: Session, holiday_id: int, data: dict):
         holiday = leave_repository.get_holiday(db, holiday_id)
@@ -814,7 +675,8 @@ class LeaveService:
             if value is not None:
                 setattr(holiday, key, value)
         
-        return leave_repository.update_holiday(db, holiday)
+        holiday = leave_repository.update_holiday(db, holiday)
+        return holiday
 
     def delete_holiday(self, db: Session, holiday_id: int):
         holiday = leave_repository.get_holiday(db, holiday_id)
@@ -846,9 +708,7 @@ class LeaveService:
         # 1. Update Balance: Credit back unused days
         balance = leave_repository.get_balance(db, app.employee_id, app.leave_type_id, app.from_date.year)
         if balance:
-            balance.taken -= unused_days
-            balance.available += unused_days
-            leave_repository.update_balance(db, balance)
+            balance_ledger_service.post(db, balance, LedgerEntryType.recall, unused_days, application_id=app.id, note=reason)
 
         # 2. Update Application
         app.status = LeaveApplicationStatus.recalled
@@ -872,4 +732,44 @@ class LeaveService:
         db.refresh(app)
         return app
 
+    # Async paths
+    # The sync query logic runs on the AsyncSession's connection through run_sync, so the
+    # event loop is never blocked on a threadpool slot. Results are converted to response
+    # schemas inside run_sync so nothing lazy-loads after it returns.
+    async def _run_async(self, db: AsyncSession, schema, fn, *args, **kwargs):
+        def run(session: Session):
+            result = fn(session, *args, **kwargs)
+            if isinstance(result, tuple):
+                items, total = result
+                return [schema.model_validate(i) for i in items], total
+            return [schema.model_validate(i) for i in result]
+        return await db.run_sync(run)
+
+    async def get_employee_balances_async(self, db: AsyncSession, employee_id: int, year: int) -> List[LeaveBalanceResponse]:
+        return await self._run_async(db, LeaveBalanceResponse, self.get_employee_balances, employee_id, year)
+
+    async def get_team_balances_async(self, db: AsyncSession, manager_id: int, year: int, **filters) -> Tuple[List[LeaveBalanceResponse], int]:
+        return await self._run_async(db, LeaveBalanceResponse, self.get_team_balances, manager_id, year, **filters)
+
+    async def get_all_balances_async(self, db: AsyncSession, year: int, **filters) -> Tuple[List[LeaveBalanceResponse], int]:
+        return await self._run_async(db, LeaveBalanceResponse, self.get_all_balances, year, **filters)
+
+    async def get_applications_async(self, db: AsyncSession, **filters) -> Tuple[List[LeaveApplicationResponse], int]:
+        return await self._run_async(db, LeaveApplicationResponse, leave_repository.get_applications, **filters)
+
+    async def get_team_applications_async(self, db: AsyncSession, manager_id: int, **filters) -> Tuple[List[LeaveApplicationResponse], int]:
+        return await self._run_async(db, LeaveApplicationResponse, self.get_team_applications, manager_id, **filters)
+
+    async def get_pending_approvals_async(self, db: AsyncSession, approver_id: int, **filters) -> Tuple[List[LeaveApplicationResponse], int]:
+        return await self._run_async(db, LeaveApplicationResponse, leave_repository.get_pending_applications_for_approver, approver_id, **filters)
+
+    async def get_team_calendar_async(self, db: AsyncSession, manager_id: int, from_date: date, to_date: date) -> List[LeaveApplicationResponse]:
+        return await self._run_async(db, LeaveApplicationResponse, self.get_team_calendar, manager_id, from_date, to_date)
+
+    async def get_leave_stats_async(self, db: AsyncSession, year: int):
+        return await db.run_sync(self.get_leave_stats, year)
+
+    async def get_leave_analytics_async(self, db: AsyncSession, year: int):
+        return await db.run_sync(self.get_leave_analytics, year)
+
 leave_service = LeaveService()
@@ -1,11 +1,12 @@
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, UploadFile
 
 from pathlib import Path
-from models.candidate import Candidate, CandidateStatus, CandidateOnboardingTask, OnboardingChecklistItem
+from models.candidate import Candidate, CandidateStatus, CandidateOnboardingTask, OnboardingChecklistItem, OfferBatch, OfferBatchItem
+from models.email_outbox import EmailOutbox, EmailStatus
 from models.employee import Employee
 from models.user import User, UserRole
 from schemas.onboarding import CandidateCreate, CandidateUpdate
@@ -15,7 +16,7 @@ from services.email_service import email_service
 from schemas.employee import EmployeeCreate
 from core.config import settings
 from utils.audit import log_action
-from utils.file_storage import upload_file, get_file_path
+from utils.file_storage import upload_file
 
 class OnboardingService:
     
@@ -29,13 +30,12 @@ class OnboardingService:
         candidate = Candidate(**data.model_dump())
         candidate.status = CandidateStatus.created
         db.add(candidate)
-        db.commit()
-        db.refresh(candidate)
-        
-        # Initialize default checklist
-        self._initialize_checklist(db, candidate.id)
+        db.flush() # Get ID
         
+        # Candidate, audit entry and default checklist are committed together
         log_action(db, created_by_id, "CREATE", "Candidate", candidate.id, {"name": candidate.full_name})
+        self._initialize_checklist(db, candidate.id)
+        db.refresh(candidate)
         return candidate
 
     def _initialize_checklist(self, db: Session, candidate_id: int):
@@ -68,49 +68,32 @@ class OnboardingService:
             db.add(task)
         db.commit()
 
-    def generate_offer_link(self, db: Session, candidate_id: int, expiry_days: int, user_id: int, hr_name: str, hr_email: str, offer_file: Optional[UploadFile] = None) -> str:
-        candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
-        if not candidate:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-        
+    def _issue_offer(self, candidate: Candidate, expiry_days: int, offer_document: Optional[str] = None) -> str:
+        """Gives the candidate a fresh offer token (and the offer letter's storage key, if any)."""
         token = secrets.token_urlsafe(32)
         candidate.offer_token = token
         candidate.offer_token_expiry = datetime.now(timezone.utc) + timedelta(days=expiry_days)
         candidate.status = CandidateStatus.sent
-        
-        attachments = []
 
-        # Handle Offer File Upload
-        if offer_file:
-            # Save properly
-            sub_folder = f"candidates/{candidate.id}/offer"
-            relative_path = upload_file(offer_file, sub_folder)
-            
-            # Store metadata
-            if not candidate.salary_structure:
-                candidate.salary_structure = {}
-            if isinstance(candidate.salary_structure, dict):
-                 candidate.salary_structure["offer_document"] = relative_path
-            
-            # Add to attachments
-            try:
-                abs_path = get_file_path(relative_path)
-                attachments.append(abs_path)
-            except Exception as e:
-                print(f"Error resolving attachment path: {e}")
-        
-        db.commit()
-        
-        # Fetch Dynamic Details for Email
-        from models.settings import CompanySettings, EmploymentType
+        if offer_document:
+            # Store metadata (reassigned: the JSON column doesn't track in-place changes)
+            structure = candidate.salary_structure if isinstance(candidate.salary_structure, dict) else {}
+            candidate.salary_structure = {**structure, "offer_document": offer_document}
+        return token
+
+    def _offer_context(self, db: Session, designation_ids) -> Tuple[str, Dict[int, str]]:
+        """Company name and designation names for offer emails, looked up once per dispatch."""
+        from models.settings import CompanySettings
         from models.master_data import Designation
-        
+
         company_settings = db.query(CompanySettings).first()
         company_name = company_settings.company_name if company_settings else "LeadTap Digi Solutions"
-        
-        designation = db.query(Designation).filter(Designation.id == candidate.designation_id).first()
-        position_name = designation.name if designation else "Employee"
 
+        ids = [i for i in designation_ids if i is not None]
+        positions = dict(db.query(Designation.id, Designation.name).filter(Designation.id.in_(ids))) if ids else {}
+        return company_name, positions
+
+    def _offer_email(self, candidate: Candidate, token: str, company_name: str, position_name: str, hr_name: str, hr_email: str) -> Tuple[str, str]:
         # Offer Expiry Date String
         expiry_date_str = candidate.offer_token_expiry.strftime("%d %b %Y")
         
@@ -149,13 +132,111 @@ Best regards,
 Human Resources
 {company_name}
         """
-        
-        # Send Email (with attachments if any)
-        email_service.send_email(candidate.personal_email, email_subject, email_body, attachments=attachments)
+        return email_subject, email_body
+
+    def generate_offer_link(self, db: Session, candidate_id: int, expiry_days: int, user_id: int, hr_name: str, hr_email: str, offer_file: Optional[UploadFile] = None) -> str:
+        candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+        if not candidate:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        # Handle Offer File Upload
+        relative_path = upload_file(offer_file).path if offer_file else None
+        token = self._issue_offer(candidate, expiry_days, relative_path)
+
+        company_name, positions = self._offer_context(db, [candidate.designation_id])
+        email_subject, email_body = self._offer_email(
+            candidate, token, company_name, positions.get(candidate.designation_id, "Employee"), hr_name, hr_email
+        )
+
+        # Queue Email (with the offer letter attached, by storage key); committed together with the audit entry
+        email_service.enqueue(db, candidate.personal_email, email_subject, email_body, attachments=[relative_path] if relative_path else None)
 
         log_action(db, user_id, "SEND_OFFER", "Candidate", candidate.id, {"expiry_days": expiry_days, "hr_name": hr_name})
+        db.commit()
         return token
 
+    def send_bulk_offers(self, db: Session, candidate_ids: List[int], expiry_days: int, user_id: int, hr_name: str, hr_email: str, offer_files: Optional[List[UploadFile]] = None) -> OfferBatch:
+        """
+        Issues offers to many candidates in one transaction and queues their emails for the outbox
+        worker. `offer_files` is either one letter shared by everyone or one per candidate, in
+        `candidate_ids` order.
+        """
+        offer_files = offer_files or []
+        if not candidate_ids:
+            raise HTTPException(status_code=400, detail="No candidates given")
+        if len(set(candidate_ids)) != len(candidate_ids):
+            raise HTTPException(status_code=400, detail="Duplicate candidate IDs")
+        if len(candidate_ids) > settings.OFFER_BATCH_MAX_CANDIDATES:
+            raise HTTPException(status_code=400, detail=f"A single dispatch is limited to {settings.OFFER_BATCH_MAX_CANDIDATES} candidates.")
+        if len(offer_files) not in (0, 1, len(candidate_ids)):
+            raise HTTPException(status_code=400, detail="Send one shared offer letter or one per candidate, in candidate order")
+
+        candidates = {c.id: c for c in db.query(Candidate).filter(Candidate.id.in_(candidate_ids))}
+        missing = [i for i in candidate_ids if i not in candidates]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Candidates not found: {', '.join(map(str, missing))}")
+
+        # A shared letter is stored once; per-candidate letters with the same content dedupe in the blob store
+        paths = [upload_file(f).path for f in offer_files]
+        if len(paths) == 1:
+            paths *= len(candidate_ids)
+
+        company_name, positions = self._offer_context(db, {c.designation_id for c in candidates.values()})
+
+        batch = OfferBatch(created_by_id=user_id, expiry_days=expiry_days, total=len(candidate_ids))
+        db.add(batch)
+        db.flush()
+        for i, candidate_id in enumerate(candidate_ids):
+            candidate = candidates[candidate_id]
+            path = paths[i] if paths else None
+            token = self._issue_offer(candidate, expiry_days, path)
+            email_subject, email_body = self._offer_email(
+                candidate, token, company_name, positions.get(candidate.designation_id, "Employee"), hr_name, hr_email
+            )
+            email = email_service.enqueue(db, candidate.personal_email, email_subject, email_body, attachments=[path] if path else None)
+            batch.items.append(OfferBatchItem(candidate_id=candidate_id, email=email))
+            log_action(db, user_id, "SEND_OFFER", "Candidate", candidate_id, {"expiry_days": expiry_days, "hr_name": hr_name, "batch_id": batch.id})
+        db.commit()
+        return batch
+
+    def get_offer_batch(self, db: Session, batch_id: int) -> dict:
+        """Delivery progress of a bulk dispatch: counts per email status plus each candidate's state."""
+        batch = db.query(OfferBatch).filter(OfferBatch.id == batch_id).first()
+        if not batch:
+            raise HTTPException(status_code=404, detail="Offer batch not found")
+
+        rows = (
+            db.query(OfferBatchItem.candidate_id, Candidate.full_name, Candidate.personal_email,
+                     EmailOutbox.status, EmailOutbox.attempts, EmailOutbox.last_error, EmailOutbox.sent_at)
+            .join(Candidate, Candidate.id == OfferBatchItem.candidate_id)
+            .outerjoin(EmailOutbox, EmailOutbox.id == OfferBatchItem.email_id)
+            .filter(OfferBatchItem.batch_id == batch_id)
+            .order_by(OfferBatchItem.id)
+            .all()
+        )
+        counts = {s.value: 0 for s in EmailStatus}
+        items = []
+        for row in rows:
+            if row.status is not None:
+                counts[row.status.value] += 1
+            items.append({
+                "candidate_id": row.candidate_id,
+                "full_name": row.full_name,
+                "email": row.personal_email,
+                "status": row.status,
+                "attempts": row.attempts or 0,
+                "last_error": row.last_error,
+                "sent_at": row.sent_at,
+            })
+        return {
+            "id": batch.id,
+            "total": batch.total,
+            "created_at": batch.created_at,
+            "counts": counts,
+            "completed": counts[EmailStatus.pending.value] == 0,
+            "items": items,
+        }
+
 
 
     def get_candidate_by_token(self, db: Session, token: str) -> Candidate:
@@ -180,48 +261,44 @@ Human Resources
         
         if offer_task:
             offer_task.status = "completed"
-            
-        db.commit()
 
         # Notify HR and Creator
         recipients = {settings.SMTP_FROM_EMAIL} # Default HR/Admin email
 
         # Find Creator via Audit Log
-        from models.audit import AuditLog
         from models.user import User
-        
-        creator_log = db.query(AuditLog).filter(
-            AuditLog.entity_type == "Candidate",
-            AuditLog.entity_id == candidate.id,
-            AuditLog.action == "CREATE"
-        ).first()
-        
-        if creator_log:
-            creator_user = db.query(User).filter(User.id == creator_log.user_id).first()
+        from services.audit_service import audit_service
+
+        creator_id = audit_service.first_actor(db, "Candidate", candidate.id, "CREATE")
+        if creator_id:
+            creator_user = db.query(User).filter(User.id == creator_id).first()
             if creator_user and creator_user.email:
                 recipients.add(creator_user.email)
 
         for email in recipients:
-            email_service.send_email(
+            email_service.enqueue(
+                db,
                 email,
                 f"Offer Accepted: {candidate.full_name}",
                 f"Candidate {candidate.full_name} has accepted the offer. Onboarding checklist is now active."
             )
 
+        db.commit()
         return candidate
 
     def reject_offer(self, db: Session, token: str, reason: str) -> Candidate:
         candidate = self.get_candidate_by_token(db, token)
         candidate.status = CandidateStatus.rejected
         candidate.notes = (candidate.notes or "") + f"\n[Offer Rejected]: {reason}"
-        db.commit()
-        
+
         # Notify HR
-        email_service.send_email(
+        email_service.enqueue(
+            db,
             settings.SMTP_FROM_EMAIL,
             f"Offer Rejected: {candidate.full_name}",
             f"Candidate {candidate.full_name} has rejected the offer.\nReason: {reason}"
         )
+        db.commit()
 
         return candidate
 
@@ -264,8 +341,7 @@ Human Resources
         # Allowed extensions should ideally be checked here or in API
         
         # Save file
-        sub_folder = f"candidates/{candidate.id}"
-        relative_path = upload_file(file, sub_folder)
+        relative_path = upload_file(file).path
 
         # Update task
         task = db.query(CandidateOnboardingTask).filter(
@@ -328,8 +404,6 @@ Human Resources
             # Better to fail to ensure data consistency or at least log heavily.
             print(f"Error initializing leaves: {e}")
 
-        log_action(db, admin_user_id, "CONVERT_CANDIDATE", "Employee", employee.id, {"candidate_id": candidate_id})
-
         # Send Welcome Email
         email_body = f"""
         Welcome to the team, {employee.first_name}!
@@ -341,7 +415,10 @@ Human Resources
         
         Please login at {settings.API_V1_STR.replace('/api', '')} and change your password immediately.
         """
-        email_service.send_email(candidate.personal_email, "Welcome to LeadTap!", email_body)
+        email_service.enqueue(db, candidate.personal_email, "Welcome to LeadTap!", email_body)
+
+        log_action(db, admin_user_id, "CONVERT_CANDIDATE", "Employee", employee.id, {"candidate_id": candidate_id})
+        db.commit()
         
         return employee
 
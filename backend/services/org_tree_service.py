@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.employee import Employee
+
+# Marks an employee removed in the pending-change map (None already means "no manager")
+_REMOVED = object()
+
+
+class OrgTreeService:
+    """
+    In-memory reporting hierarchy: for every employee the depth of each of their managers
+    (ancestors) and for every manager the depth of each report (descendants), depth 1 being
+    a direct report. Both membership checks are dictionary lookups.
+
+    Loaded from employees.manager_id on first use and rebuilt after ORG_TREE_TTL_SECONDS, so
+    other worker processes converge; committed Employee changes in this process move the
+    affected subtree immediately. No lock is held while reading the database (async routes
+    reach this on the event-loop thread through run_sync): while an expired tree is reloaded
+    other callers keep using it, and when there is none (first use, invalidate) each caller
+    reads a snapshot itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manager: Dict[int, Optional[int]] = {}
+        self._ancestors: Dict[int, Dict[int, int]] = {}
+        self._descendants: Dict[int, Dict[int, int]] = {}
+        self._expires_at = 0.0
+        self._loaded = False
+        self._reloading = 0 # Callers currently reading a snapshot
+        self._generation = 0 # Bumped by every change, so a reload that overlapped one is not trusted
+
+    def _ensure_loaded(self, db: Session):
+        if self._expires_at > time.monotonic():
+            return
+        with self._lock:
+            if self._loaded and self._reloading:
+                return # Another caller is refreshing the expired tree; use it meanwhile
+            self._reloading += 1
+            generation = self._generation
+        try:
+            managers = dict(db.query(Employee.id, Employee.manager_id).all())
+        finally:
+            with self._lock:
+                self._reloading -= 1
+        ancestors, descendants = self._build(managers)
+        with self._lock:
+            if self._expires_at > time.monotonic():
+                return # A concurrent caller installed a fresh tree first
+            self._manager, self._ancestors, self._descendants = managers, ancestors, descendants
+            # Changes applied while we read may be missing from this snapshot; use it once, then reload
+            fresh = generation == self._generation
+            self._loaded = self._loaded or fresh
+            self._expires_at = time.monotonic() + max(settings.ORG_TREE_TTL_SECONDS, 0) if fresh else 0.0
+
+    def _build(self, managers: Dict[int, Optional[int]]):
+        ancestors: Dict[int, Dict[int, int]] = {}
+        descendants: Dict[int, Dict[int, int]] = {}
+        for emp_id in managers:
+            chain: Dict[int, int] = {}
+            manager_id, depth = managers[emp_id], 1
+            # Stops at the top of the tree, or at a reporting cycle in bad data
+            while manager_id is not None and manager_id != emp_id and manager_id not in chain:
+                chain[manager_id] = depth
+                descendants.setdefault(manager_id, {})[emp_id] = depth
+                manager_id, depth = managers.get(manager_id), depth + 1
+            ancestors[emp_id] = chain
+        return ancestors, descendants
+
+    def team_ids(self, db: Session, manager_id: int, depth: Optional[int] = None, include_self: bool = False) -> List[int]:
+        """Employees reporting to `manager_id`, directly (depth=1) or up to `depth` levels down (all levels when None)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            reports = self._descendants.get(manager_id, {})
+            ids = [emp_id for emp_id, d in reports.items() if depth is None or d <= depth]
+        return [manager_id] + ids if include_self else ids
+
+    def is_in_team(self, db: Session, manager_id: int, employee_id: int, depth: Optional[int] = None) -> bool:
+        """Whether `employee_id` reports to `manager_id` within `depth` levels (any level when None)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            d = self._ancestors.get(employee_id, {}).get(manager_id)
+        return d is not None and (depth is None or d <= depth)
+
+    def apply_changes(self, changes: Dict[int, object]):
+        """Moves each changed employee (and their reports) under the new manager; drops removed ones."""
+        with self._lock:
+            self._generation += 1
+            if not self._expires_at:
+                return # Not loaded yet; the first lookup reads the committed state
+            for emp_id, manager_id in changes.items():
+                if manager_id is _REMOVED:
+                    self._move(emp_id, None)
+                    self._manager.pop(emp_id, None)
+                    self._ancestors.pop(emp_id, None)
+                    self._descendants.pop(emp_id, None)
+                elif not self._move(emp_id, manager_id):
+                    # Reporting cycle; rebuild from the database before the next lookup
+                    self._expires_at = 0.0
+                    self._loaded = False
+                    return
+
+    def _move(self, emp_id: int, manager_id: Optional[int]) -> bool:
+        subtree = {emp_id: 0, **self._descendants.get(emp_id, {})}
+        new_ancestors: Dict[int, int] = {}
+        if manager_id is not None:
+            new_ancestors = {manager_id: 1, **{a: d + 1 for a, d in self._ancestors.get(manager_id, {}).items()}}
+            if any(a in subtree for a in new_ancestors):
+                return False
+
+        for ancestor in list(self._ancestors.get(emp_id, {})):
+            reports = self._descendants.get(ancestor, {})
+            for member in subtree:
+                reports.pop(member, None)
+                self._ancestors[member].pop(ancestor, None)
+        for ancestor, depth in new_ancestors.items():
+            reports = self._descendants.setdefault(ancestor, {})
+            for member, offset in subtree.items():
+                reports[member] = depth + offset
+                self._ancestors.setdefault(member, {})[ancestor] = depth + offset
+        self._ancestors.setdefault(emp_id, {})
+        self._manager[emp_id] = manager_id
+        return True
+
+    def invalidate(self):
+        """Drops the tree; the next lookups rebuild it instead of using the old one."""
+        with self._lock:
+            self._generation += 1
+            self._expires_at = 0.0
+            self._loaded = False
+
+org_tree_service = OrgTreeService()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_org_changes(session, flush_context):
+    changes = session.info.setdefault("org_changes", {})
+    for obj in session.new:
+        if isinstance(obj, Employee):
+            changes[obj.id] = obj.manager_id
+    for obj in session.dirty:
+        if isinstance(obj, Employee) and inspect(obj).attrs.manager_id.history.has_changes():
+            changes[obj.id] = obj.manager_id
+    for obj in session.deleted:
+        if isinstance(obj, Employee):
+            changes[obj.id] = _REMOVED
+    if not changes:
+        session.info.pop("org_changes")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_org_changes(session):
+    changes = session.info.pop("org_changes", None)
+    if changes:
+        org_tree_service.apply_changes(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_org_changes(session, previous_transaction):
+    session.info.pop("org_changes", None)
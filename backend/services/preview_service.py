@@ -0,0 +1,154 @@
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional
+from core.config import settings
+from utils.file_storage import BLOB_FOLDER, is_blob
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each derived image
+PREVIEW_SIZES = {"thumb": 256, "preview": 1280}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def preview_key(key: str, variant: str) -> str:
+    """Derived images sit next to their blob: blobs/ab/<sha256>.<variant>.jpg"""
+    path = Path(key)
+    return str(path.with_name(f"{path.stem}.{variant}.jpg"))
+
+
+def is_previewable(key: Optional[str]) -> bool:
+    return is_blob(key) and Path(key).suffix.lower() in IMAGE_EXTENSIONS | PDF_EXTENSIONS
+
+
+def _render(data: bytes, suffix: str, max_edge: int):
+    from PIL import Image, ImageOps
+
+    if suffix in PDF_EXTENSIONS:
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(data)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            image = page.render(scale=max_edge / max(width, height)).to_pil()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(io.BytesIO(data))
+        image.draft("RGB", (max_edge, max_edge)) # JPEG scans decode straight at reduced scale
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail((max_edge, max_edge))
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        flattened = Image.new("RGB", image.size, "white")
+        flattened.paste(image, mask=image.getchannel("A"))
+        return flattened
+    return image.convert("RGB")
+
+
+def generate_previews(key: str) -> List[str]:
+    """
+    Renders the missing PREVIEW_SIZES variants of an uploaded image or PDF (first page) and
+    stores them next to it; returns their keys. Runs in a preview worker process.
+    """
+    storage = get_storage()
+    missing = {variant: preview_key(key, variant) for variant in PREVIEW_SIZES}
+    missing = {variant: target for variant, target in missing.items() if not storage.exists(target)}
+    if not missing:
+        return []
+
+    # Render once at the largest size; smaller variants are scaled down from it
+    source = _render(storage.get(key), Path(key).suffix.lower(), max(PREVIEW_SIZES[v] for v in missing))
+    scratch = Path(settings.UPLOAD_ROOT) / BLOB_FOLDER
+    scratch.mkdir(parents=True, exist_ok=True)
+    for variant, target in missing.items():
+        image = source.copy()
+        image.thumbnail((PREVIEW_SIZES[variant], PREVIEW_SIZES[variant]))
+        fd, temp_path = tempfile.mkstemp(dir=scratch, prefix=".preview-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, "JPEG", quality=80, optimize=True, progressive=True)
+            storage.put(target, temp_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+    return list(missing.values())
+
+
+class PreviewService:
+    """
+    Thumbnails and first-page previews for uploaded images and PDFs, rendered in a pool of
+    PREVIEW_WORKERS processes (decoding and PDF rendering are CPU-bound, and pdfium isn't
+    thread-safe). Uploads schedule them; readers wait for a pending render when they get there first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: the API process holds threads and open connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.PREVIEW_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def schedule(self, key: Optional[str]) -> Optional[Future]:
+        """Queues preview rendering for `key` (no-op for files without previews); returns the pending job."""
+        if not is_previewable(key):
+            return None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            try:
+                future = self._pool().submit(generate_previews, key)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed on a pathological file); start a fresh pool
+                self._executor = None
+                future = self._pool().submit(generate_previews, key)
+            self._pending[key] = future
+        # Outside the lock: the callback runs right here if the job is already done
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def _finished(self, key: str, future: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception():
+            logger.error(f"Preview generation failed for {key}: {future.exception()}")
+
+    def ensure(self, key: Optional[str], variant: str) -> Optional[str]:
+        """The preview's key once it exists, rendering it now if needed; None if there can't be one."""
+        if not is_previewable(key) or variant not in PREVIEW_SIZES:
+            return None
+        target = preview_key(key, variant)
+        if get_storage().exists(target):
+            return target
+        try:
+            self.schedule(key).result(timeout=settings.PREVIEW_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.error(f"Preview for {key} unavailable: {e}")
+            return None
+        return target
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+preview_service = PreviewService()
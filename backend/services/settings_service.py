@@ -8,7 +8,7 @@ from schemas.settings import (
     CompanySettingsUpdate, DepartmentCreate, DesignationCreate, 
     EmploymentTypeCreate
 )
-from utils.audit import log_action
+from utils.audit import diff_changes, log_action
 
 class SettingsService:
     # --- Company Settings (Singleton) ---
@@ -24,30 +24,27 @@ class SettingsService:
 
     def update_company_settings(self, db: Session, obj_in: CompanySettingsUpdate, user_id: int, ip_address: str) -> CompanySettings:
         settings = self.get_company_settings(db)
-        old_data = {c.name: str(getattr(settings, c.name)) for c in settings.__table__.columns}
         
         update_data = obj_in.model_dump(exclude_unset=True)
+        changes = diff_changes(settings, update_data)
         for field, value in update_data.items():
             setattr(settings, field, value)
         
         db.add(settings)
+        if changes:
+            log_action(db, user_id, "UPDATE", "CompanySettings", settings.id, details={"changes": changes}, ip_address=ip_address)
         db.commit()
         db.refresh(settings)
-        
-        log_action(
-            db, user_id, "UPDATE", "CompanySettings", settings.id,
-            details={"old": old_data, "new": {k: str(v) for k, v in update_data.items()}},
-            ip_address=ip_address
-        )
         return settings
 
     # --- Generic Master Data CRUD ---
     def _create_master(self, db: Session, model: Any, obj_in: Any, user_id: int, ip_address: str):
         db_obj = model(**obj_in.model_dump())
         db.add(db_obj)
+        db.flush()
+        log_action(db, user_id, "CREATE", model.__name__, db_obj.id, details=obj_in.model_dump(mode="json"), ip_address=ip_address)
         db.commit()
         db.refresh(db_obj)
-        log_action(db, user_id, "CREATE", model.__name__, db_obj.id, details=obj_in.model_dump(), ip_address=ip_address)
         return db_obj
 
     def _get_masters(self, db: Session, model: Any, skip: int = 0, limit: int = 10, search: Optional[str] = None):
@@ -65,8 +62,8 @@ class SettingsService:
         if not db_obj:
             raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
         db.delete(db_obj)
-        db.commit()
         log_action(db, user_id, "DELETE", model.__name__, obj_id, ip_address=ip_address)
+        db.commit()
         return True
 
     # Master wrappers
@@ -0,0 +1,136 @@
+import calendar
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, timedelta
+from models.leave import PublicHoliday
+from core.config import settings
+
+# 5 = Saturday, 6 = Sunday
+WEEKEND_DAYS = {5, 6}
+
+
+class WorkingDayCalendar:
+    """
+    In-process index of working days per year.
+
+    For each year we keep prefix[i] = number of working days in the first i days of
+    the year, built from non-restricted PublicHoliday rows and the weekend rule, so
+    any range count is a prefix-sum subtraction. Entries are dropped when a transaction
+    touching holidays commits or rolls back (an index built inside it may hold its
+    uncommitted holidays) and expire after WORKING_DAY_CACHE_TTL_SECONDS so that other worker
+    processes pick up holiday edits too.
+    """
+
+    def __init__(self):
+        self._years: Dict[int, Tuple[float, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, db: Session, years: List[int]) -> Dict[int, List[int]]:
+        holidays = {
+            h.holiday_date for h in db.query(PublicHoliday.holiday_date).filter(
+                PublicHoliday.holiday_date >= date(min(years), 1, 1),
+                PublicHoliday.holiday_date <= date(max(years), 12, 31),
+                PublicHoliday.is_restricted == False
+            ).all()
+        }
+
+        built = {}
+        for year in years:
+            start = date(year, 1, 1)
+            days_in_year = 366 if calendar.isleap(year) else 365
+            prefix = [0] * (days_in_year + 1)
+            for i in range(days_in_year):
+                day = start + timedelta(days=i)
+                is_working = day.weekday() not in WEEKEND_DAYS and day not in holidays
+                prefix[i + 1] = prefix[i] + (1 if is_working else 0)
+            built[year] = prefix
+        return built
+
+    def _load(self, db: Session, years: Iterable[int]) -> Dict[int, List[int]]:
+        now = time.monotonic()
+        ttl = settings.WORKING_DAY_CACHE_TTL_SECONDS
+        loaded, missing = {}, []
+        with self._lock:
+            for year in set(years):
+                entry = self._years.get(year)
+                if entry and now - entry[0] < ttl:
+                    loaded[year] = entry[1]
+                else:
+                    missing.append(year)
+
+        if missing:
+            built = self._build(db, missing)
+            with self._lock:
+                for year, prefix in built.items():
+                    self._years[year] = (now, prefix)
+            loaded.update(built)
+        return loaded
+
+    def _count(self, index: Dict[int, List[int]], from_date: date, to_date: date) -> int:
+        if to_date < from_date:
+            return 0
+        total = 0
+        for year in range(from_date.year, to_date.year + 1):
+            prefix = index[year]
+            start = from_date if year == from_date.year else date(year, 1, 1)
+            end = to_date if year == to_date.year else date(year, 12, 31)
+            total += prefix[end.timetuple().tm_yday] - prefix[start.timetuple().tm_yday - 1]
+        return total
+
+    def _years_spanned(self, ranges: Iterable[Tuple[date, date]]) -> set:
+        years = set()
+        for from_date, to_date in ranges:
+            if to_date >= from_date:
+                years.update(range(from_date.year, to_date.year + 1))
+        return years
+
+    def count(self, db: Session, from_date: date, to_date: date) -> int:
+        """Working days in [from_date, to_date], both inclusive."""
+        index = self._load(db, self._years_spanned([(from_date, to_date)]))
+        return self._count(index, from_date, to_date)
+
+    def count_many(self, db: Session, ranges: List[Tuple[date, date]]) -> List[int]:
+        """Working days for many inclusive ranges; every year involved is loaded at most once."""
+        index = self._load(db, self._years_spanned(ranges))
+        return [self._count(index, from_date, to_date) for from_date, to_date in ranges]
+
+    def invalidate(self, *years: Optional[int]):
+        """Drops the given years (or everything, when called without arguments)."""
+        with self._lock:
+            if not years:
+                self._years.clear()
+                return
+            for year in years:
+                self._years.pop(year, None)
+
+working_day_calendar = WorkingDayCalendar()
+
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_holiday_years(session, flush_context):
+    years = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, PublicHoliday):
+            # Old and new date, so a holiday moved across years clears both
+            history = inspect(obj).attrs.holiday_date.history
+            years.update(d.year for d in (*history.added, *history.unchanged, *history.deleted) if d)
+    if years:
+        session.info.setdefault("holiday_years", set()).update(years)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_holiday_years(session):
+    years = session.info.pop("holiday_years", None)
+    if years:
+        working_day_calendar.invalidate(*years)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_rolled_back_years(session, previous_transaction):
+    years = session.info.pop("holiday_years", None)
+    if years:
+        working_day_calendar.invalidate(*years)
@@ -1,18 +1,23 @@
 import pytest
+import pytest_asyncio
 import os
 import sys
+from contextlib import contextmanager
 from typing import AsyncGenerator, Generator
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from main import app
-from core.database import Base, get_db
+from core.database import Base, async_engine, get_async_db, get_db
 from core.config import settings
+from services.org_tree_service import org_tree_service
+from services.working_day_calendar import working_day_calendar
 
 # Use a test database or an in-memory SQLite for speed/isolation if possible, 
 # but for this audit we might want to test against a real DB structure.
@@ -29,11 +34,12 @@ def db_engine():
 def db_session(db_engine) -> Generator[Session, None, None]:
     """
     Creates a new database session for a test.
-    Rolls back the transaction after the test is complete.
+    Rolls back the transaction after the test is complete. The session's own commits and
+    rollbacks only release or roll back savepoints, so nothing a test does outlives it.
     """
     connection = db_engine.connect()
     transaction = connection.begin()
-    session = sessionmaker(bind=connection)()
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
 
     yield session
 
@@ -41,19 +47,113 @@ def db_session(db_engine) -> Generator[Session, None, None]:
     transaction.rollback()
     connection.close()
 
+def _async_test_session(connection) -> AsyncSession:
+    return AsyncSession(bind=connection, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False)
+
+async def _begin_async():
+    connection = await async_engine.connect()
+    return connection, await connection.begin()
+
+async def _end_async(connection, transaction):
+    await transaction.rollback()
+    await connection.close()
+    # Pooled asyncpg connections are bound to the event loop that opened them
+    await async_engine.dispose()
+
+@pytest_asyncio.fixture
+async def async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    AsyncSession on its own asyncpg connection, rolled back after the test like db_session.
+    It cannot see rows added through db_session (a different connection); to compare async
+    and sync paths, run the sync code on this session's connection with run_sync.
+    """
+    connection, transaction = await _begin_async()
+    session = _async_test_session(connection)
+    yield session
+    await session.close()
+    await _end_async(connection, transaction)
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """
+    Process-wide caches are filled from data each test rolls back, so start every test empty.
+    """
+    working_day_calendar.invalidate()
+    org_tree_service.invalidate()
+    yield
+    working_day_calendar.invalidate()
+    org_tree_service.invalidate()
+
+@pytest.fixture
+def count_queries(db_engine):
+    """
+    Context manager collecting every SQL statement executed inside the block, on the test
+    engine and on the async routes' engine.
+    Usage: with count_queries() as statements: ...; assert len(statements) == ...
+    """
+    engines = (db_engine, async_engine.sync_engine)
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
 @pytest.fixture(scope="function")
 def client(db_session) -> Generator[TestClient, None, None]:
     """
-    Fixture for FastAPI TestClient with overridden DB dependency.
+    Fixture for FastAPI TestClient with overridden DB dependencies. Sync routes share
+    db_session; async routes (get_async_db) share one asyncpg connection opened on the
+    client's event loop, also rolled back afterwards. The two are separate transactions,
+    so data an async route should see must be added through that route's own session.
     """
     def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as c:
+        connection, transaction = c.portal.call(_begin_async)
+
+        async def override_get_async_db():
+            async with _async_test_session(connection) as session:
+                yield session
+
+        app.dependency_overrides[get_async_db] = override_get_async_db
         yield c
+        c.portal.call(_end_async, connection, transaction)
     app.dependency_overrides.clear()
 
+@pytest.fixture
+def async_routes_db(client):
+    """
+    Runs `fn(session, *args)` (sync ORM code) in a session on the async routes' connection and
+    commits it, so what it adds is visible to async routes called through `client`. Returns fn's result.
+    """
+    def run(fn, *args):
+        async def call():
+            sessions = app.dependency_overrides[get_async_db]()
+            session = await anext(sessions)
+            try:
+                result = await session.run_sync(fn, *args)
+                await session.commit()
+                return result
+            finally:
+                await sessions.aclose()
+        return client.portal.call(call)
+
+    return run
+
 @pytest.fixture
 def auth_headers(client):
     """
@@ -0,0 +1,53 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from models.employee import Employee
+from models.leave import LeaveBalance, LeaveLedgerEntry, LeaveType, LeaveTypeEnum
+from services.accrual_service import accrual_service, accrual_months
+
+def test_accrual_months_joined_before_year():
+    assert accrual_months(date(2020, 6, 15), 2024, 12) == Decimal(12)
+    assert accrual_months(None, 2024, 5) == Decimal(5)
+
+def test_accrual_months_not_joined_yet():
+    assert accrual_months(date(2025, 1, 1), 2024, 12) == Decimal(0)
+    # Joined later in the year than the month being accrued to
+    assert accrual_months(date(2024, 8, 1), 2024, 6) == Decimal(0)
+
+def test_accrual_months_joining_month_rule():
+    # 1-10 (Full), 11-20 (Half), 21+ (None)
+    assert accrual_months(date(2024, 3, 10), 2024, 12) == Decimal(10)
+    assert accrual_months(date(2024, 3, 11), 2024, 12) == Decimal("9.5")
+    assert accrual_months(date(2024, 3, 20), 2024, 12) == Decimal("9.5")
+    assert accrual_months(date(2024, 3, 21), 2024, 12) == Decimal(9)
+    assert accrual_months(date(2024, 12, 5), 2024, 12) == Decimal(1)
+
+def test_refresh_upserts_balances_for_all_employees(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CLX", annual_entitlement=12, accrual_method="monthly")
+    db_session.add(lt)
+    employees = [
+        Employee(first_name="Accrual", last_name=str(i), email=f"accrual_{i}@example.com",
+                 hashed_password="dummy", date_of_joining=date(2020, 1, 1))
+        for i in range(3)
+    ]
+    db_session.add_all(employees)
+    db_session.commit()
+
+    ids = [e.id for e in employees]
+    accrual_service.refresh(db_session, ids, 2023)
+    # Second run must update in place, not duplicate
+    accrual_service.refresh(db_session, ids, 2023)
+
+    balances = db_session.query(LeaveBalance).filter(
+        LeaveBalance.employee_id.in_(ids),
+        LeaveBalance.leave_type_id == lt.id,
+        LeaveBalance.leave_year == 2023
+    ).all()
+    assert len(balances) == 3
+    assert all(b.accrued == 12 and b.available == 12 for b in balances)
+    # New rows are claimed at zero before the delta is taken: one ledger entry each, none on the rerun
+    ledger = db_session.query(LeaveLedgerEntry).filter(
+        LeaveLedgerEntry.employee_id.in_(ids),
+        LeaveLedgerEntry.leave_type_id == lt.id
+    ).all()
+    assert sorted(e.days for e in ledger) == [12, 12, 12]
@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+from models.accrual_job import AccrualJobChunk, AccrualJobKind, AccrualJobStatus
+from models.employee import Employee
+from models.leave import LeaveBalance, LeaveLedgerEntry, LeaveType, LeaveTypeEnum, LedgerEntryType
+from services.accrual_job_service import accrual_job_service, split_chunks
+from services.accrual_service import accrual_service, carry_forward_days
+
+def test_split_chunks():
+    assert split_chunks([5, 1, 3, 2, 4], 2) == [[1, 2], [3, 4], [5]]
+    assert split_chunks([], 2) == []
+
+def test_carry_forward_days_capped():
+    assert carry_forward_days(Decimal("7.5"), 5) == Decimal(5)
+    assert carry_forward_days(Decimal("3.25"), 5) == Decimal("3.25")
+    assert carry_forward_days(Decimal("-2"), 5) == Decimal(0)
+    assert carry_forward_days(Decimal("40"), None) == Decimal(40)
+
+def test_rollover_job_runs_in_chunks_and_resumes(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.earned_leave, abbr="ELJ", annual_entitlement=12, accrual_method="monthly",
+                   carry_forward=True, max_carry_forward=10)
+    db_session.add(lt)
+    employees = [
+        Employee(first_name="Rollover", last_name=str(i), email=f"rollover_{i}@example.com",
+                 hashed_password="dummy", date_of_joining=date(2020, 1, 1))
+        for i in range(5)
+    ]
+    db_session.add_all(employees)
+    db_session.commit()
+    ids = [e.id for e in employees]
+
+    job = accrual_job_service.start(db_session, AccrualJobKind.rollover, 2023, chunk_size=2)
+    assert job.total_chunks >= 3
+    # Starting again while unfinished returns the same job
+    assert accrual_job_service.start(db_session, AccrualJobKind.rollover, 2023, chunk_size=2).id == job.id
+
+    job = accrual_job_service.run(db_session, job, workers=1)
+    assert job.status == AccrualJobStatus.completed
+    assert job.completed_chunks == job.total_chunks
+
+    balances = db_session.query(LeaveBalance).filter(
+        LeaveBalance.employee_id.in_(ids), LeaveBalance.leave_type_id == lt.id, LeaveBalance.leave_year == 2024
+    ).all()
+    assert len(balances) == 5
+    # 12 days accrued in 2023, capped at 10
+    assert all(b.carry_forward == 10 and b.available == 10 for b in balances)
+
+    # Redoing a chunk (as after a crash before it was marked) writes no new ledger entries
+    chunk = db_session.query(AccrualJobChunk).filter(AccrualJobChunk.job_id == job.id).first()
+    chunk.status = AccrualJobStatus.pending
+    db_session.commit()
+    job = accrual_job_service.run(db_session, job, workers=1)
+    assert job.status == AccrualJobStatus.completed
+    entries = db_session.query(LeaveLedgerEntry).filter(
+        LeaveLedgerEntry.employee_id.in_(ids), LeaveLedgerEntry.entry_type == LedgerEntryType.carry_forward
+    ).count()
+    assert entries == 5
+
+    # A new job is only started once the previous one completed
+    assert accrual_job_service.start(db_session, AccrualJobKind.rollover, 2023).id != job.id
@@ -0,0 +1,29 @@
+import pytest
+from datetime import date
+from models.employee import Employee
+from models.leave import LeaveApplication, LeaveApplicationStatus, LeaveType, LeaveTypeEnum
+from services.leave_service import leave_service
+
+def _seed(db):
+    lt = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CLA", annual_entitlement=12, accrual_method="monthly")
+    emp = Employee(first_name="Async", last_name="Stats", email="async_stats@example.com", hashed_password="dummy")
+    db.add_all([lt, emp])
+    db.flush()
+    db.add_all([
+        LeaveApplication(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 5, 6), to_date=date(2024, 5, 7),
+                         number_of_days=2, reason="Async", status=LeaveApplicationStatus.approved),
+        LeaveApplication(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 6, 3), to_date=date(2024, 6, 3),
+                         number_of_days=1, reason="Async", status=LeaveApplicationStatus.pending),
+    ])
+    db.flush()
+
+@pytest.mark.asyncio
+async def test_leave_stats_async_matches_sync(async_db_session):
+    # Seeded and read on one connection and transaction, so both paths see the same rows
+    await async_db_session.run_sync(_seed)
+    async_stats = await leave_service.get_leave_stats_async(async_db_session, 2024)
+    sync_stats = await async_db_session.run_sync(leave_service.get_leave_stats, 2024)
+
+    assert async_stats == sync_stats
+    assert async_stats["pending_applications"] >= 1
+    assert async_stats["taken_by_type"][LeaveTypeEnum.casual_leave.value] >= 2
@@ -0,0 +1,78 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from models.audit import AuditLog
+from models.employee import Employee
+from models.user import User, UserRole
+from schemas.employee import EmployeeUpdate
+from services.audit_service import add_months, audit_service, partition_name
+from services.employee_service import employee_service
+from utils.audit import diff_changes, log_action
+
+def test_diff_changes_only_reports_changed_fields():
+    emp = Employee(first_name="Asha", last_name="Rao", date_of_joining=date(2024, 1, 15), hashed_password="secret")
+    changes = diff_changes(emp, {
+        "first_name": "Asha",
+        "last_name": "Menon",
+        "date_of_joining": date(2024, 2, 1),
+        "hashed_password": "other",
+        "not_a_column": 1,
+    })
+    assert changes == {
+        "last_name": {"old": "Rao", "new": "Menon"},
+        "date_of_joining": {"old": "2024-01-15", "new": "2024-02-01"},
+    }
+
+def test_entries_commit_and_roll_back_with_the_caller(db_session):
+    log_action(db_session, None, "TEST", "AuditProbe", 1)
+    db_session.rollback()
+    assert db_session.query(AuditLog).filter(AuditLog.entity_type == "AuditProbe").count() == 0
+
+    emp = Employee(first_name="Audit", last_name="Target", email="audit_target@example.com", hashed_password="dummy", employee_code="AUD-1")
+    db_session.add(emp)
+    db_session.commit()
+    admin = User(username="audit_admin", email="audit_admin@example.com", password_hash="dummy", role=UserRole.super_admin)
+
+    employee_service.update_employee(db_session, admin, emp.id, EmployeeUpdate(first_name="Audit", last_name="Renamed"))
+    entries = db_session.query(AuditLog).filter(AuditLog.entity_type == "Employee", AuditLog.entity_id == emp.id).all()
+    assert [e.details for e in entries] == [{"changes": {"last_name": {"old": "Target", "new": "Renamed"}}}]
+
+    # A no-op update isn't logged
+    employee_service.update_employee(db_session, admin, emp.id, EmployeeUpdate(last_name="Renamed"))
+    assert db_session.query(AuditLog).filter(AuditLog.entity_type == "Employee", AuditLog.entity_id == emp.id).count() == 1
+
+def test_partition_months():
+    assert partition_name(date(2025, 3, 1)) == "audit_logs_2025_03"
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -13) == date(2022, 12, 1)
+
+def test_query_filters_and_keyset_pages(db_session):
+    for i in range(5):
+        log_action(db_session, None, "APPROVE" if i % 2 else "CREATE", "AuditPaging", 7)
+    log_action(db_session, None, "CREATE", "AuditPaging", 8)
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = audit_service.get_logs(db_session, 2, cursor, entity_type="AuditPaging", entity_id=7)
+        seen += page
+        if not cursor:
+            break
+    assert len(seen) == 5
+    assert [(e.timestamp, e.id) for e in seen] == sorted(((e.timestamp, e.id) for e in seen), reverse=True)
+
+    page, _ = audit_service.get_logs(db_session, 10, entity_type="AuditPaging", action="APPROVE")
+    assert len(page) == 2
+    assert audit_service.first_actor(db_session, "AuditPaging", 8, "CREATE") is None
+
+def test_partitions_absorb_default_rows_and_detach(db_session):
+    far = date(2099, 1, 1)
+    db_session.add(AuditLog(action="FUTURE", entity_type="AuditPartition", entity_id=1, timestamp=datetime(2099, 1, 15, tzinfo=timezone.utc)))
+    db_session.commit()
+
+    assert audit_service.ensure_partitions(db_session, far, far) == ["audit_logs_2099_01"]
+    holder = db_session.execute(text("SELECT tableoid::regclass::text FROM audit_logs WHERE entity_type = 'AuditPartition'")).scalar()
+    assert holder == "audit_logs_2099_01"
+    assert audit_service.ensure_partitions(db_session, far, far) == []
+
+    assert "audit_logs_2099_01" in audit_service.detach_expired_partitions(db_session, before=date(2099, 2, 1), drop=True)
+    assert db_session.query(AuditLog).filter(AuditLog.entity_type == "AuditPartition").count() == 0
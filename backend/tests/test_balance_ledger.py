@@ -0,0 +1,51 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException
+from models.employee import Employee
+from models.leave import LeaveLedgerEntry, LeaveType, LeaveTypeEnum, LedgerEntryType
+from services.balance_ledger_service import balance_ledger_service
+from services.leave_service import leave_service
+
+def test_rebuild_reproduces_snapshot_from_ledger(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.sick_leave, abbr="SLX", annual_entitlement=12, accrual_method="manual")
+    emp = Employee(first_name="Ledger", last_name="Test", email="ledger_test@example.com", hashed_password="dummy")
+    db_session.add_all([lt, emp])
+    db_session.commit()
+
+    balance = balance_ledger_service.get_or_create_balance(db_session, emp.id, lt.id, 2024)
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.opening, Decimal(10))
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.pending, Decimal(3))
+    # Approval moves the reservation from pending to taken
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.pending, Decimal(-3))
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.taken, Decimal(3))
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.recall, Decimal(1))
+    db_session.commit()
+
+    assert balance.taken == 2
+    assert balance.pending_approval == 0
+    assert balance.available == 8
+
+    # Corrupt the snapshot, then rebuild it from the ledger
+    balance.taken = Decimal(0)
+    balance.available = Decimal(0)
+    db_session.commit()
+
+    rebuilt = balance_ledger_service.rebuild(db_session, emp.id, 2024)
+    assert len(rebuilt) == 1
+    assert rebuilt[0].taken == 2
+    assert rebuilt[0].available == 8
+
+def test_leave_type_with_ledger_history_cannot_be_deleted(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.sick_leave, abbr="SLD", annual_entitlement=12, accrual_method="manual")
+    emp = Employee(first_name="Ledger", last_name="Delete", email="ledger_delete@example.com", hashed_password="dummy")
+    db_session.add_all([lt, emp])
+    db_session.commit()
+    balance = balance_ledger_service.get_or_create_balance(db_session, emp.id, lt.id, 2024)
+    balance_ledger_service.post(db_session, balance, LedgerEntryType.opening, Decimal(10))
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        leave_service.delete_leave_type(db_session, lt.id)
+    assert exc.value.status_code == 400
+    assert db_session.query(LeaveLedgerEntry).filter(LeaveLedgerEntry.leave_type_id == lt.id).count() == 1
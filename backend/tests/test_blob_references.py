@@ -0,0 +1,65 @@
+from sqlalchemy.orm import Session
+from models.document import EmployeeDocument, DocumentType
+from models.email_outbox import EmailOutbox, EmailStatus
+from models.employee import Employee
+from models.storage import StoredBlob
+from services.blob_service import blob_service
+from services.email_service import email_service
+
+BLOB = "blobs/ab/ab12.pdf"
+OTHER = "blobs/cd/cd34.pdf"
+
+def test_new_rows_reference_blobs_and_ignore_legacy_paths():
+    session = Session()
+    session.add_all([
+        EmployeeDocument(employee_id=1, document_type=DocumentType.pan_card, file_path=BLOB),
+        EmployeeDocument(employee_id=1, document_type=DocumentType.passport, file_path=BLOB),
+        EmployeeDocument(employee_id=1, document_type=DocumentType.voter_id, file_path="employees/1/voter_id/x.pdf"),
+    ])
+    assert blob_service.reference_deltas(session) == {BLOB: 2}
+
+def test_ref_counts_follow_flushes(db_session):
+    emp = Employee(first_name="Blob", last_name="Owner", email="blob_owner@example.com", hashed_password="dummy", employee_code="BLOB-1")
+    db_session.add(emp)
+    db_session.flush()
+    first = EmployeeDocument(employee_id=emp.id, document_type=DocumentType.pan_card, file_path=BLOB)
+    second = EmployeeDocument(employee_id=emp.id, document_type=DocumentType.aadhaar_card, file_path=BLOB)
+    db_session.add_all([first, second])
+    db_session.flush()
+    assert db_session.get(StoredBlob, BLOB).ref_count == 2
+
+    # Re-pointing one row moves its reference; deleting the other releases the blob
+    second.file_path = OTHER
+    db_session.delete(first)
+    db_session.flush()
+    db_session.expire_all()
+    assert db_session.get(StoredBlob, BLOB).ref_count == 0
+    assert db_session.get(StoredBlob, OTHER).ref_count == 1
+    assert db_session.info["released_blobs"] == {BLOB}
+
+    db_session.rollback()
+    assert "released_blobs" not in db_session.info
+
+def test_only_pending_email_holds_its_attachments():
+    session = Session()
+    session.add_all([
+        EmailOutbox(to_email="a@example.com", subject="s", body="b", attachments=[BLOB, OTHER], status=EmailStatus.pending),
+        EmailOutbox(to_email="b@example.com", subject="s", body="b", attachments=[BLOB], status=EmailStatus.sent),
+    ])
+    assert blob_service.reference_deltas(session) == {BLOB: 1, OTHER: 1}
+
+def test_sent_email_releases_its_attachments(db_session):
+    email = email_service.enqueue(db_session, "blob@example.com", "Payslip", "Attached", attachments=[BLOB])
+    db_session.flush()
+    assert db_session.get(StoredBlob, BLOB).ref_count == 1
+
+    email.attempts += 1
+    db_session.flush()
+    db_session.expire_all()
+    assert db_session.get(StoredBlob, BLOB).ref_count == 1
+
+    email.status = EmailStatus.sent
+    db_session.flush()
+    db_session.expire_all()
+    assert db_session.get(StoredBlob, BLOB).ref_count == 0
+    assert BLOB in db_session.info["released_blobs"]
@@ -0,0 +1,70 @@
+import io
+from datetime import date
+import pytest
+from fastapi import HTTPException, UploadFile
+from core.config import settings
+from models.candidate import Candidate, CandidateStatus
+from models.email_outbox import EmailOutbox, EmailStatus
+from models.master_data import Designation
+from services.onboarding_service import onboarding_service
+
+@pytest.fixture
+def candidates(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    designation = Designation(name="Bulk Offer Trainee")
+    db_session.add(designation)
+    db_session.flush()
+    people = [
+        Candidate(full_name=f"Campus Hire {i}", personal_email=f"campus{i}@example.com", mobile_number="9000000000",
+                  employment_type="Full Time", expected_joining_date=date(2025, 7, 1), designation_id=designation.id)
+        for i in range(6)
+    ]
+    db_session.add_all(people)
+    db_session.commit()
+    return people
+
+def _letter(content=b"%PDF-1.4 offer"):
+    return UploadFile(io.BytesIO(content), filename="offer.pdf")
+
+def test_bulk_offers_share_lookups_and_letter(db_session, candidates, count_queries):
+    ids = [c.id for c in candidates]
+    with count_queries() as statements:
+        batch = onboarding_service.send_bulk_offers(db_session, ids, 7, None, "HR", "hr@example.com", [_letter()])
+    # Company and designation are read once, not per candidate
+    assert sum("FROM designations" in s for s in statements) == 1
+    assert sum("FROM company_settings" in s for s in statements) == 1
+
+    emails = db_session.query(EmailOutbox).filter(EmailOutbox.to_email.in_([c.personal_email for c in candidates])).all()
+    assert len(emails) == len(ids)
+    assert "Bulk Offer Trainee" in emails[0].subject
+    # One stored letter shared by every offer
+    assert len({tuple(e.attachments) for e in emails}) == 1
+    for c in candidates:
+        db_session.refresh(c)
+        assert c.status == CandidateStatus.sent and c.offer_token
+    assert len({c.offer_token for c in candidates}) == len(ids)
+
+    progress = onboarding_service.get_offer_batch(db_session, batch.id)
+    assert progress["total"] == len(ids)
+    assert progress["counts"][EmailStatus.pending.value] == len(ids)
+    assert not progress["completed"]
+    assert [item["candidate_id"] for item in progress["items"]] == ids
+
+    emails[0].status = EmailStatus.sent
+    db_session.commit()
+    assert onboarding_service.get_offer_batch(db_session, batch.id)["counts"][EmailStatus.sent.value] == 1
+
+def test_bulk_offers_validate_request(db_session, candidates):
+    ids = [c.id for c in candidates]
+    with pytest.raises(HTTPException) as e:
+        onboarding_service.send_bulk_offers(db_session, ids + [ids[0]], 7, None, "HR", "hr@example.com")
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        onboarding_service.send_bulk_offers(db_session, ids, 7, None, "HR", "hr@example.com", [_letter(), _letter()])
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        onboarding_service.send_bulk_offers(db_session, ids + [10**9], 7, None, "HR", "hr@example.com")
+    assert e.value.status_code == 404
+    # Nothing was issued
+    db_session.refresh(candidates[0])
+    assert candidates[0].status == CandidateStatus.created
@@ -0,0 +1,44 @@
+import pytest
+from datetime import date
+from schemas.dashboard import DashboardResponse
+from services.dashboard_service import DashboardCache, celebration_window, key_ranges
+
+def make_response(greeting="Good morning, Test"):
+    return DashboardResponse(greeting=greeting, stats=[], celebrations=[], quick_actions=[])
+
+def test_cache_invalidation_scope():
+    cache = DashboardCache()
+    cache.set(1, "employee", make_response())
+    cache.set(2, "employee", make_response())
+    cache.set(3, "manager", make_response())
+    cache.set(4, "hr_admin", make_response())
+
+    # A leave write by employee 1 also changes team and company-wide counts
+    cache.invalidate([1])
+
+    assert cache.get(1, "employee") is None
+    assert cache.get(2, "employee") is not None
+    assert cache.get(3, "manager") is None
+    assert cache.get(4, "hr_admin") is None
+
+def test_cache_disabled_with_zero_ttl(monkeypatch):
+    from core.config import settings
+    monkeypatch.setattr(settings, "DASHBOARD_CACHE_TTL_SECONDS", 0)
+    cache = DashboardCache()
+    cache.set(1, "employee", make_response())
+    assert cache.get(1, "employee") is None
+
+def test_celebration_window_wraps_year():
+    window = celebration_window(date(2025, 12, 28), 7)
+    assert key_ranges(window) == [(1228, 1231), (101, 104)]
+    assert window[102] == date(2026, 1, 2)
+
+def test_celebration_window_feb_29():
+    # Non-leap year: Feb 29 birthdays are celebrated on Mar 1
+    window = celebration_window(date(2025, 3, 1), 7)
+    assert window[229] == date(2025, 3, 1)
+    assert key_ranges(window) == [(229, 308)]
+
+    window = celebration_window(date(2024, 2, 27), 7)
+    assert window[229] == date(2024, 2, 29)
+    assert window[301] == date(2024, 3, 1)
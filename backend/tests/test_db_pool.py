@@ -0,0 +1,18 @@
+from core.database import PoolWaitStats, get_pool_stats
+
+def test_pool_wait_stats_snapshot():
+    stats = PoolWaitStats()
+    stats.record(0.002)
+    stats.record(0.004)
+    stats.record(0.030, timed_out=True)
+
+    snapshot = stats.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["timeouts"] == 1
+    assert snapshot["avg_wait_ms"] == 12.0
+    assert snapshot["max_wait_ms"] == 30.0
+
+def test_get_pool_stats_reports_both_engines():
+    stats = get_pool_stats()
+    assert set(stats) == {"sync", "async"}
+    assert stats["sync"]["checked_out"] >= 0
@@ -0,0 +1,138 @@
+import smtplib
+import socket
+from datetime import timedelta
+from email.message import EmailMessage
+import pytest
+from aiosmtpd.controller import Controller
+from core.config import settings
+from models.email_outbox import EmailStatus
+from services.email_service import EmailService, SMTPConnectionPool, is_permanent, retry_delay
+
+class RecordingHandler:
+    """Local SMTP stand-in: accepts everything except recipients at reject.test."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith("@reject.test"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted"
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    monkeypatch.setattr(settings, "SMTP_USER", "hrms")
+    monkeypatch.setattr(settings, "SMTP_PASSWORD", None)
+    monkeypatch.setattr(settings, "SMTP_TLS", False)
+    yield handler
+    controller.stop()
+
+def _message(to):
+    msg = EmailMessage()
+    msg["From"] = settings.SMTP_FROM_EMAIL
+    msg["To"] = to
+    msg["Subject"] = "Hello"
+    msg.set_content("Body")
+    return msg
+
+def test_pool_reuses_connections(smtp_server):
+    service = EmailService()
+    try:
+        for i in range(5):
+            assert service.deliver(_message(f"user{i}@example.com")) is None
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.sessions == 1
+
+        # A rejected recipient leaves the connection usable
+        error = service.deliver(_message("nobody@reject.test"))
+        assert isinstance(error, smtplib.SMTPRecipientsRefused) and is_permanent(error)
+        assert service.deliver(_message("user5@example.com")) is None
+        assert smtp_server.sessions == 1
+    finally:
+        service.close()
+
+def test_pool_replaces_dropped_connection(smtp_server):
+    pool = SMTPConnectionPool()
+    service = EmailService()
+    service.pool = pool
+    try:
+        assert service.deliver(_message("a@example.com")) is None
+        # The server hung up on the idle connection
+        pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+        assert service.deliver(_message("b@example.com")) is None
+        assert smtp_server.sessions == 2
+    finally:
+        service.close()
+
+def test_retry_policy(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 30)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_MAX_SECONDS", 3600)
+    assert [retry_delay(n).seconds for n in (1, 2, 3)] == [30, 60, 120]
+    assert retry_delay(20) == timedelta(hours=1)
+
+    assert not is_permanent(smtplib.SMTPResponseException(421, b"Try later"))
+    assert is_permanent(smtplib.SMTPDataError(554, b"Rejected"))
+    assert not is_permanent(smtplib.SMTPAuthenticationError(535, b"Bad credentials"))
+    assert not is_permanent(smtplib.SMTPServerDisconnected())
+    assert is_permanent(FileNotFoundError("blobs/00/gone.pdf"))
+
+def test_outbox_delivery(db_session, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 3)
+    service = EmailService()
+    try:
+        sent = [service.enqueue(db_session, f"hire{i}@example.com", "Offer", "Welcome aboard") for i in range(3)]
+        rejected = service.enqueue(db_session, "ghost@reject.test", "Offer", "Welcome aboard")
+        unattached = service.enqueue(db_session, "noletter@example.com", "Offer", "Attached", attachments=["blobs/00/gone.pdf"])
+        # Nothing goes out before the enqueuing transaction commits
+        assert smtp_server.messages == []
+        db_session.commit()
+
+        assert service.process_outbox(db_session, batch_size=10) >= 5
+        for email in sent:
+            db_session.refresh(email)
+            assert email.status == EmailStatus.sent and email.attempts == 1
+        db_session.refresh(rejected)
+        assert rejected.status == EmailStatus.failed
+        assert "550" in rejected.last_error
+        # A missing attachment fails the message instead of sending it without the file
+        db_session.refresh(unattached)
+        assert unattached.status == EmailStatus.failed
+        assert "blobs/00/gone.pdf" in unattached.last_error
+        assert "noletter@example.com" not in {m.rcpt_tos[0] for m in smtp_server.messages}
+        assert {m.rcpt_tos[0] for m in smtp_server.messages} >= {f"hire{i}@example.com" for i in range(3)}
+        # One batch, at most EMAIL_SMTP_CONNECTIONS connections
+        assert smtp_server.sessions <= settings.EMAIL_SMTP_CONNECTIONS
+
+        # A temporary failure stays pending until its backoff passes
+        monkeypatch.setattr(settings, "SMTP_PORT", 1)
+        retried = service.enqueue(db_session, "later@example.com", "Offer", "Welcome aboard")
+        db_session.commit()
+        service.pool.close()
+        service.process_outbox(db_session)
+        db_session.refresh(retried)
+        assert retried.status == EmailStatus.pending and retried.attempts == 1
+        assert retried.next_attempt_at > retried.created_at
+        service.process_outbox(db_session)
+        db_session.refresh(retried)
+        assert retried.attempts == 1
+    finally:
+        service.close()
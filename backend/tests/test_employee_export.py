@@ -0,0 +1,61 @@
+import csv
+import io
+import os
+import pytest
+from fastapi import HTTPException
+from openpyxl import load_workbook
+from core.principal_cache import Principal
+from models.department import Department
+from models.employee import Employee
+from models.user import UserRole
+from services.employee_service import employee_service, DEFAULT_EXPORT_COLUMNS, EXPORT_COLUMNS
+from utils.export import csv_chunks
+
+ADMIN = Principal(id=0, email="admin_export@example.com", username=None, role=UserRole.hr_admin, employee_id=None)
+
+@pytest.fixture
+def staff(db_session):
+    dept = Department(name="Export Dept")
+    db_session.add(dept)
+    db_session.flush()
+    lead = Employee(first_name="Export", last_name="Lead", email="export_lead@example.com", hashed_password="dummy",
+                    employee_code="EXP-L", department_id=dept.id)
+    db_session.add(lead)
+    db_session.flush()
+    db_session.add_all([
+        Employee(first_name="Export", last_name=f"Member{i}", email=f"export_member{i}@example.com", hashed_password="dummy",
+                 employee_code=f"EXP-{i}", department_id=dept.id, manager_id=lead.id)
+        for i in range(5)
+    ])
+    db_session.commit()
+    return dept
+
+def test_resolve_export_columns():
+    assert employee_service.resolve_export_columns(None) == list(DEFAULT_EXPORT_COLUMNS)
+    assert employee_service.resolve_export_columns(" email, manager ") == ["email", "manager"]
+    with pytest.raises(HTTPException) as exc:
+        employee_service.resolve_export_columns("email,hashed_password")
+    assert "hashed_password" in exc.value.detail
+
+def test_csv_export_streams_in_batches(db_session, staff):
+    keys = ["employee_code", "department", "manager"]
+    rows = employee_service._export_query(db_session, ADMIN, keys, department_id=staff.id)
+    chunks = list(csv_chunks(rows, [EXPORT_COLUMNS[k][0] for k in keys], batch_size=2))
+
+    # Header + 6 rows flushed every 2 rows, then the (empty) remainder
+    assert len(chunks) == 4
+    records = list(csv.reader(io.StringIO("".join(chunks))))
+    assert records[0] == ["Employee Code", "Department", "Reporting Manager"]
+    assert records[1] == ["EXP-L", "Export Dept", ""]
+    assert records[2] == ["EXP-0", "Export Dept", "Export Lead"]
+    assert len(records) == 7
+
+def test_xlsx_export(db_session, staff):
+    path = employee_service.export_employees_xlsx(db_session, ADMIN, ["email", "status"], search="export member")
+    try:
+        sheet = load_workbook(path, read_only=True).active
+        values = list(sheet.values)
+    finally:
+        os.remove(path)
+    assert values[0] == ("Email", "Status")
+    assert len(values) == 6
@@ -0,0 +1,136 @@
+import hashlib
+import io
+import pytest
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.testclient import TestClient
+from core.config import settings
+from utils.file_storage import adopt_file, delete_file, file_response, parse_range, save_upload, upload_file
+
+CONTENT = bytes(range(256)) * 40 # 10240 bytes
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", 4096)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "payslip.pdf").write_bytes(CONTENT)
+
+    app = FastAPI()
+
+    @app.get("/files/{name}")
+    def download(name: str, request: Request):
+        return file_response(request, f"docs/{name}")
+
+    return TestClient(app)
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    # Ignored: several ranges, other units, garbage
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range("bytes=abc", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 1000)
+
+def test_full_download_headers(files):
+    response = files.get("/files/payslip.pdf")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert 'filename="payslip.pdf"' in response.headers["content-disposition"]
+    assert response.headers["etag"] and response.headers["last-modified"]
+
+def test_conditional_requests(files):
+    first = files.get("/files/payslip.pdf")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    assert files.get("/files/payslip.pdf", headers={"If-None-Match": etag}).status_code == 304
+    assert files.get("/files/payslip.pdf", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert files.get("/files/payslip.pdf", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # A stale tag wins over a matching date
+    response = files.get("/files/payslip.pdf", headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+def test_range_requests(files):
+    response = files.get("/files/payslip.pdf", headers={"Range": "bytes=4000-9000"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[4000:9001]
+    assert response.headers["content-range"] == f"bytes 4000-9000/{len(CONTENT)}"
+    assert response.headers["content-length"] == "5001"
+
+    response = files.get("/files/payslip.pdf", headers={"Range": "bytes=-10"})
+    assert response.content == CONTENT[-10:]
+
+    response = files.get("/files/payslip.pdf", headers={"Range": "bytes=20000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+def test_if_range_falls_back_to_full_file(files):
+    etag = files.get("/files/payslip.pdf").headers["etag"]
+    response = files.get("/files/payslip.pdf", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    response = files.get("/files/payslip.pdf", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+def test_missing_file(files):
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    with pytest.raises(FileNotFoundError):
+        file_response(request, "docs/missing.pdf")
+
+def test_upload_is_hashed_and_renamed_into_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    monkeypatch.setattr("utils.file_storage.UPLOAD_CHUNK_SIZE", 1000)
+
+    stored = upload_file(UploadFile(io.BytesIO(CONTENT), filename="scan.PDF"))
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert stored.path == f"blobs/{sha256[:2]}/{sha256}.pdf"
+    assert stored.size == len(CONTENT)
+    assert stored.sha256 == sha256
+    assert (tmp_path / stored.path).read_bytes() == CONTENT
+    # No temp files left next to it
+    assert [p.name for p in (tmp_path / "blobs").iterdir()] == [sha256[:2]]
+
+def test_identical_uploads_share_a_blob(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    first = upload_file(UploadFile(io.BytesIO(CONTENT), filename="aadhaar.pdf"))
+    second = upload_file(UploadFile(io.BytesIO(CONTENT), filename="aadhaar-again.pdf"))
+    assert first.path == second.path
+    assert len(list((tmp_path / "blobs").rglob("*.pdf"))) == 1
+
+    # Shared blobs are only removed through reference counting
+    assert delete_file(first.path) is False
+    assert (tmp_path / first.path).exists()
+
+def test_adopt_legacy_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    stored = upload_file(UploadFile(io.BytesIO(CONTENT), filename="scan.pdf"))
+    (tmp_path / "employees").mkdir()
+    (tmp_path / "employees" / "old-upload.pdf").write_bytes(CONTENT)
+
+    assert adopt_file("employees/old-upload.pdf") == stored.path
+    assert (tmp_path / "employees" / "old-upload.pdf").exists()
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 2 # The prefix folder and the blob
+
+def test_oversized_upload_is_aborted(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    monkeypatch.setattr("utils.file_storage.UPLOAD_CHUNK_SIZE", 1000)
+
+    with pytest.raises(HTTPException) as exc:
+        upload_file(UploadFile(io.BytesIO(CONTENT), filename="big.pdf"), max_size=5000)
+    assert exc.value.status_code == 413
+    # Neither the file nor its temp file is left behind
+    assert list((tmp_path / "blobs").iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_save_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    stored = await save_upload(UploadFile(io.BytesIO(b"logo"), filename="logo.png"))
+    assert (tmp_path / stored.path).read_bytes() == b"logo"
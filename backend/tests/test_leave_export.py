@@ -0,0 +1,50 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date
+from decimal import Decimal
+from models.employee import Employee
+from models.leave import LeaveType, LeaveTypeEnum, LeaveBalance, LeaveApplication, LeaveApplicationStatus
+from services.leave_export_service import leave_export_service
+from utils.export import arrow_schema, parquet_chunks
+
+def test_parquet_chunks_one_row_group_per_batch():
+    schema = pa.schema([("id", pa.int64()), ("leave_type", pa.string()), ("days", pa.decimal128(5, 2))])
+    rows = [(i, LeaveTypeEnum.casual_leave, Decimal("1.50")) for i in range(5)]
+
+    chunks = list(parquet_chunks(rows, schema, batch_size=2))
+    # Three row groups, then the footer
+    assert len(chunks) == 4
+    parquet = pq.ParquetFile(pa.BufferReader(b"".join(chunks)))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("id").to_pylist() == [0, 1, 2, 3, 4]
+    assert table.column("leave_type").to_pylist()[0] == "casual_leave"
+
+def test_liability_and_application_rows(db_session):
+    el = LeaveType(name=LeaveTypeEnum.earned_leave, abbr="ELX", annual_entitlement=15, accrual_method="manual",
+                   encashment=True, max_encashment_per_year=10, min_balance_to_encash=5)
+    cl = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CLX", annual_entitlement=12, accrual_method="manual")
+    rich = Employee(first_name="Export", last_name="Rich", email="export_rich@example.com", hashed_password="dummy", employee_code="LX-1")
+    poor = Employee(first_name="Export", last_name="Poor", email="export_poor@example.com", hashed_password="dummy", employee_code="LX-2")
+    db_session.add_all([el, cl, rich, poor])
+    db_session.flush()
+    db_session.add_all([
+        LeaveBalance(employee_id=rich.id, leave_type_id=el.id, leave_year=2024, available=14, accrual_month=12),
+        LeaveBalance(employee_id=poor.id, leave_type_id=el.id, leave_year=2024, available=3, accrual_month=12),
+        LeaveBalance(employee_id=rich.id, leave_type_id=cl.id, leave_year=2024, available=8, accrual_month=12),
+        LeaveApplication(employee_id=rich.id, leave_type_id=cl.id, from_date=date(2024, 5, 6), to_date=date(2024, 5, 6),
+                         number_of_days=1, reason="Export", status=LeaveApplicationStatus.approved),
+    ])
+    db_session.commit()
+
+    keys = leave_export_service.resolve_columns("liability", "employee_code,available,encashable_days")
+    query = leave_export_service._query(db_session, "liability", keys, 2024)
+    rows = [tuple(r) for r in query if r.employee_code in ("LX-1", "LX-2")]
+    # Capped at the yearly limit; nothing below the minimum balance; non-encashable types excluded
+    assert rows == [("LX-1", Decimal("14.00"), Decimal("10.00")), ("LX-2", Decimal("3.00"), Decimal("0.00"))]
+    assert arrow_schema(query).field("encashable_days").type == pa.decimal128(5, 2)
+
+    keys = ["employee_code", "leave_type", "status"]
+    rows = [tuple(r) for r in leave_export_service._query(db_session, "applications", keys, 2024, LeaveApplicationStatus.approved)
+            if r.employee_code == "LX-1"]
+    assert rows == [("LX-1", LeaveTypeEnum.casual_leave, LeaveApplicationStatus.approved)]
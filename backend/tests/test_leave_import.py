@@ -0,0 +1,68 @@
+import pytest
+from datetime import date
+from models.employee import Employee
+from models.leave import LeaveApplication, LeaveBalance, LeaveLedgerEntry, LeaveType, LeaveTypeEnum, LeaveApplicationStatus
+from schemas.leave import LeaveImportRow
+from services.leave_import_service import leave_import_service, _IntervalIndex
+
+def test_interval_index_overlap():
+    index = _IntervalIndex([(date(2024, 3, 4), date(2024, 3, 6)), (date(2024, 3, 5), date(2024, 3, 8))])
+    assert index.find_overlap(date(2024, 3, 8), date(2024, 3, 8)) == (date(2024, 3, 4), date(2024, 3, 8))
+    assert index.find_overlap(date(2024, 3, 9), date(2024, 3, 12)) is None
+
+    index.add(date(2024, 3, 11), date(2024, 3, 11))
+    assert index.find_overlap(date(2024, 3, 9), date(2024, 3, 12)) == (date(2024, 3, 11), date(2024, 3, 11))
+    assert index.find_overlap(date(2024, 3, 1), date(2024, 3, 3)) is None
+
+def test_parse_csv_reports_invalid_rows():
+    content = (
+        "employee_id,leave_type_id,from_date,to_date,reason\n"
+        "1,1,2024-03-04,2024-03-05,Shutdown\n"
+        "abc,1,2024-03-04,,Shutdown\n"
+    ).encode()
+    rows, errors = leave_import_service.parse_csv(content)
+    assert rows[0].to_date == date(2024, 3, 5)
+    assert rows[1] is None
+    assert "employee_id" in errors[1]
+
+def test_import_applications_single_transaction(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CLI", annual_entitlement=0, accrual_method="manual", negative_balance_allowed=True)
+    emp = Employee(first_name="Import", last_name="Test", email="import_test@example.com", hashed_password="dummy")
+    db_session.add_all([lt, emp])
+    db_session.commit()
+
+    rows = [
+        # Mon-Wed
+        LeaveImportRow(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 3, 4), to_date=date(2024, 3, 6), reason="Shutdown"),
+        LeaveImportRow(employee_id=emp.id, leave_type_id=9999, from_date=date(2024, 3, 11), reason="Unknown type"),
+        # Overlaps the first row of the same import
+        LeaveImportRow(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 3, 5), reason="Overlap"),
+        LeaveImportRow(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 3, 9), to_date=date(2024, 3, 10), reason="Weekend only"),
+        LeaveImportRow(
+            employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 3, 12), reason="Historical", status=LeaveApplicationStatus.approved
+        ),
+    ]
+
+    report = leave_import_service.import_applications(db_session, rows)
+
+    assert report.total == 5
+    assert report.imported == 2
+    assert [r.success for r in report.results] == [True, False, False, False, True]
+    assert report.results[0].number_of_days == 3
+    assert "overlaps" in report.results[2].error
+
+def test_import_dry_run_writes_nothing(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CLD", annual_entitlement=12, accrual_method="monthly")
+    emp = Employee(first_name="Import", last_name="DryRun", email="import_dry_run@example.com",
+                   hashed_password="dummy", date_of_joining=date(2020, 1, 1))
+    db_session.add_all([lt, emp])
+    db_session.commit()
+
+    rows = [LeaveImportRow(employee_id=emp.id, leave_type_id=lt.id, from_date=date(2023, 3, 6), reason="Dry run")]
+    report = leave_import_service.import_applications(db_session, rows, dry_run=True)
+
+    # Validated against the refreshed accrual, but neither it nor the row was kept
+    assert report.imported == 1
+    assert db_session.query(LeaveApplication).filter(LeaveApplication.employee_id == emp.id).count() == 0
+    assert db_session.query(LeaveBalance).filter(LeaveBalance.employee_id == emp.id).count() == 0
+    assert db_session.query(LeaveLedgerEntry).filter(LeaveLedgerEntry.employee_id == emp.id).count() == 0
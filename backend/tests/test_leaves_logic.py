@@ -3,7 +3,9 @@ from datetime import date, timedelta
 from decimal import Decimal
 from models.leave import LeaveBalance, LeaveType, LeaveTypeEnum, LeaveApplication, LeaveApplicationStatus
 from services.leave_service import leave_service
-from schemas.leave import LeaveApplicationCreate
+from pydantic import ValidationError
+from core.config import settings
+from schemas.leave import LeaveApplicationCreate, WorkingDaysRange, WorkingDaysRequest
 from models.employee import Employee
 from models.leave import PublicHoliday, HolidayType
 
@@ -59,13 +61,12 @@ def test_calculate_working_days_holiday(db_session):
     # Jan 1 2024 (Mon). Make Jan 2 (Tue) a holiday.
     # Range Jan 1 to Jan 3 -> 3 days normally. With holiday -> 2 days.
     
-    holiday = PublicHoliday(
-        name="Test Holiday",
-        holiday_date=date(2024, 1, 2),
-        holiday_type=HolidayType.declared
-    )
-    db_session.add(holiday)
-    db_session.commit()
+    # Created through the service so the cached working-day index is invalidated
+    leave_service.create_holiday(db_session, {
+        "name": "Test Holiday",
+        "holiday_date": date(2024, 1, 2),
+        "holiday_type": HolidayType.declared
+    })
     
     days = leave_service.calculate_working_days(
         db_session, 
@@ -75,6 +76,23 @@ def test_calculate_working_days_holiday(db_session):
     )
     assert days == 2
 
+def test_calculate_working_days_across_years(db_session):
+    # Fri 29 Dec 2023 .. Tue 2 Jan 2024 -> Fri, Mon, Tue
+    days = leave_service.calculate_working_days(db_session, date(2023, 12, 29), date(2024, 1, 2), "Full Day")
+    assert days == 3
+
+def test_calculate_working_days_bulk(db_session):
+    ranges = [
+        (date(2024, 1, 1), date(2024, 1, 7), "Full Day"),
+        (date(2024, 1, 6), date(2024, 1, 7), "Full Day"),
+        (date(2024, 1, 8), None, "Half Day"),
+        (date(2024, 1, 8), None, "Full Day"),
+    ]
+    days = leave_service.calculate_working_days_bulk(db_session, ranges)
+    assert days == [leave_service.calculate_working_days(db_session, f, t, d) for f, t, d in ranges]
+    assert days[1] == 0
+    assert days[2] == Decimal("0.5")
+
 def test_apply_leave_success(db_session):
     emp = create_test_employee(db_session)
     lt = create_test_leave_type(db_session)
@@ -115,3 +133,12 @@ def test_apply_leave_success(db_session):
     
     assert bal.pending_approval == 2
     assert bal.available == -2 # Since opening was 0 and we allowed negative
+
+def test_working_days_request_limits():
+    with pytest.raises(ValidationError):
+        WorkingDaysRange(from_date=date(2024, 1, 5), to_date=date(2024, 1, 1))
+    with pytest.raises(ValidationError):
+        WorkingDaysRequest(ranges=[{"from_date": date(2024, 1, 1)}] * (settings.WORKING_DAYS_MAX_RANGES + 1))
+    with pytest.raises(ValidationError):
+        WorkingDaysRequest(ranges=[{"from_date": date(2000, 1, 1)}, {"from_date": date(2024, 1, 1)}])
+    assert len(WorkingDaysRequest(ranges=[{"from_date": date(2024, 1, 1), "to_date": date(2024, 1, 7)}]).ranges) == 1
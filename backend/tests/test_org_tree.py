@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from core.database import AsyncSessionLocal, async_engine
+from core.principal_cache import Principal
+from models.employee import Employee
+from models.user import UserRole
+from services.dashboard_service import dashboard_service
+from repositories.employee_repository import employee_repository
+from services.org_tree_service import org_tree_service
+
+def _employee(db_session, name, manager=None):
+    emp = Employee(first_name=name, last_name="Org", email=f"{name.lower()}_org@example.com", hashed_password="dummy",
+                   manager_id=manager.id if manager else None)
+    db_session.add(emp)
+    db_session.flush()
+    return emp
+
+def test_team_lookups_follow_manager_changes(db_session):
+    org_tree_service.invalidate()
+    head = _employee(db_session, "Head")
+    lead = _employee(db_session, "Lead", head)
+    dev = _employee(db_session, "Dev", lead)
+    intern = _employee(db_session, "Intern", dev)
+    other = _employee(db_session, "Other")
+    db_session.commit()
+
+    assert set(org_tree_service.team_ids(db_session, head.id)) == {lead.id, dev.id, intern.id}
+    assert org_tree_service.team_ids(db_session, head.id, depth=1) == [lead.id]
+    assert org_tree_service.team_ids(db_session, lead.id, depth=1, include_self=True) == [lead.id, dev.id]
+    assert org_tree_service.is_in_team(db_session, head.id, intern.id)
+    assert not org_tree_service.is_in_team(db_session, head.id, intern.id, depth=2)
+    assert not org_tree_service.is_in_team(db_session, other.id, dev.id)
+
+    # Moving Dev moves their reports too, without reloading the tree
+    employee_repository.update_employee(db_session, dev, {"manager_id": other.id})
+    assert set(org_tree_service.team_ids(db_session, other.id)) == {dev.id, intern.id}
+    assert org_tree_service.team_ids(db_session, head.id) == [lead.id]
+    assert org_tree_service.is_in_team(db_session, other.id, intern.id, depth=2)
+
+    # New hires join their manager's team on commit
+    hire = _employee(db_session, "Hire", intern)
+    db_session.commit()
+    assert org_tree_service.is_in_team(db_session, other.id, hire.id, depth=3)
+
+def test_cycle_falls_back_to_reload(db_session):
+    org_tree_service.invalidate()
+    top = _employee(db_session, "Top")
+    below = _employee(db_session, "Below", top)
+    db_session.commit()
+    assert org_tree_service.team_ids(db_session, top.id) == [below.id]
+
+    employee_repository.update_employee(db_session, top, {"manager_id": below.id})
+    # Lookups still terminate on the cyclic reporting line
+    assert org_tree_service.is_in_team(db_session, below.id, top.id)
+    assert org_tree_service.is_in_team(db_session, top.id, below.id)
+
+@pytest.mark.asyncio
+async def test_cold_tree_concurrent_async_dashboards():
+    # Both requests run on the event-loop thread; neither may block it while the other reads the tree
+    org_tree_service.invalidate()
+    manager = Principal(id=-1, email="cold_tree@example.com", username=None, role=UserRole.manager, employee_id=-1)
+
+    async def dashboard():
+        async with AsyncSessionLocal() as db:
+            return await dashboard_service.get_dashboard_data_async(db, manager)
+
+    try:
+        await asyncio.wait_for(asyncio.gather(dashboard(), dashboard()), timeout=30)
+    finally:
+        # Pooled asyncpg connections are bound to this test's event loop
+        await async_engine.dispose()
+    assert org_tree_service.team_ids(None, -1) == []
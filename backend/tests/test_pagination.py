@@ -0,0 +1,55 @@
+import pytest
+from datetime import date, datetime
+from types import SimpleNamespace
+from fastapi import HTTPException
+from models.employee import Employee
+from models.leave import LeaveType, LeaveTypeEnum, LeaveApplication, LeaveApplicationStatus
+from repositories.leave_repository import leave_repository
+from utils.pagination import encode_cursor, decode_cursor, page_response
+
+def test_cursor_round_trip():
+    columns = (LeaveApplication.created_at, LeaveApplication.id)
+    created_at = datetime(2024, 3, 4, 9, 30)
+    assert decode_cursor(encode_cursor([created_at, 42]), columns) == (created_at, 42)
+
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(encode_cursor([42]), columns)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", columns)
+
+def test_page_response_next_cursor():
+    items = [SimpleNamespace(id=i, created_at=datetime(2024, 3, i)) for i in (3, 2)]
+    full = page_response(items, 5, 0, 2)
+    assert full["pages"] == 3
+    assert full["next_cursor"] == encode_cursor([datetime(2024, 3, 2), 2])
+
+    # A short page is the last one
+    assert page_response(items[:1], 5, 4, 2)["next_cursor"] is None
+
+def test_cursor_pages_match_offset_pages(db_session):
+    lt = LeaveType(name=LeaveTypeEnum.casual_leave, abbr="CPG", annual_entitlement=12, accrual_method="manual")
+    emp = Employee(first_name="Cursor", last_name="Page", email="cursor_page@example.com", hashed_password="dummy")
+    db_session.add_all([lt, emp])
+    db_session.flush()
+    db_session.add_all([
+        LeaveApplication(
+            employee_id=emp.id, leave_type_id=lt.id, from_date=date(2024, 3, 4 + i), to_date=date(2024, 3, 4 + i),
+            number_of_days=1, reason="Cursor", status=LeaveApplicationStatus.pending
+        )
+        for i in range(5)
+    ])
+    db_session.commit()
+
+    offset_ids = [a.id for a in leave_repository.get_applications(db_session, skip=0, limit=5, employee_id=emp.id)[0]]
+
+    cursor_ids, cursor = [], None
+    while True:
+        items, total = leave_repository.get_applications(db_session, skip=0, limit=2, employee_id=emp.id, cursor=cursor)
+        assert total == 5
+        cursor_ids += [a.id for a in items]
+        cursor = page_response(items, total, 0, 2)["next_cursor"]
+        if not cursor:
+            break
+
+    assert cursor_ids == offset_ids
@@ -0,0 +1,46 @@
+import io
+import pypdfium2 as pdfium
+from PIL import Image
+from fastapi import UploadFile
+from core.config import settings
+from services.preview_service import generate_previews, is_previewable, preview_key, preview_service
+from utils.file_storage import upload_file
+from utils.storage import get_storage
+
+def _png(width, height) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 30, 30, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def _pdf() -> bytes:
+    pdf = pdfium.PdfDocument.new()
+    pdf.new_page(595, 842) # A4 in points
+    buffer = io.BytesIO()
+    pdf.save(buffer)
+    return buffer.getvalue()
+
+def test_preview_keys():
+    assert preview_key("blobs/ab/ab12.pdf", "thumb") == "blobs/ab/ab12.thumb.jpg"
+    assert is_previewable("blobs/ab/ab12.PNG")
+    assert not is_previewable("blobs/ab/ab12.docx")
+    assert not is_previewable("employees/1/photo.png") # Only content-addressed uploads
+    assert not is_previewable(None)
+
+def test_image_previews(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    key = upload_file(UploadFile(io.BytesIO(_png(3000, 1500)), filename="scan.png")).path
+
+    assert sorted(generate_previews(key)) == [preview_key(key, "preview"), preview_key(key, "thumb")]
+    thumb = Image.open(io.BytesIO(get_storage().get(preview_key(key, "thumb"))))
+    assert (thumb.format, thumb.mode, thumb.size) == ("JPEG", "RGB", (256, 128))
+    # Already there: nothing to do, and readers get it without waiting on the pool
+    assert generate_previews(key) == []
+    assert preview_service.ensure(key, "preview") == preview_key(key, "preview")
+
+def test_pdf_first_page_preview(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    key = upload_file(UploadFile(io.BytesIO(_pdf()), filename="offer.pdf")).path
+
+    generate_previews(key)
+    preview = Image.open(io.BytesIO(get_storage().get(preview_key(key, "preview"))))
+    assert preview.size[1] == 1280 and preview.size[0] < 1280
@@ -0,0 +1,52 @@
+import pytest
+from core.config import settings
+from core.principal_cache import Principal, PrincipalCache, principal_cache
+from models.user import User, UserRole
+
+def make_principal(email="cache_test@example.com", role=UserRole.employee):
+    return Principal(id=1, email=email, username="cache_test", role=role, employee_id=None)
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_MAX_SIZE", 2)
+    cache = PrincipalCache()
+    for email in ("a@example.com", "b@example.com", "c@example.com"):
+        cache.set(email, make_principal(email))
+    assert cache.get("a@example.com") is None
+    assert cache.get("c@example.com").email == "c@example.com"
+
+def test_zero_ttl_disables_cache(monkeypatch):
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_TTL_SECONDS", 0)
+    cache = PrincipalCache()
+    cache.set("a@example.com", make_principal("a@example.com"))
+    assert cache.get("a@example.com") is None
+
+def test_principal_from_claims():
+    principal = Principal.from_claims({"sub": "a@example.com", "uid": 7, "role": "manager", "employee_id": 3})
+    assert principal.role == UserRole.manager
+    assert principal.employee_id == 3
+    assert Principal.from_claims({"sub": "a@example.com", "role": "manager"}) is None
+
+def test_role_change_invalidates_cached_principal(db_session):
+    user = User(username="cache_test", email="cache_test@example.com", password_hash="dummy", role=UserRole.employee)
+    db_session.add(user)
+    db_session.commit()
+    principal_cache.set(user.email, Principal.from_user(user))
+
+    user.role = UserRole.manager
+    db_session.commit()
+
+    assert principal_cache.get(user.email) is None
+
+def test_principal_recached_before_commit_is_invalidated_on_commit(db_session):
+    user = User(username="cache_test", email="cache_test@example.com", password_hash="dummy", role=UserRole.employee)
+    db_session.add(user)
+    db_session.commit()
+    old = Principal.from_user(user)
+
+    user.role = UserRole.manager
+    db_session.flush()
+    # Another request resolves the still-committed old row between the flush and the commit
+    principal_cache.set(user.email, old)
+    db_session.commit()
+
+    assert principal_cache.get(user.email) is None
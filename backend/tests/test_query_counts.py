@@ -0,0 +1,76 @@
+import pytest
+from datetime import date
+from core.dependencies import get_current_user_async
+from core.principal_cache import Principal
+from main import app
+from models.employee import Employee
+from models.leave import LeaveType, LeaveTypeEnum, LeaveBalance, LeaveApplication, LeaveApplicationStatus
+from models.user import UserRole
+from services.accrual_service import accrual_service
+
+PAGE_SIZES = (2, 12)
+YEAR = date.today().year
+
+def _seed_team(db):
+    """A manager with four reports, three leave types each (12 balances) and 12 pending applications."""
+    manager = Employee(first_name="Query", last_name="Manager", email="query_manager@example.com", hashed_password="dummy")
+    db.add(manager)
+    db.flush()
+
+    reports = [
+        Employee(first_name="Query", last_name=f"Report{i}", email=f"query_report{i}@example.com", hashed_password="dummy", manager_id=manager.id)
+        for i in range(4)
+    ]
+    leave_types = [
+        LeaveType(name=name, abbr=f"Q{i}", annual_entitlement=12, accrual_method="manual")
+        for i, name in enumerate([LeaveTypeEnum.casual_leave, LeaveTypeEnum.sick_leave, LeaveTypeEnum.bereavement_leave])
+    ]
+    db.add_all(reports + leave_types)
+    db.flush()
+
+    for emp in reports:
+        for i, lt in enumerate(leave_types):
+            db.add(LeaveBalance(employee_id=emp.id, leave_type_id=lt.id, leave_year=YEAR, available=12, accrued=12,
+                                accrual_month=accrual_service.target_month(YEAR)))
+            db.add(LeaveApplication(
+                employee_id=emp.id, leave_type_id=lt.id, from_date=date(YEAR, 3, 4 + i), to_date=date(YEAR, 3, 4 + i),
+                number_of_days=1, reason="Query count", status=LeaveApplicationStatus.pending
+            ))
+    return manager.id
+
+@pytest.fixture
+def team(async_routes_db):
+    """Seeded where the async routes read, since the list endpoints run on get_async_db."""
+    return async_routes_db(_seed_team)
+
+def login_as(role: UserRole, employee_id: int):
+    principal = Principal(id=-1, email="query_counts@example.com", username=None, role=role, employee_id=employee_id)
+    app.dependency_overrides[get_current_user_async] = lambda: principal
+
+def statements_per_page(client, count_queries, url):
+    """Statement count of a full request (routing, service, response_model serialization) per page size."""
+    # Warm process-wide caches (org tree, stale balance checks) so only per-page work is counted
+    assert client.get(url, params={"limit": 1}).status_code == 200
+    counts = []
+    for size in PAGE_SIZES:
+        with count_queries() as statements:
+            response = client.get(url, params={"limit": size})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == size
+        counts.append(len(statements))
+    return counts
+
+def test_all_applications_query_count(client, count_queries, team):
+    login_as(UserRole.hr_admin, team)
+    counts = statements_per_page(client, count_queries, "/api/leaves/applications/all")
+    assert counts[0] == counts[1]
+
+def test_pending_approvals_query_count(client, count_queries, team):
+    login_as(UserRole.manager, team)
+    counts = statements_per_page(client, count_queries, "/api/leaves/approvals/pending")
+    assert counts[0] == counts[1]
+
+def test_team_balances_query_count(client, count_queries, team):
+    login_as(UserRole.manager, team)
+    counts = statements_per_page(client, count_queries, "/api/leaves/balances/team")
+    assert counts[0] == counts[1]
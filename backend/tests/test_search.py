@@ -0,0 +1,37 @@
+from sqlalchemy.dialects import postgresql
+from models.employee import Employee
+from models.leave import LeaveApplication
+from repositories.employee_repository import employee_repository
+from utils.search import search_filter
+
+def test_search_filter_terms():
+    assert search_filter("   ", Employee.first_name) is None
+
+    condition = search_filter("jane 50%", Employee.first_name, Employee.last_name)
+    params = condition.compile().params
+    # One condition per (term, column); wildcards in the input are matched literally
+    assert sorted(params.values()) == ["%50\\%%", "%50\\%%", "%jane%", "%jane%"]
+
+def test_employee_search_matches_across_columns_and_ranks(db_session):
+    db_session.add_all([
+        Employee(first_name="Zephyrinette", last_name="Brook", email="zb_search@example.com", hashed_password="dummy"),
+        Employee(first_name="Zephyrine", last_name="Quillfeather", email="zq_search@example.com", hashed_password="dummy"),
+        Employee(first_name="Other", last_name="Zephyrine", email="oz_search@example.com", hashed_password="dummy"),
+    ])
+    db_session.commit()
+
+    items, total = employee_repository.get_employees(db_session, search="zephyrine quill")
+    assert total == 1
+    assert items[0].email == "zq_search@example.com"
+
+    items, total = employee_repository.get_employees(db_session, search="Zephyrine")
+    assert total == 3
+    # Whole-word matches rank above the longer name, although it was created first
+    assert items[-1].email == "zb_search@example.com"
+
+def test_cross_table_search_unions_per_table_subqueries():
+    condition = search_filter("jane", Employee.first_name, Employee.last_name, LeaveApplication.reason, via={Employee: LeaveApplication.employee_id})
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+    # Each table is searched on its own (where its trigram index applies), not as an OR across the join
+    assert "UNION" in sql
+    assert "leave_applications.employee_id IN (SELECT employees.id" in sql
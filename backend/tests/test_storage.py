@@ -0,0 +1,83 @@
+import io
+from pathlib import Path
+import boto3
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from core.config import settings
+from utils.file_storage import file_response, upload_file
+from utils.storage import LocalStorage, S3Storage, StorageBackend, get_storage
+
+CONTENT = b"0123456789" * 500
+
+@pytest.fixture
+def s3(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path))
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(settings, "S3_BUCKET", "hrms-uploads")
+    monkeypatch.setattr(settings, "S3_REGION", "us-east-1")
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr("utils.storage._instances", {})
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="hrms-uploads")
+        yield get_storage()
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/files/{key:path}")
+    def download(key: str, request: Request):
+        return file_response(request, key)
+
+    return TestClient(app, follow_redirects=False)
+
+def test_local_storage_stays_under_upload_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_ROOT", str(tmp_path / "uploads"))
+    (tmp_path / "secret.txt").write_text("x")
+    with pytest.raises(FileNotFoundError):
+        LocalStorage().stat("../secret.txt")
+
+def test_incomplete_backend_fails_on_instantiation():
+    class PutOnly(StorageBackend):
+        def put(self, key, source_path):
+            pass
+
+    with pytest.raises(TypeError):
+        PutOnly()
+
+def test_s3_backend_round_trip(s3):
+    assert isinstance(s3, S3Storage)
+    stored = upload_file(UploadFile(io.BytesIO(CONTENT), filename="payslip.pdf"))
+
+    stat = s3.stat(stored.path)
+    assert stat.size == len(CONTENT)
+    assert s3.get(stored.path) == CONTENT
+    assert b"".join(s3.stream(stored.path, 100, 2099)) == CONTENT[100:2100]
+    # The local scratch copy is gone once uploaded
+    assert [p for p in Path(settings.UPLOAD_ROOT).rglob("*") if p.is_file()] == []
+
+    # Same content again: deduplicated onto the existing object
+    assert upload_file(UploadFile(io.BytesIO(CONTENT), filename="copy.pdf")).path == stored.path
+
+    assert s3.delete(stored.path)
+    assert not s3.exists(stored.path)
+
+def test_s3_downloads_stream_or_redirect(s3, client, monkeypatch):
+    key = upload_file(UploadFile(io.BytesIO(CONTENT), filename="payslip.pdf")).path
+
+    response = client.get(f"/files/{key}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    etag = client.get(f"/files/{key}").headers["etag"]
+    assert client.get(f"/files/{key}", headers={"If-None-Match": etag}).status_code == 304
+
+    monkeypatch.setattr(settings, "STORAGE_PRESIGNED_DOWNLOADS", True)
+    response = client.get(f"/files/{key}")
+    assert response.status_code == 307
+    assert "X-Amz-Signature" in response.headers["location"]
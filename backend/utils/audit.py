@@ -1,6 +1,32 @@
+import enum
 from sqlalchemy.orm import Session
 from models.audit import AuditLog
-from typing import Any, Optional
+from typing import Any, Dict, Mapping, Optional
+
+# Never copied into audit details
+AUDIT_EXCLUDED_FIELDS = frozenset({"hashed_password", "password_hash", "created_at", "updated_at"})
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+def diff_changes(obj: Any, new_values: Mapping[str, Any], exclude=AUDIT_EXCLUDED_FIELDS) -> Dict[str, Dict[str, Any]]:
+    """
+    The fields of `obj` that applying `new_values` would actually change, as
+    {field: {"old": ..., "new": ...}}. Call it before assigning the new values.
+    """
+    changes = {}
+    for field, new in new_values.items():
+        if field in exclude or not hasattr(obj, field):
+            continue
+        old = getattr(obj, field)
+        if _jsonable(old) == _jsonable(new):
+            continue
+        changes[field] = {"old": _jsonable(old), "new": _jsonable(new)}
+    return changes
 
 def log_action(
     db: Session,
@@ -11,6 +37,10 @@ def log_action(
     details: Optional[Any] = None,
     ip_address: Optional[str] = None
 ):
+    """
+    Adds an audit entry to the caller's transaction; it is written by the caller's next
+    commit (entries flushed together go out as one multi-row insert), and rolls back with it.
+    """
     audit_log = AuditLog(
         user_id=user_id,
         action=action,
@@ -20,4 +50,4 @@ def log_action(
         ip_address=ip_address
     )
     db.add(audit_log)
-    db.commit()
+    return audit_log
@@ -0,0 +1,123 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+from sqlalchemy import Numeric
+
+# Rows fetched per server-side cursor round trip, and per CSV chunk / Parquet row group
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def resolve_columns(columns: Optional[str], available: Dict[str, tuple], default: Sequence[str]) -> List[str]:
+    """Parses a comma-separated list of column keys from `available` (the `default` set when empty)."""
+    if not columns:
+        return list(default)
+    keys = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [k for k in keys if k not in available]
+    if unknown or not keys:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown export columns: {', '.join(unknown)}. Available: {', '.join(available)}"
+        )
+    return keys
+
+
+def _plain(value):
+    # Enum members go out as their value; Arrow converts dates, decimals and numbers itself
+    return getattr(value, "value", value)
+
+
+def csv_chunks(rows: Iterable, headers: Sequence[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """CSV text in chunks of `batch_size` rows, starting with the header row."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_plain(v) for v in row])
+        if i % batch_size == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+
+def _arrow_type(sql_type) -> pa.DataType:
+    if isinstance(sql_type, Numeric) and sql_type.asdecimal and sql_type.precision:
+        return pa.decimal128(sql_type.precision, sql_type.scale or 0)
+    try:
+        python_type = sql_type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if issubclass(python_type, bool):
+        return pa.bool_()
+    if issubclass(python_type, int):
+        return pa.int64()
+    if issubclass(python_type, (float, Decimal)):
+        return pa.float64()
+    if issubclass(python_type, datetime):
+        return pa.timestamp("us", tz="UTC")
+    if issubclass(python_type, date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(query) -> pa.Schema:
+    """Parquet schema from a column query's labels and SQL types (Enums are written as strings)."""
+    return pa.schema([(c["name"], _arrow_type(c["type"])) for c in query.column_descriptions])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back what the Parquet writer produced since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_chunks(rows: Iterable[Tuple], schema: pa.Schema, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    A Parquet file as it is written, one row group per `batch_size` rows: each group's bytes are
+    yielded as soon as it is encoded and the footer comes last, so only one batch is held in memory.
+    """
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array([_plain(v) for v in values], type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -1,57 +1,255 @@
+import hashlib
+import mimetypes
 import os
-import uuid
+import re
 import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from fastapi import UploadFile
+from typing import Optional, Tuple
+import anyio
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from core.config import settings
+from utils.storage import content_disposition, get_storage
+
+# Bytes read from the upload and written to disk at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Cache-Control for URLs whose content can't change
+IMMUTABLE_CACHE = "max-age=31536000, immutable"
+
+# Content-addressed uploads are stored as blobs/<first 2 hex chars>/<sha256><ext>
+BLOB_FOLDER = "blobs"
+
+@dataclass(frozen=True)
+class StoredFile:
+    path: str # Storage key, as stored on the owning row
+    size: int
+    sha256: str
+
+def is_blob(relative_path: Optional[str]) -> bool:
+    return bool(relative_path) and Path(relative_path).parts[0] == BLOB_FOLDER
+
+def blob_path(sha256: str, extension: str = "") -> str:
+    return str(Path(BLOB_FOLDER) / sha256[:2] / f"{sha256}{extension.lower()}")
+
+def _place_blob(temp_path: str, sha256: str, extension: str) -> str:
+    relative_path = blob_path(sha256, extension)
+    storage = get_storage()
+    if storage.exists(relative_path):
+        # Same content is already stored; touching it keeps blob collection off it until it is referenced
+        Path(temp_path).unlink()
+        storage.touch(relative_path)
+    else:
+        storage.put(relative_path, temp_path)
+    return relative_path
+
+def upload_file(file: UploadFile, max_size: Optional[int] = None) -> StoredFile:
+    """
+    Saves an upload to the content-addressed store, in fixed-size chunks.
+    The content is hashed as it is written to a temp file and only renamed into place once
+    complete, so a partial file is never visible; identical content is stored once. Raises
+    413 (and keeps nothing) as soon as the upload passes `max_size` (UPLOAD_MAX_SIZE by default).
+
+    Rows that store the returned path are reference-counted by services.blob_service.
+    Blocking: call it from sync code, or use save_upload from async endpoints.
+    """
+    max_size = settings.UPLOAD_MAX_SIZE if max_size is None else max_size
+    blobs_root = Path(settings.UPLOAD_ROOT) / BLOB_FOLDER
+    blobs_root.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=blobs_root, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            file.file.seek(0)
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File {file.filename or 'unnamed'} exceeds {max_size // (1024 * 1024)}MB limit"
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+            buffer.flush()
+            os.fsync(buffer.fileno())
+        relative_path = _place_blob(temp_path, digest.hexdigest(), Path(file.filename or "").suffix)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
 
-def upload_file(file: UploadFile, sub_folder: str) -> str:
+    return StoredFile(path=relative_path, size=size, sha256=digest.hexdigest())
+
+async def save_upload(file: UploadFile, max_size: Optional[int] = None) -> StoredFile:
+    """upload_file for async endpoints: the copy runs in a worker thread, off the event loop."""
+    return await run_in_threadpool(upload_file, file, max_size)
+
+def adopt_file(relative_path: str) -> str:
     """
-    Saves a file to local storage.
-    Creates directories if they don't exist.
-    Generates a unique filename.
-    Returns the relative path from UPLOAD_ROOT.
+    Adds a file saved under UPLOAD_ROOT before content addressing to the blob store
+    (hard-linked where possible) and returns its blob path. The original stays until the
+    caller deletes it.
     """
-    # Define absolute path for the folder
-    folder_path = Path(settings.UPLOAD_ROOT) / sub_folder
-    folder_path.mkdir(parents=True, exist_ok=True)
+    source = Path(settings.UPLOAD_ROOT) / relative_path
+    digest = hashlib.sha256()
+    with source.open("rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+
+    blobs_root = Path(settings.UPLOAD_ROOT) / BLOB_FOLDER
+    blobs_root.mkdir(parents=True, exist_ok=True)
+    temp_path = blobs_root / f".adopt-{uuid.uuid4().hex}.part"
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        shutil.copyfile(source, temp_path)
+    return _place_blob(str(temp_path), digest.hexdigest(), source.suffix)
+
+# One `first-last` spec; several comma-separated ranges are answered with the whole file
+_RANGE_SPEC = re.compile(r"^\s*(\d*)-(\d*)\s*$")
 
-    # Generate unique filename
-    file_extension = Path(file.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = folder_path / unique_filename
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison; If-Modified-Since is ignored when If-None-Match is sent
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _range_applies(request: Request, etag: str, last_modified: str) -> bool:
+    # If-Range: only honour the Range if the client's copy is still current, else send it all
+    if_range = request.headers.get("if-range")
+    return if_range is None or if_range.strip() in (etag, last_modified)
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single `bytes=` range within a file of `size` bytes.
+    Returns None when the header should be ignored (malformed, or several ranges) and
+    raises ValueError when the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    match = _RANGE_SPEC.match(spec)
+    if unit.strip().lower() != "bytes" or not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(last), size - 1) if last else size - 1
 
-    # Save the file
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse for the whole file (zero-copy where the server offers http.response.pathsend)
+    or, with `byte_range`, a 206 Partial Content response for that inclusive byte range.
+    """
 
-    # Return relative path for DB storage
-    return str(Path(sub_folder) / unique_filename)
+    def __init__(self, path: str, byte_range: Optional[Tuple[int, int]] = None, **kwargs):
+        super().__init__(path, status_code=206 if byte_range else 200, **kwargs)
+        self.byte_range = byte_range
+        self.chunk_size = settings.DOWNLOAD_CHUNK_SIZE
 
-def get_file_path(relative_path: str) -> str:
-    """Returns the absolute path for a given relative path."""
-    return str(Path(settings.UPLOAD_ROOT) / relative_path)
+    async def __call__(self, scope, receive, send) -> None:
+        if self.byte_range is None:
+            return await super().__call__(scope, receive, send)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            start, end = self.byte_range
+            remaining = end - start + 1
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break # Truncated underneath us; end the body rather than hang
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
 
-def get_file_stream(relative_path: str):
+def file_response(request: Request, relative_path: str, filename: Optional[str] = None, cache_control: str = "private, no-cache") -> Response:
     """
-    Returns a generator to stream the file for download.
+    Download response for a stored file with Content-Length, ETag and Last-Modified set.
+    Answers conditional requests with 304 Not Modified and a single `Range` with 206 Partial
+    Content (416 when out of bounds). With STORAGE_PRESIGNED_DOWNLOADS it redirects to a
+    presigned URL instead where the backend offers one. Raises FileNotFoundError if the file is missing.
     """
-    file_path = Path(settings.UPLOAD_ROOT) / relative_path
-    if not file_path.exists():
+    storage = get_storage()
+    try:
+        stored = storage.stat(relative_path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {relative_path}")
-    
-    def iterfile():
-        with open(file_path, mode="rb") as f:
-            yield from f
-            
-    return iterfile
+    filename = filename or Path(relative_path).name
+
+    if settings.STORAGE_PRESIGNED_DOWNLOADS:
+        url = storage.presign(relative_path, filename)
+        if url:
+            return RedirectResponse(url, status_code=307, headers={"cache-control": "no-store"})
+
+    size = stored.size
+    # A blob's name is its hash, the strongest validator there is
+    etag = f'"{Path(relative_path).stem}"' if is_blob(relative_path) else stored.etag
+    last_modified = formatdate(stored.modified, usegmt=True)
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": cache_control, # By default revalidate every time; unchanged files cost a 304
+        "accept-ranges": "bytes",
+    }
+    if _not_modified(request, etag, stored.modified):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+    start, end = byte_range or (0, size - 1)
+    if byte_range:
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+    headers["content-length"] = str(end - start + 1)
+
+    local_path = storage.local_path(relative_path)
+    if local_path:
+        return RangeFileResponse(local_path, byte_range=byte_range, headers=headers, filename=filename)
+    headers["content-disposition"] = content_disposition(filename)
+    return StreamingResponse(
+        storage.stream(relative_path, start, end) if size else iter(()),
+        status_code=206 if byte_range else 200,
+        headers=headers,
+        media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+    )
 
 def delete_file(relative_path: str) -> bool:
     """
-    Deletes a file from local storage.
+    Deletes a file from storage.
+    Blobs are shared, so they are left alone here: they go once the last row
+    referencing them is changed or deleted (see services.blob_service).
     """
-    file_path = Path(settings.UPLOAD_ROOT) / relative_path
-    if file_path.exists():
-        file_path.unlink()
-        return True
-    return False
\ No newline at end of file
+    if is_blob(relative_path):
+        return False
+    return get_storage().delete(relative_path)
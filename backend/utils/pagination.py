@@ -0,0 +1,138 @@
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from core.config import settings
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort-key values of the last row on a page."""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_columns: Sequence) -> Tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(sort_columns):
+            raise ValueError("cursor does not match sort key")
+        decoded = []
+        for column, value in zip(sort_columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return tuple(decoded)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+class CountCache:
+    """
+    Short-lived cache of exact totals keyed on the compiled count query, so paging through
+    a large list with a cursor doesn't re-run the full filtered count on every page.
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, query: Query) -> tuple:
+        compiled = query.statement.compile()
+        return str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+
+    def get(self, query: Query) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(self._key(query))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, query: Query, total: int):
+        now = time.monotonic()
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[self._key(query)] = (now + settings.PAGINATION_COUNT_CACHE_TTL_SECONDS, total)
+
+count_cache = CountCache()
+
+
+def paginate(
+    query: Query,
+    sort_columns: Sequence,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+    options: Sequence = (),
+    rank=None
+) -> Tuple[List[Any], int]:
+    """
+    One page of `query` ordered by `sort_columns` (which must end in a unique column), plus the total.
+
+    Offset mode (no cursor) counts exactly and remembers the count. Cursor mode seeks past the
+    given sort key instead of scanning skipped rows and reuses the remembered count while it is
+    fresh, so its total may lag recent writes by up to PAGINATION_COUNT_CACHE_TTL_SECONDS.
+    Loader `options` (e.g. contains_eager) apply to the page query only, not the count.
+    A search `rank` (utils.search.apply_search) orders offset pages by relevance first; cursor
+    pages always follow the plain sort key.
+    """
+    if cursor:
+        total = count_cache.get(query)
+        if total is None:
+            total = query.count()
+            count_cache.set(query, total)
+        key = tuple_(*sort_columns)
+        values = decode_cursor(cursor, sort_columns)
+        query = query.filter(key < values if descending else key > values)
+    else:
+        total = query.count()
+        count_cache.set(query, total)
+
+    order = [c.desc() for c in sort_columns] if descending else [c.asc() for c in sort_columns]
+    if rank is not None and not cursor:
+        order.insert(0, rank.desc())
+    query = query.options(*options).order_by(*order)
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all(), total
+
+
+def page_response(
+    items: List[Any],
+    total: int,
+    skip: int,
+    limit: int,
+    cursor_keys: Sequence[str] = ("created_at", "id"),
+    has_more: Optional[bool] = None,
+    ranked: bool = False
+) -> dict:
+    """
+    PaginatedResponse payload; next_cursor is set when the page is full (or has_more says so).
+    Relevance-ranked pages (a search term was given) page by offset only, so they get no cursor.
+    """
+    if ranked:
+        has_more = False
+    elif has_more is None:
+        has_more = len(items) == limit
+    next_cursor = None
+    if items and has_more:
+        last = items[-1]
+        next_cursor = encode_cursor([
+            last[k] if isinstance(last, dict) else getattr(last, k) for k in cursor_keys
+        ])
+    return {
+        "items": items,
+        "total": total,
+        "page": (skip // limit) + 1,
+        "size": limit,
+        "pages": (total + limit - 1) // limit if total > 0 else 0,
+        "next_cursor": next_cursor
+    }
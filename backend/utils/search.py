@@ -0,0 +1,85 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Enum, Float, String, and_, cast, func, inspect, or_, select, union
+from sqlalchemy.orm import Query
+
+# Longer inputs are truncated to this many terms; each one adds a condition per column
+MAX_SEARCH_TERMS = 5
+
+
+def _terms(search: Optional[str]) -> List[str]:
+    return (search or "").split()[:MAX_SEARCH_TERMS]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _as_text(column):
+    # Enum columns (e.g. LeaveType.name) have no ILIKE operator in Postgres
+    return cast(column, String) if isinstance(column.type, Enum) else column
+
+
+def _matches(term: str, columns):
+    return or_(*[_as_text(column).ilike(f"%{_escape_like(term)}%", escape="\\") for column in columns])
+
+
+def _term_condition(term: str, columns, via: Dict[type, object]):
+    """
+    `term` in any column, as one `id IN (...)` over per-table subqueries. ORing ILIKEs on
+    different joined tables can only be checked row by row after the join, so no index
+    serves it; each subquery here hits its own table's trigram index and the UNION merges them.
+    """
+    by_model: Dict[type, list] = {}
+    for column in columns:
+        by_model.setdefault(column.class_, []).append(column)
+    entity = next(iter(via.values())).class_
+    key = inspect(entity).primary_key[0]
+    branches = []
+    # Uncorrelated: the outer query reads the same tables, which would otherwise drop out of the subqueries
+    for model, model_columns in by_model.items():
+        if model is entity:
+            branches.append(select(key).where(_matches(term, model_columns)).correlate(None))
+        else:
+            matched = select(inspect(model).primary_key[0]).where(_matches(term, model_columns)).correlate(None)
+            branches.append(select(key).where(via[model].in_(matched)).correlate(None))
+    if len(branches) == 1:
+        return branches[0].whereclause
+    return key.in_(union(*branches))
+
+
+def search_filter(search: Optional[str], *columns, via: Optional[Dict[type, object]] = None):
+    """
+    Every whitespace-separated term must appear (case-insensitively) in at least one of
+    `columns`, so "jane doe" matches first_name "Jane" with last_name "Doe". `%` and `_`
+    are matched literally. The substring ILIKEs are served by the pg_trgm GIN indexes on
+    the searched columns (for terms of three or more characters) rather than a sequential scan.
+
+    Columns of joined tables need `via`, mapping each joined model to the searched entity's
+    foreign key to it (e.g. {Employee: LeaveApplication.employee_id}); see _term_condition.
+    """
+    terms = _terms(search)
+    if not terms:
+        return None
+    if via:
+        return and_(*[_term_condition(term, columns, via) for term in terms])
+    return and_(*[_matches(term, columns) for term in terms])
+
+
+def search_rank(search: str, *columns):
+    """Relevance between 0 and 1: the best pg_trgm word_similarity of the search text to any column."""
+    text = " ".join(_terms(search))
+    return func.greatest(*[
+        func.word_similarity(text, func.coalesce(_as_text(column), ""), type_=Float) for column in columns
+    ])
+
+
+def apply_search(query: Query, search: Optional[str], *columns, via: Optional[Dict[type, object]] = None) -> Tuple[Query, Optional[object]]:
+    """
+    Filters `query` by `search` over `columns` (see search_filter).
+    Returns the filtered query and a rank expression for paginate, or None when there is nothing to search.
+    The rank reads every column, so joined tables must still be joined in `query`.
+    """
+    condition = search_filter(search, *columns, via=via)
+    if condition is None:
+        return query, None
+    return query.filter(condition), search_rank(search, *columns)
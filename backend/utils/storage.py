@@ -0,0 +1,211 @@
+import mimetypes
+import os
+import stat
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    size: int
+    modified: float # Unix time
+    etag: str # Quoted, as sent in the ETag header
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded files are kept. Keys are the relative paths stored on rows
+    (e.g. blobs/ab/<sha256>.pdf); a missing key raises FileNotFoundError.
+    """
+
+    @abstractmethod
+    def put(self, key: str, source_path: str):
+        """Stores the finished local file `source_path` under `key` and removes the local copy."""
+
+    @abstractmethod
+    def stat(self, key: str) -> ObjectStat:
+        """Size, modification time and ETag of the object."""
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.stat(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @abstractmethod
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """The object's bytes from `start` to `end` (inclusive; the last byte when None) in DOWNLOAD_CHUNK_SIZE chunks."""
+
+    def get(self, key: str) -> bytes:
+        return b"".join(self.stream(key))
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Removes the object; False when there was nothing to remove."""
+
+    @abstractmethod
+    def touch(self, key: str):
+        """Refreshes the modification time (blob collection leaves recently touched objects alone)."""
+
+    def presign(self, key: str, filename: Optional[str] = None) -> Optional[str]:
+        """A short-lived URL clients can download from directly, or None if the backend has none."""
+        return None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """A filesystem path for zero-copy serving, or None when the object isn't on local disk."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Files under UPLOAD_ROOT. Only suitable for a single host (or a shared volume)."""
+
+    def _path(self, key: str) -> Path:
+        root = Path(settings.UPLOAD_ROOT).resolve()
+        path = (root / key).resolve()
+        if root not in path.parents:
+            raise FileNotFoundError(key)
+        return path
+
+    def put(self, key: str, source_path: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source_path, path)
+
+    def stat(self, key: str) -> ObjectStat:
+        st = os.stat(self._path(key))
+        if not stat.S_ISREG(st.st_mode):
+            raise FileNotFoundError(key)
+        # Stored names identify their content, so size + mtime make a stable tag
+        return ObjectStat(size=st.st_size, modified=st.st_mtime, etag=f'"{st.st_mtime_ns:x}-{st.st_size:x}"')
+
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(settings.DOWNLOAD_CHUNK_SIZE if remaining is None else min(settings.DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> bool:
+        path = self._path(key)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def touch(self, key: str):
+        os.utime(self._path(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self._path(key))
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in S3_BUCKET on S3 or any S3-compatible service (MinIO, Ceph, R2) at S3_ENDPOINT_URL,
+    so every API replica sees the same files. Needs boto3.
+    """
+
+    def __init__(self):
+        import boto3
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if settings.S3_ENDPOINT_URL else "auto"}),
+        )
+
+    def _missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def put(self, key: str, source_path: str):
+        media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        # upload_file switches to a multipart upload for large files
+        self.client.upload_file(source_path, self.bucket, key, ExtraArgs={"ContentType": media_type})
+        os.remove(source_path)
+
+    def stat(self, key: str) -> ObjectStat:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            if self._missing(e):
+                raise FileNotFoundError(key)
+            raise
+        return ObjectStat(size=head["ContentLength"], modified=head["LastModified"].timestamp(), etag=head["ETag"])
+
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            body = self.client.get_object(**params)["Body"]
+        except self._client_error as e:
+            if self._missing(e):
+                raise FileNotFoundError(key)
+            raise
+        try:
+            yield from body.iter_chunks(settings.DOWNLOAD_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> bool:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def touch(self, key: str):
+        # An in-place copy is the only way to move LastModified
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        self.client.copy_object(
+            Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE", ContentType=head.get("ContentType", "application/octet-stream"),
+        )
+
+    def presign(self, key: str, filename: Optional[str] = None) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": content_disposition(filename or Path(key).name),
+            },
+            ExpiresIn=settings.STORAGE_PRESIGN_EXPIRY_SECONDS,
+        )
+
+
+_BACKENDS = {"local": LocalStorage, "s3": S3Storage}
+_instances: Dict[str, StorageBackend] = {}
+_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    """The backend named by STORAGE_BACKEND (created once per process)."""
+    name = settings.STORAGE_BACKEND
+    with _lock:
+        if name not in _instances:
+            if name not in _BACKENDS:
+                raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {', '.join(_BACKENDS)}")
+            _instances[name] = _BACKENDS[name]()
+        return _instances[name]